@@ -6,6 +6,9 @@ import sys
 
 def get_logger() -> logging.Logger:
     logger = logging.getLogger("PAO_logger")
+    if logger.handlers:
+        return logger
+
     logger.setLevel(logging.WARNING)
     sh = logging.StreamHandler(sys.stdout)
     sh.setFormatter(
@@ -0,0 +1,211 @@
+"""Simplification of expressions that are only partly constant."""
+
+import ast
+
+# Comparisons that only return bools whatever their operands are
+_BOOL_COMPARISONS = (ast.Is, ast.IsNot, ast.In, ast.NotIn)
+
+# Comparisons and their inverse for operands with a total order
+_INVERTED_COMPARISONS: dict[type[ast.cmpop], type[ast.cmpop]] = {
+    ast.Eq: ast.NotEq,
+    ast.NotEq: ast.Eq,
+    ast.Lt: ast.GtE,
+    ast.LtE: ast.Gt,
+    ast.Gt: ast.LtE,
+    ast.GtE: ast.Lt,
+}
+
+
+# Comparisons assumed not to raise for any operands
+_NON_RAISING_COMPARISONS = (ast.Is, ast.IsNot, ast.Eq, ast.NotEq)
+
+# Types isinstance can check against without raising
+_BUILTIN_TYPES: frozenset[str] = frozenset(
+    (
+        "bool",
+        "bytes",
+        "complex",
+        "dict",
+        "float",
+        "frozenset",
+        "int",
+        "list",
+        "object",
+        "set",
+        "str",
+        "tuple",
+        "type",
+    )
+)
+
+# Extra cost of evaluating each node type when ordering operands
+_NODE_COSTS: dict[type[ast.expr], int] = {ast.Call: 10, ast.Attribute: 2}
+
+
+def _is_int(node: ast.expr, value: int) -> bool:
+    return (
+        isinstance(node, ast.Constant)
+        and type(node.value) is int
+        and node.value == value
+    )
+
+
+def _is_bool(node: ast.expr, assume_numeric_operands: bool) -> bool:
+    """Checks if node always evaluates to a bool."""
+    match node:
+        case ast.UnaryOp(op=ast.Not()):
+            return True
+        case ast.Compare(ops=ops):
+            return assume_numeric_operands or all(
+                isinstance(op, _BOOL_COMPARISONS) for op in ops
+            )
+        case ast.Constant(value=bool()):
+            return True
+        case _:
+            return False
+
+
+def simplify_test(node: ast.expr, assume_numeric_operands: bool) -> ast.expr:
+    """Simplifies node knowing only its truthiness is used, like the test of an if.
+
+    :param node: Expression used as a bool
+    :param assume_numeric_operands: If operands can be assumed to be numbers
+    :returns: Expression with the same truthiness"""
+    match node:
+        case ast.UnaryOp(
+            op=ast.Not(), operand=ast.UnaryOp(op=ast.Not(), operand=value)
+        ):
+            return simplify_test(value, assume_numeric_operands)
+        case ast.BoolOp(values=values):
+            node.values = [
+                simplify_test(value, assume_numeric_operands) for value in values
+            ]
+        case ast.Compare(
+            left=left, ops=[ast.Eq() | ast.NotEq() as op], comparators=[right]
+        ):
+            if isinstance(left, ast.Constant):
+                left, right = right, left
+            if (
+                isinstance(right, ast.Constant)
+                and isinstance(right.value, bool)
+                and _is_bool(left, assume_numeric_operands)
+            ):
+                # Comparing to True is the same as the value itself
+                if right.value is isinstance(op, ast.Eq):
+                    return simplify_test(left, assume_numeric_operands)
+                return simplify_not(
+                    ast.UnaryOp(op=ast.Not(), operand=left), assume_numeric_operands
+                )
+
+    return node
+
+
+def simplify_not(node: ast.UnaryOp, assume_numeric_operands: bool) -> ast.expr:
+    """Simplifies a not expression.
+
+    :param node: UnaryOp with a Not operator
+    :param assume_numeric_operands: If operands can be assumed to be numbers
+    :returns: Expression equal to node"""
+    operand: ast.expr = simplify_test(node.operand, assume_numeric_operands)
+    match operand:
+        case ast.Compare(ops=[op], comparators=[_]) if (
+            assume_numeric_operands and type(op) in _INVERTED_COMPARISONS
+        ):
+            operand.ops = [_INVERTED_COMPARISONS[type(op)]()]
+            return operand
+        case ast.Compare(ops=[ast.Is() | ast.In() as op], comparators=[_]):
+            operand.ops = [ast.IsNot() if isinstance(op, ast.Is) else ast.NotIn()]
+            return operand
+
+    node.operand = operand
+    return node
+
+
+def simplify_numeric_bin_op(node: ast.BinOp) -> ast.expr:
+    """Removes operations that do not change a number and replaces squares with
+    multiplication. Only valid if operands are ints or floats.
+
+    :param node: BinOp to simplify
+    :returns: Expression equal to node"""
+    match node:
+        case ast.BinOp(left=left, op=ast.Add() | ast.Sub(), right=right) if _is_int(
+            right, 0
+        ):
+            return left
+        case ast.BinOp(left=left, op=ast.Add(), right=right) if _is_int(left, 0):
+            return right
+        case ast.BinOp(left=left, op=ast.Mult() | ast.Pow(), right=right) if _is_int(
+            right, 1
+        ):
+            return left
+        case ast.BinOp(left=left, op=ast.Mult(), right=right) if _is_int(left, 1):
+            return right
+        case ast.BinOp(left=ast.Name(id=name) as left, op=ast.Pow(), right=right) if (
+            _is_int(right, 2)
+        ):
+            return ast.BinOp(
+                left=left, op=ast.Mult(), right=ast.Name(id=name, ctx=ast.Load())
+            )
+
+    return node
+
+
+def _is_builtin_type(node: ast.expr) -> bool:
+    match node:
+        case ast.Name(id=name):
+            return name in _BUILTIN_TYPES
+        case ast.Tuple(elts=elts):
+            return all(_is_builtin_type(elt) for elt in elts)
+        case _:
+            return False
+
+
+def _is_safe_to_reorder(node: ast.expr, excludes: set[str]) -> bool:
+    """Checks that node has no side effects and can't raise."""
+    match node:
+        case ast.Name() | ast.Constant():
+            return True
+        case ast.UnaryOp(op=ast.Not(), operand=operand):
+            return _is_safe_to_reorder(operand, excludes)
+        case ast.BoolOp(values=values):
+            return all(_is_safe_to_reorder(value, excludes) for value in values)
+        case ast.Compare(left=left, ops=ops, comparators=comparators):
+            return all(isinstance(op, _NON_RAISING_COMPARISONS) for op in ops) and all(
+                _is_safe_to_reorder(value, excludes) for value in (left, *comparators)
+            )
+        case ast.Call(func=ast.Name(id="isinstance"), args=[value, types], keywords=[]):
+            # Most functions in excludes, like int and getattr, can raise, but
+            # isinstance can't when checking against builtin types
+            return (
+                "isinstance" in excludes
+                and _is_builtin_type(types)
+                and _is_safe_to_reorder(value, excludes)
+            )
+        case _:
+            return False
+
+
+def _get_cost(node: ast.expr) -> int:
+    return sum(
+        _NODE_COSTS.get(type(child), 1)
+        for child in ast.walk(node)
+        if isinstance(child, ast.expr)
+    )
+
+
+def reorder_test_operands(node: ast.expr, excludes: set[str]) -> ast.expr:
+    """Orders operands of and/or chains whose truthiness is the only thing used
+    from cheapest to most expensive so short-circuiting skips more work.
+
+    :param node: Expression used as a bool
+    :param excludes: Functions that have no side effects
+    :returns: Expression with the same truthiness"""
+    match node:
+        case ast.UnaryOp(op=ast.Not(), operand=operand):
+            node.operand = reorder_test_operands(operand, excludes)
+        case ast.BoolOp(values=values):
+            node.values = [reorder_test_operands(value, excludes) for value in values]
+            if all(_is_safe_to_reorder(value, excludes) for value in node.values):
+                node.values.sort(key=_get_cost)
+
+    return node
@@ -0,0 +1,162 @@
+"""Control flow analysis of statement lists."""
+
+import ast
+from collections.abc import Iterable
+
+from personal_python_ast_optimizer._optimize.dataflow import get_bound_names_in_scope
+from personal_python_ast_optimizer._optimize.utils import (
+    NESTED_SCOPES,
+    get_name_or_full_attribute_id,
+)
+
+type _Scope = ast.Module | ast.FunctionDef | ast.AsyncFunctionDef
+
+
+def get_statement_lists(node: ast.stmt) -> Iterable[list[ast.stmt]]:
+    """Yields statement lists directly nested in node."""
+    for field in ("body", "orelse", "finalbody"):
+        value = getattr(node, field, None)
+        if isinstance(value, list) and value and isinstance(value[0], ast.stmt):
+            yield value
+
+    if isinstance(node, (ast.Try, ast.TryStar)):
+        for handler in node.handlers:
+            yield handler.body
+    elif isinstance(node, ast.Match):
+        for case in node.cases:
+            yield case.body
+
+
+def _has_break(body: list[ast.stmt]) -> bool:
+    """Checks if a break in body could exit the loop body belongs to."""
+    for node in body:
+        match node:
+            case ast.Break():
+                return True
+            case ast.For() | ast.AsyncFor() | ast.While():
+                # Only a break in else exits the outer loop
+                if _has_break(node.orelse):
+                    return True
+            case _ if not isinstance(node, NESTED_SCOPES):
+                if any(_has_break(body) for body in get_statement_lists(node)):
+                    return True
+
+    return False
+
+
+def _has_yield(nodes: Iterable[ast.AST]) -> bool:
+    to_visit: list[ast.AST] = list(nodes)
+    while to_visit:
+        node: ast.AST = to_visit.pop()
+        if isinstance(node, (ast.Yield, ast.YieldFrom)):
+            return True
+        if not isinstance(node, NESTED_SCOPES):
+            to_visit.extend(ast.iter_child_nodes(node))
+
+    return False
+
+
+class UnreachableCodeSkipper:
+    """Removes statements that can never run since they follow a return, raise,
+    break, continue, a loop that never ends or a call that never returns."""
+
+    __slots__ = ("_no_return_functions", "_removed")
+
+    def __init__(self, no_return_functions: Iterable[str]) -> None:
+        self._no_return_functions: set[str] = set(no_return_functions)
+        # Each statement list that was cut and what was cut from it
+        self._removed: list[tuple[list[ast.stmt], list[ast.stmt]]] = []
+
+    def visit(self, node: _Scope) -> bool:
+        """Removes unreachable statements in the scope of node. Classes are
+        included in the scope they are defined in, functions are not.
+
+        :param node: Module or function to remove unreachable statements from
+        :returns: True if any statement was removed"""
+        self._removed = []
+        self._truncate_body(node.body)
+
+        if not self._removed:
+            return False
+
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and (
+            not self._is_safe_to_remove(node)
+        ):
+            for body, removed in reversed(self._removed):
+                body.extend(removed)
+            return False
+
+        return True
+
+    def _truncate_body(self, body: list[ast.stmt]) -> None:
+        for index, node in enumerate(body):
+            if not isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                for nested_body in get_statement_lists(node):
+                    self._truncate_body(nested_body)
+
+            if self._is_terminating(node):
+                if index + 1 < len(body):
+                    self._removed.append((body, body[index + 1 :]))
+                    del body[index + 1 :]
+                return
+
+    def _is_terminating(self, node: ast.stmt) -> bool:
+        """Checks if statements after node in the same body can never run."""
+        match node:
+            case ast.Return() | ast.Raise() | ast.Break() | ast.Continue():
+                return True
+            case ast.Expr(value=ast.Call(func=func)):
+                return get_name_or_full_attribute_id(func) in self._no_return_functions
+            case ast.If(body=body, orelse=orelse):
+                return self._is_terminating_body(body) and self._is_terminating_body(
+                    orelse
+                )
+            case ast.While(test=ast.Constant(value=value), body=body):
+                return bool(value) and not _has_break(body)
+            case ast.Try(finalbody=finalbody) | ast.TryStar(finalbody=finalbody):
+                return self._is_terminating_body(finalbody) or (
+                    self._is_terminating_body(node.body)
+                    and all(self._is_terminating_body(h.body) for h in node.handlers)
+                )
+            case _:
+                return False
+
+    def _is_terminating_body(self, body: list[ast.stmt]) -> bool:
+        return any(self._is_terminating(node) for node in body)
+
+    def _is_safe_to_remove(self, node: ast.FunctionDef | ast.AsyncFunctionDef) -> bool:
+        """Checks that the removed statements did not change what names are local
+        to the function or if it is a generator."""
+        removed: list[ast.stmt] = [
+            statement for _, statements in self._removed for statement in statements
+        ]
+
+        # A function with a yield is a generator even if the yield never runs
+        if _has_yield(removed) and not _has_yield(node.body):
+            return False
+
+        remaining_bound_names: set[str] = {
+            arg.arg for arg in ast.walk(node.args) if isinstance(arg, ast.arg)
+        }
+        for statement in node.body:
+            remaining_bound_names.update(get_bound_names_in_scope(statement))
+
+        removed_bound_names: set[str] = set()
+        for statement in removed:
+            removed_bound_names.update(get_bound_names_in_scope(statement))
+
+        # Names could go from being local to global and global statements apply
+        # even if they never run
+        names_used: set[str] = {
+            child.id for child in ast.walk(node) if isinstance(child, ast.Name)
+        }
+        return not (
+            (removed_bound_names - remaining_bound_names) & names_used
+            or any(
+                name in names_used or name in remaining_bound_names
+                for statement in removed
+                for child in ast.walk(statement)
+                if isinstance(child, (ast.Global, ast.Nonlocal))
+                for name in child.names
+            )
+        )
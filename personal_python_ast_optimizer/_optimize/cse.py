@@ -0,0 +1,305 @@
+"""Elimination of lookups repeated in a block of statements."""
+
+import ast
+from collections.abc import Callable
+
+from personal_python_ast_optimizer._optimize.control_flow import get_statement_lists
+from personal_python_ast_optimizer._optimize.utils import (
+    LOCALS_ACCESS,
+    get_full_attribute_id,
+    get_name_or_full_attribute_id,
+    replace_child,
+)
+
+_COMPREHENSIONS = (ast.ListComp, ast.SetComp, ast.DictComp, ast.GeneratorExp)
+
+# Statements that are evaluated in order without branching
+_SIMPLE_STATEMENTS = (
+    ast.Expr,
+    ast.Assign,
+    ast.AugAssign,
+    ast.AnnAssign,
+    ast.Delete,
+    ast.Pass,
+)
+
+# Statements after which nothing else in the block runs
+_LAST_STATEMENTS = (ast.Return, ast.Raise, ast.If)
+
+# Attribute lookups are cheap enough that binding one used twice is no faster
+_MIN_ATTRIBUTE_USES: int = 3
+_MIN_CALL_USES: int = 2
+
+
+class _Use:
+    __slots__ = ("attrs", "conditional", "key", "names", "node")
+
+    def __init__(
+        self, node: ast.expr, key: str, attrs: set[str] | None, conditional: bool
+    ) -> None:
+        self.node: ast.expr = node
+        self.key: str = key
+        self.names: set[str] = {
+            child.id for child in ast.walk(node) if isinstance(child, ast.Name)
+        }
+        # Attributes the value depends on, or None if it could depend on any
+        # attribute or item, like the result of a call
+        self.attrs: set[str] | None = attrs
+        # If node is only evaluated depending on another value
+        self.conditional: bool = conditional
+
+
+def _is_simple_arg(node: ast.expr) -> bool:
+    return isinstance(node, (ast.Name, ast.Constant)) or (
+        isinstance(node, ast.Attribute) and get_full_attribute_id(node) is not None
+    )
+
+
+class _BlockAnalyzer:
+    """Finds lookups repeated in a block of statements that no assignment or
+    call between them could change, in the order they are evaluated."""
+
+    __slots__ = ("_excludes", "_open_uses", "repeated_uses")
+
+    def __init__(self, excludes: set[str]) -> None:
+        self._excludes: set[str] = excludes
+        # Uses of each lookup since it was last invalidated
+        self._open_uses: dict[str, list[_Use]] = {}
+        self.repeated_uses: list[list[_Use]] = []
+
+    def add_statement(self, node: ast.stmt) -> None:  # noqa: C901, PLR0912
+        match node:
+            case ast.Expr(value=value) | ast.Return(value=ast.expr() as value):
+                self._walk(value, False)
+            case ast.Assign(targets=targets, value=value):
+                self._walk(value, False)
+                for target in targets:
+                    self._walk_target(target)
+            case ast.AugAssign(target=target, value=value):
+                if isinstance(target, (ast.Attribute, ast.Subscript)):
+                    self._walk(target.value, False)
+                if isinstance(target, ast.Subscript):
+                    self._walk(target.slice, False)
+                self._walk(value, False)
+                self._walk_target(target, False)
+            case ast.AnnAssign(target=target, value=ast.expr() as value):
+                self._walk(value, False)
+                self._walk_target(target)
+            case ast.Delete(targets=targets):
+                for target in targets:
+                    self._walk_target(target)
+            case ast.Raise(exc=exc, cause=cause):
+                if exc is not None:
+                    self._walk(exc, False)
+                if cause is not None:
+                    self._walk(cause, False)
+            case ast.If(test=test):
+                self._walk(test, False)
+
+    def finish(self) -> list[list[_Use]]:
+        """Returns uses of each lookup repeated without being invalidated."""
+        self._invalidate(lambda _: True)
+        return self.repeated_uses
+
+    def _walk_target(self, node: ast.expr, walk_value: bool = True) -> None:
+        match node:
+            case ast.Name(id=name):
+                self._invalidate(lambda use: name in use.names)
+            case ast.Attribute(value=value, attr=attr):
+                if walk_value:
+                    self._walk(value, False)
+                self._invalidate(lambda use: use.attrs is None or attr in use.attrs)
+            case ast.Subscript(value=value, slice=index):
+                if walk_value:
+                    self._walk(value, False)
+                    self._walk(index, False)
+                self._invalidate(lambda use: use.attrs is None)
+            case ast.Tuple(elts=elts) | ast.List(elts=elts):
+                for elt in elts:
+                    self._walk_target(elt)
+            case ast.Starred(value=value):
+                self._walk_target(value)
+
+    def _walk(  # noqa: C901, PLR0912
+        self, node: ast.AST, conditional: bool, is_method: bool = False
+    ) -> None:
+        """Walks node in the order it is evaluated."""
+        match node:
+            case ast.Attribute(value=value, ctx=ast.Load()):
+                self._walk(value, conditional)
+                lookup_id: str | None = get_full_attribute_id(node)
+                # Calling a method directly is faster than a bound method
+                if lookup_id is not None and lookup_id.count(".") > 1 and not is_method:
+                    self._add_use(
+                        _Use(node, lookup_id, set(lookup_id.split(".")), conditional)
+                    )
+            case ast.Call(func=func, args=args, keywords=keywords):
+                self._walk(func, conditional, True)
+                for arg in args:
+                    self._walk(arg, conditional)
+                for keyword in keywords:
+                    self._walk(keyword.value, conditional)
+
+                if get_name_or_full_attribute_id(func) not in self._excludes:
+                    self._invalidate(lambda _: True)
+                elif all(_is_simple_arg(arg) for arg in args) and all(
+                    keyword.arg is not None and _is_simple_arg(keyword.value)
+                    for keyword in keywords
+                ):
+                    self._add_use(_Use(node, ast.dump(node), None, conditional))
+            case ast.NamedExpr(target=target, value=value):
+                self._walk(value, conditional)
+                self._walk_target(target)
+            case ast.BoolOp(values=[first, *rest]):
+                self._walk(first, conditional)
+                for value in rest:
+                    self._walk(value, True)
+            case ast.IfExp(test=test, body=body, orelse=orelse):
+                self._walk(test, conditional)
+                self._walk(body, True)
+                self._walk(orelse, True)
+            case ast.Compare(left=left, comparators=[first, *rest]):
+                self._walk(left, conditional)
+                self._walk(first, conditional)
+                for value in rest:
+                    self._walk(value, True)
+            case ast.Dict(keys=keys, values=values):
+                for key, value in zip(keys, values, strict=True):
+                    if key is not None:
+                        self._walk(key, conditional)
+                    self._walk(value, conditional)
+            case ast.Await() | ast.Yield() | ast.YieldFrom():
+                if node.value is not None:
+                    self._walk(node.value, conditional)
+                # Other code runs before this continues
+                self._invalidate(lambda _: True)
+            case _ if isinstance(node, _COMPREHENSIONS):
+                self._invalidate(lambda _: True)
+            case ast.Lambda():
+                pass
+            case _:
+                for child in ast.iter_child_nodes(node):
+                    self._walk(child, conditional)
+
+    def _add_use(self, use: _Use) -> None:
+        uses: list[_Use] | None = self._open_uses.get(use.key)
+        if uses is not None:
+            uses.append(use)
+        elif not use.conditional:
+            self._open_uses[use.key] = [use]
+
+    def _invalidate(self, predicate: Callable[[_Use], bool]) -> None:
+        for key, uses in list(self._open_uses.items()):
+            if predicate(uses[0]):
+                del self._open_uses[key]
+                if len(uses) > 1:
+                    self.repeated_uses.append(uses)
+
+
+class RepeatedLookupEliminator:
+    """Binds attribute chains like self.a.b and calls to side effect free
+    functions repeated in a block of statements in a function to a local
+    with := where they are first evaluated, and loads that local after.
+
+    Assumes only assignments and calls change attributes and that the side
+    effect free functions return the same value for the same arguments."""
+
+    __slots__ = ("_excludes", "_parents", "_used_names", "eliminated")
+
+    def __init__(self, excludes: set[str]) -> None:
+        self._excludes: set[str] = excludes
+        self._parents: dict[ast.AST, ast.AST] = {}
+        self._used_names: set[str] = set()
+        self.eliminated: bool = False
+
+    def visit(self, node: ast.Module) -> bool:
+        """Eliminates repeated lookups in functions in node.
+
+        :param node: Module to eliminate lookups in
+        :returns: True if any lookup was eliminated"""
+        self.eliminated = False
+        for child in ast.walk(node):
+            if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                self._eliminate_in_function(child)
+
+        return self.eliminated
+
+    def _eliminate_in_function(
+        self, node: ast.FunctionDef | ast.AsyncFunctionDef
+    ) -> None:
+        names: set[str] = {
+            child.id for child in ast.walk(node) if isinstance(child, ast.Name)
+        }
+        if names & LOCALS_ACCESS:
+            return
+
+        self._used_names = names | {
+            arg.arg for arg in ast.walk(node.args) if isinstance(arg, ast.arg)
+        }
+        self._parents = {
+            child: parent
+            for parent in ast.walk(node)
+            for child in ast.iter_child_nodes(parent)
+        }
+        self._eliminate_in_body(node.body)
+
+    def _eliminate_in_body(self, body: list[ast.stmt]) -> None:
+        analyzer = _BlockAnalyzer(self._excludes)
+        for statement in body:
+            if isinstance(statement, (*_SIMPLE_STATEMENTS, *_LAST_STATEMENTS)):
+                analyzer.add_statement(statement)
+            if not isinstance(statement, _SIMPLE_STATEMENTS):
+                self._eliminate(analyzer.finish())
+                analyzer = _BlockAnalyzer(self._excludes)
+
+            if not isinstance(
+                statement, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)
+            ):
+                for statement_list in get_statement_lists(statement):
+                    self._eliminate_in_body(statement_list)
+
+        self._eliminate(analyzer.finish())
+
+    def _eliminate(self, repeated_uses: list[list[_Use]]) -> None:
+        # Outer lookups first since replacing them removes the inner ones
+        repeated_uses.sort(
+            key=lambda uses: sum(1 for _ in ast.walk(uses[0].node)), reverse=True
+        )
+        removed_nodes: set[ast.AST] = set()
+        for uses in repeated_uses:
+            remaining: list[_Use] = [
+                use for use in uses if use.node not in removed_nodes
+            ]
+            while remaining and remaining[0].conditional:
+                remaining.pop(0)
+            if not remaining or len(remaining) < (
+                _MIN_CALL_USES if remaining[0].attrs is None else _MIN_ATTRIBUTE_USES
+            ):
+                continue
+
+            name: str = self._get_unused_name(remaining[0])
+            first: ast.expr = remaining[0].node
+            replace_child(
+                self._parents[first],
+                first,
+                ast.NamedExpr(ast.Name(name, ast.Store()), first),
+            )
+            for use in remaining[1:]:
+                replace_child(
+                    self._parents[use.node], use.node, ast.Name(name, ast.Load())
+                )
+                removed_nodes.update(ast.walk(use.node))
+
+            self.eliminated = True
+
+    def _get_unused_name(self, use: _Use) -> str:
+        name: str = "_" + (
+            use.key.replace(".", "_")
+            if use.attrs is not None
+            else str(get_name_or_full_attribute_id(use.node.func)).replace(".", "_")  # type: ignore[attr-defined]
+        )
+        while name in self._used_names:
+            name += "_"
+
+        self._used_names.add(name)
+        return name
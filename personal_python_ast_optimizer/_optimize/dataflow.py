@@ -0,0 +1,626 @@
+"""Dataflow analysis of function bodies."""
+
+import ast
+from collections.abc import Iterable
+
+from personal_python_ast_optimizer._optimize.base import AstTransformerBase
+from personal_python_ast_optimizer._optimize.typing import AstVisitorProtocol
+from personal_python_ast_optimizer._optimize.utils import (
+    LOCALS_ACCESS,
+    as_constant,
+    get_import_alias_bound_name,
+)
+from personal_python_ast_optimizer._optimize.visitors import is_side_effect_free
+
+# Known constant value of locals. None when the code is unreachable
+type _Env = dict[str, ast.Constant] | None
+
+
+def get_bound_names_in_scope(node: ast.AST) -> set[str]:
+    """Returns names bound by node in the scope node is in. Does not include
+    names bound inside nested functions, lambdas or classes.
+
+    :param node: An AST node to check
+    :returns: Names that node could bind"""
+    bound_names: set[str] = set()
+
+    nodes: list[ast.AST] = [node]
+    while nodes:
+        child: ast.AST = nodes.pop()
+        match child:
+            case ast.Name(id=name, ctx=ast.Store() | ast.Del()):
+                bound_names.add(name)
+            case (
+                ast.FunctionDef(name=name)
+                | ast.AsyncFunctionDef(name=name)
+                | ast.ClassDef(name=name)
+            ):
+                bound_names.add(name)
+                continue
+            case ast.Lambda():
+                continue
+            case ast.alias():
+                bound_names.add(get_import_alias_bound_name(child))
+            case ast.Global(names=names) | ast.Nonlocal(names=names):
+                bound_names.update(names)
+            case ast.ExceptHandler(name=str(name)):
+                bound_names.add(name)
+            case ast.MatchAs(name=str(name)) | ast.MatchStar(name=str(name)):
+                bound_names.add(name)
+            case ast.MatchMapping(rest=str(name)):
+                bound_names.add(name)
+
+        nodes.extend(ast.iter_child_nodes(child))
+
+    return bound_names
+
+
+def get_module_binding_counts(node: ast.Module) -> dict[str, int]:
+    """Counts how many times each global is bound, including by global statements
+    in functions.
+
+    :param node: Module to check
+    :returns: Number of bindings of each global"""
+    binding_counts: dict[str, int] = {}
+    for statement in node.body:
+        for name in get_bound_names_in_scope(statement):
+            binding_counts[name] = binding_counts.get(name, 0) + 1
+    for child in ast.walk(node):
+        if isinstance(child, ast.Global):
+            for name in child.names:
+                binding_counts[name] = binding_counts.get(name, 0) + 1
+
+    return binding_counts
+
+
+def _get_bound_names_in_body(body: Iterable[ast.AST]) -> set[str]:
+    bound_names: set[str] = set()
+    for node in body:
+        bound_names.update(get_bound_names_in_scope(node))
+
+    return bound_names
+
+
+def _without(env: dict[str, ast.Constant], names: set[str]) -> dict[str, ast.Constant]:
+    return {name: value for name, value in env.items() if name not in names}
+
+
+def _is_same_constant(left: ast.Constant, right: ast.Constant) -> bool:
+    # repr since 1 == 1.0 == True
+    return type(left.value) is type(right.value) and repr(left.value) == repr(
+        right.value
+    )
+
+
+def _merge(envs: Iterable[_Env]) -> _Env:
+    """Keeps only the constants that are the same on every reachable path."""
+    merged: _Env = None
+
+    for env in envs:
+        if env is None:
+            continue
+        if merged is None:
+            merged = dict(env)
+            continue
+
+        merged = {
+            name: value
+            for name, value in merged.items()
+            if name in env and _is_same_constant(value, env[name])
+        }
+
+    return merged
+
+
+class _ConstantSubstituter(AstTransformerBase, AstVisitorProtocol):
+    """Replaces loads of locals with their known constant value. Code that runs
+    later, like lambda bodies, or in another scope is left as is."""
+
+    __slots__ = ("_env", "substituted")
+
+    def __init__(self, env: dict[str, ast.Constant]) -> None:
+        self._env: dict[str, ast.Constant] = env
+        self.substituted: bool = False
+
+    def visit(self, node: ast.expr) -> ast.expr:
+        return self._visit(node)  # type: ignore[return-value]
+
+    def visit_Name(self, node: ast.Name) -> ast.Name | ast.Constant:
+        if isinstance(node.ctx, ast.Load) and node.id in self._env:
+            self.substituted = True
+            return ast.Constant(self._env[node.id].value)
+
+        return node
+
+    def visit_Lambda(self, node: ast.Lambda) -> ast.Lambda:
+        self._visit(node.args)
+        return node
+
+    def visit_arguments(self, node: ast.arguments) -> ast.arguments:
+        # Only defaults are evaluated when defined
+        node.defaults = [self.visit(d) for d in node.defaults]
+        node.kw_defaults = [
+            None if d is None else self.visit(d) for d in node.kw_defaults
+        ]
+        return node
+
+    def visit_ListComp(self, node: ast.ListComp) -> ast.AST:
+        return self._handle_comprehension(node)
+
+    def visit_SetComp(self, node: ast.SetComp) -> ast.AST:
+        return self._handle_comprehension(node)
+
+    def visit_DictComp(self, node: ast.DictComp) -> ast.AST:
+        return self._handle_comprehension(node)
+
+    def visit_GeneratorExp(self, node: ast.GeneratorExp) -> ast.AST:
+        return self._handle_comprehension(node)
+
+    def _handle_comprehension(
+        self, node: ast.ListComp | ast.SetComp | ast.DictComp | ast.GeneratorExp
+    ) -> ast.AST:
+        # Comprehension targets shadow locals of the same name
+        shadowed_names: set[str] = _get_bound_names_in_body(
+            g.target for g in node.generators
+        )
+        if not shadowed_names & self._env.keys():
+            return self._generic_visit(node)
+
+        comprehension_substituter = _ConstantSubstituter(
+            {n: v for n, v in self._env.items() if n not in shadowed_names}
+        )
+        comprehension_substituter._generic_visit(node)
+        self.substituted |= comprehension_substituter.substituted
+        return node
+
+
+class FunctionConstantPropagator:
+    """Replaces uses of locals with constants where every assignment to the local
+    that can reach the use assigns the same constant."""
+
+    __slots__ = ("_excluded", "substituted")
+
+    def __init__(self) -> None:
+        self._excluded: set[str] = set()
+        self.substituted: bool = False
+
+    def visit(self, node: ast.FunctionDef | ast.AsyncFunctionDef) -> bool:
+        """Propagates constants through the body of node.
+
+        :param node: Function to propagate constants in
+        :returns: True if any use of a local was replaced"""
+        # Could be changed from another scope at any time
+        self._excluded = {
+            name
+            for child in ast.walk(node)
+            if isinstance(child, (ast.Global, ast.Nonlocal))
+            for name in child.names
+        }
+        self.substituted = False
+
+        self._propagate_body(node.body, {})
+
+        return self.substituted
+
+    def _substitute(self, node: ast.expr, env: dict[str, ast.Constant]) -> ast.expr:
+        # Names assigned with := in node could be used by node after being changed
+        for name in get_bound_names_in_scope(node):
+            env.pop(name, None)
+
+        if not env:
+            return node
+
+        substituter = _ConstantSubstituter(env)
+        new_node: ast.expr = substituter.visit(node)
+        self.substituted |= substituter.substituted
+        return new_node
+
+    def _substitute_fields(self, node: ast.AST, env: dict[str, ast.Constant]) -> None:
+        for field, value in ast.iter_fields(node):
+            if isinstance(value, ast.expr):
+                setattr(node, field, self._substitute(value, env))
+            elif isinstance(value, list):
+                value[:] = [
+                    self._substitute(v, env) if isinstance(v, ast.expr) else v
+                    for v in value
+                ]
+
+    def _substitute_target(
+        self, node: ast.expr, env: dict[str, ast.Constant]
+    ) -> dict[str, ast.Constant]:
+        """Substitutes into parts of an assignment target that are evaluated,
+        like indexes, and returns env without the names node binds."""
+        match node:
+            case ast.Tuple(elts=elts) | ast.List(elts=elts):
+                for elt in elts:
+                    env = self._substitute_target(elt, env)
+                return env
+            case ast.Starred(value=value):
+                return self._substitute_target(value, env)
+            case _:
+                self._substitute_fields(node, dict(env))
+                return _without(env, get_bound_names_in_scope(node))
+
+    def _propagate_body(self, body: list[ast.stmt], env: _Env) -> _Env:
+        for node in body:
+            if env is None:
+                break
+            env = self._propagate(node, env)
+
+        return env
+
+    def _propagate(  # noqa: C901, PLR0911, PLR0912
+        self, node: ast.stmt, env: dict[str, ast.Constant]
+    ) -> _Env:
+        match node:
+            case ast.Assign() | ast.AnnAssign() if node.value is not None:
+                node.value = self._substitute(node.value, env)
+                targets: list[ast.expr] = (
+                    node.targets if isinstance(node, ast.Assign) else [node.target]
+                )
+                # Targets are assigned left to right, so later ones can see
+                # names bound by earlier ones
+                target_env: dict[str, ast.Constant] = env
+                for target in targets:
+                    target_env = self._substitute_target(target, target_env)
+
+                env = _without(env, get_bound_names_in_scope(node))
+                constant: ast.Constant | None = as_constant(node.value)
+                if (
+                    constant is not None
+                    and len(targets) == 1
+                    and isinstance(targets[0], ast.Name)
+                    and targets[0].id not in self._excluded
+                ):
+                    env[targets[0].id] = constant
+                return env
+
+            case ast.Return() | ast.Raise():
+                self._substitute_fields(node, env)
+                return None
+
+            case ast.Break() | ast.Continue():
+                return None
+
+            case ast.If():
+                node.test = self._substitute(node.test, env)
+                return _merge(
+                    (
+                        self._propagate_body(node.body, dict(env)),
+                        self._propagate_body(node.orelse, dict(env)),
+                    )
+                )
+
+            case ast.For() | ast.AsyncFor() | ast.While():
+                if not isinstance(node, ast.While):
+                    node.iter = self._substitute(node.iter, env)
+
+                # Anything assigned in the loop may have changed each iteration
+                loop_env: dict[str, ast.Constant] = _without(
+                    env, get_bound_names_in_scope(node)
+                )
+                if isinstance(node, ast.While):
+                    node.test = self._substitute(node.test, loop_env)
+                self._propagate_body(node.body, dict(loop_env))
+                self._propagate_body(node.orelse, dict(loop_env))
+                return loop_env
+
+            case ast.With() | ast.AsyncWith():
+                for item in node.items:
+                    self._substitute_fields(item, env)
+                env = _without(env, _get_bound_names_in_body(node.items))
+                self._propagate_body(node.body, dict(env))
+
+                # Context managers can suppress exceptions part way through
+                return _without(env, _get_bound_names_in_body(node.body))
+
+            case ast.Try() | ast.TryStar():
+                return self._propagate_try(node, env)
+
+            case ast.Match():
+                node.subject = self._substitute(node.subject, env)
+
+                # Patterns bind names even if a guard fails
+                no_match_env: dict[str, ast.Constant] = _without(
+                    env,
+                    _get_bound_names_in_body(
+                        n for c in node.cases for n in (c.pattern, c.guard) if n
+                    ),
+                )
+                case_ends: list[_Env] = [no_match_env]
+                for case in node.cases:
+                    case_env: dict[str, ast.Constant] = _without(
+                        env, get_bound_names_in_scope(case.pattern)
+                    )
+                    if case.guard is not None:
+                        case.guard = self._substitute(case.guard, case_env)
+                    case_ends.append(self._propagate_body(case.body, case_env))
+                return _merge(case_ends)
+
+            case ast.FunctionDef() | ast.AsyncFunctionDef():
+                # Body runs later so only what is evaluated now is substituted
+                node.decorator_list = [
+                    self._substitute(d, env) for d in node.decorator_list
+                ]
+                defaults_substituter = _ConstantSubstituter(env)
+                defaults_substituter.visit_arguments(node.args)
+                self.substituted |= defaults_substituter.substituted
+
+            case ast.ClassDef():
+                node.decorator_list = [
+                    self._substitute(d, env) for d in node.decorator_list
+                ]
+                node.bases = [self._substitute(b, env) for b in node.bases]
+                for keyword in node.keywords:
+                    keyword.value = self._substitute(keyword.value, env)
+
+            case _:
+                self._substitute_fields(node, env)
+
+        return _without(env, get_bound_names_in_scope(node))
+
+    def _propagate_try(
+        self, node: ast.Try | ast.TryStar, env: dict[str, ast.Constant]
+    ) -> _Env:
+        body_env: _Env = self._propagate_body(node.body, dict(env))
+
+        # An exception could be raised anywhere in the body
+        handler_env: dict[str, ast.Constant] = _without(
+            env, _get_bound_names_in_body(node.body)
+        )
+        ends: list[_Env] = [self._propagate_body(node.orelse, body_env)]
+        for handler in node.handlers:
+            if handler.type is not None:
+                handler.type = self._substitute(handler.type, dict(handler_env))
+            ends.append(
+                self._propagate_body(
+                    handler.body,
+                    _without(handler_env, get_bound_names_in_scope(handler)),
+                )
+            )
+
+        after_env: _Env = _merge(ends)
+        if not node.finalbody:
+            return after_env
+
+        # Finally runs for every path, including ones that return or raise
+        final_env: _Env = self._propagate_body(
+            node.finalbody,
+            _without(
+                env,
+                _get_bound_names_in_body((*node.body, *node.handlers, *node.orelse)),
+            ),
+        )
+        return None if after_env is None else final_env
+
+
+def _get_loaded_names(node: ast.AST) -> set[str]:
+    return {
+        child.id
+        for child in ast.walk(node)
+        if isinstance(child, ast.Name) and isinstance(child.ctx, (ast.Load, ast.Del))
+    }
+
+
+class DeadStoreSkipper:
+    """Removes assignments to locals that are never read afterwards when the
+    assigned value has no side effects."""
+
+    __slots__ = (
+        "_always_live",
+        "_binding_counts",
+        "_excluded",
+        "_excludes",
+        "_loop_live",
+        "_read_names",
+        "removed",
+    )
+
+    def __init__(self, excludes: set[str]) -> None:
+        self._excludes: set[str] = excludes
+        self._excluded: set[str] = set()
+        self._binding_counts: dict[str, int] = {}
+        self._read_names: set[str] = set()
+        # Names live at any point, like ones read by a finally or except
+        self._always_live: list[set[str]] = []
+        # Live names at the end and start of each loop, for break and continue
+        self._loop_live: list[tuple[set[str], set[str]]] = []
+        self.removed: bool = False
+
+    def visit(self, node: ast.FunctionDef | ast.AsyncFunctionDef) -> bool:
+        """Removes dead stores from the body of node.
+
+        :param node: Function to remove dead stores from
+        :returns: True if any store was removed"""
+        self.removed = False
+        if any(
+            isinstance(child, ast.Name) and child.id in LOCALS_ACCESS
+            for child in ast.walk(node)
+        ):
+            return False
+
+        self._excluded = {
+            name
+            for child in ast.walk(node)
+            if isinstance(child, (ast.Global, ast.Nonlocal))
+            for name in child.names
+        }
+        # Closures could read a local any time after it is stored
+        for child in ast.walk(node):
+            if child is not node and isinstance(
+                child, (ast.FunctionDef, ast.AsyncFunctionDef, ast.Lambda, ast.ClassDef)
+            ):
+                self._excluded.update(_get_loaded_names(child))
+
+        self._read_names = _get_loaded_names(node)
+        self._binding_counts = {}
+        for statement in node.body:
+            self._count_bindings(statement)
+        for arg in (
+            *node.args.posonlyargs,
+            *node.args.args,
+            node.args.vararg,
+            *node.args.kwonlyargs,
+            node.args.kwarg,
+        ):
+            if arg is not None:
+                self._binding_counts[arg.arg] = self._binding_counts.get(arg.arg, 0) + 1
+
+        self._remove_from_body(node.body, set())
+
+        return self.removed
+
+    def _count_bindings(self, node: ast.AST) -> None:
+        nodes: list[ast.AST] = [node]
+        while nodes:
+            child: ast.AST = nodes.pop()
+            if isinstance(child, ast.Name) and isinstance(child.ctx, ast.Store):
+                self._binding_counts[child.id] = (
+                    self._binding_counts.get(child.id, 0) + 1
+                )
+            elif not isinstance(
+                child, (ast.FunctionDef, ast.AsyncFunctionDef, ast.Lambda, ast.ClassDef)
+            ):
+                nodes.extend(ast.iter_child_nodes(child))
+
+    def _is_dead_store(self, node: ast.stmt, live: set[str]) -> bool:
+        target: ast.expr
+        match node:
+            case ast.Assign(targets=[target], value=value):
+                pass
+            case ast.AnnAssign(target=target, value=ast.expr() as value):
+                pass
+            case _:
+                return False
+
+        if (
+            not isinstance(target, ast.Name)
+            or target.id in live
+            or target.id in self._excluded
+            or not is_side_effect_free(value, self._excludes)
+        ):
+            return False
+
+        # Removing the only binding would make later reads global lookups
+        if target.id in self._read_names and self._binding_counts[target.id] < 2:  # noqa: PLR2004
+            return False
+
+        self._binding_counts[target.id] -= 1
+        return True
+
+    def _remove_from_body(
+        self, body: list[ast.stmt], live: set[str], keep_non_empty: bool = True
+    ) -> set[str]:
+        """Removes dead stores from body going last to first.
+
+        :param body: Statements to remove dead stores from
+        :param live: Names that may be read after body
+        :param keep_non_empty: Add a Pass if every statement was removed
+        :returns: Names that may be read before body"""
+        new_body: list[ast.stmt] = []
+        for node in reversed(body):
+            for always_live in self._always_live:
+                live = live | always_live
+
+            if self._is_dead_store(node, live):
+                self.removed = True
+                continue
+
+            live = self._get_live_before(node, live)
+            new_body.append(node)
+
+        if keep_non_empty and not new_body and body:
+            new_body.append(ast.Pass())
+        body[:] = reversed(new_body)
+
+        return live
+
+    def _get_live_before(  # noqa: C901, PLR0911, PLR0912
+        self, node: ast.stmt, live: set[str]
+    ) -> set[str]:
+        match node:
+            case ast.Return() | ast.Raise():
+                return _get_loaded_names(node)
+
+            case ast.Break():
+                return set(self._loop_live[-1][0]) if self._loop_live else set()
+
+            case ast.Continue():
+                return set(self._loop_live[-1][1]) if self._loop_live else set()
+
+            case ast.If():
+                return (
+                    self._remove_from_body(node.body, live)
+                    | self._remove_from_body(node.orelse, live, keep_non_empty=False)
+                    | _get_loaded_names(node.test)
+                )
+
+            case ast.For() | ast.AsyncFor() | ast.While():
+                # Anything read in the loop could be read on the next iteration
+                loop_start: set[str] = live | _get_loaded_names(node)
+                self._loop_live.append((live, loop_start))
+                try:
+                    self._remove_from_body(node.body, loop_start)
+                finally:
+                    self._loop_live.pop()
+                self._remove_from_body(node.orelse, live, keep_non_empty=False)
+                return loop_start
+
+            case ast.With() | ast.AsyncWith():
+                # A context manager could suppress an exception part way through
+                self._always_live.append(live)
+                try:
+                    body_live: set[str] = self._remove_from_body(node.body, live)
+                finally:
+                    self._always_live.pop()
+                return (
+                    body_live
+                    | live
+                    | {n for item in node.items for n in _get_loaded_names(item)}
+                )
+
+            case ast.Try() | ast.TryStar():
+                return self._get_live_before_try(node, live)
+
+            case ast.Match():
+                cases_live: set[str] = set(live)
+                for case in node.cases:
+                    cases_live |= self._remove_from_body(case.body, live)
+                    cases_live |= _get_loaded_names(case.pattern)
+                    if case.guard is not None:
+                        cases_live |= _get_loaded_names(case.guard)
+                return cases_live | _get_loaded_names(node.subject)
+
+            case (
+                ast.Assign(targets=[ast.Name(id=name)])
+                | ast.AnnAssign(target=ast.Name(id=name))
+            ):
+                return (live - {name}) | _get_loaded_names(node)
+
+        return live | _get_loaded_names(node)
+
+    def _get_live_before_try(
+        self, node: ast.Try | ast.TryStar, live: set[str]
+    ) -> set[str]:
+        after_live: set[str] = (
+            self._remove_from_body(node.finalbody, live) if node.finalbody else live
+        )
+
+        handlers_live: set[str] = set()
+        for handler in node.handlers:
+            handlers_live |= self._remove_from_body(handler.body, after_live)
+            if handler.type is not None:
+                handlers_live |= _get_loaded_names(handler.type)
+
+        orelse_live: set[str] = self._remove_from_body(
+            node.orelse, after_live, keep_non_empty=False
+        )
+
+        # An exception could be raised before any statement in the body
+        self._always_live.append(handlers_live | after_live)
+        try:
+            body_live: set[str] = self._remove_from_body(node.body, orelse_live)
+        finally:
+            self._always_live.pop()
+
+        return body_live | handlers_live | after_live
@@ -0,0 +1,284 @@
+"""Replacement of if/elif chains comparing one name to constants with dict lookups."""
+
+import ast
+import copy
+
+from personal_python_ast_optimizer._optimize.control_flow import get_statement_lists
+from personal_python_ast_optimizer._optimize.dataflow import get_module_binding_counts
+from personal_python_ast_optimizer._optimize.utils import as_constant
+
+# Types of keys whose hash is consistent with == against each other. The
+# compared name is assumed to be hashable, unlike a list which only raises
+# once it is looked up
+_KEY_TYPES = (str, bytes, int, bool)
+
+
+class _Branch:
+    __slots__ = ("keys", "value")
+
+    def __init__(self, keys: list[ast.Constant], value: ast.Constant) -> None:
+        self.keys: list[ast.Constant] = keys
+        self.value: ast.Constant = value
+
+
+def _get_keys(test: ast.expr) -> tuple[str, list[ast.Constant]] | None:
+    """Returns the name test compares and the constants it is compared to."""
+    match test:
+        case (
+            ast.Compare(
+                left=ast.Name(id=name),
+                ops=[ast.Eq()],
+                comparators=[ast.Constant() as key],
+            )
+            | ast.Compare(
+                left=ast.Constant() as key,
+                ops=[ast.Eq()],
+                comparators=[ast.Name(id=name)],
+            )
+        ):
+            keys: list[ast.expr] = [key]
+        case ast.Compare(
+            left=ast.Name(id=name),
+            ops=[ast.In()],
+            comparators=[
+                ast.Tuple(elts=keys) | ast.List(elts=keys) | ast.Set(elts=keys)
+            ],
+        ) if keys:
+            pass
+        case _:
+            return None
+
+    if not all(
+        isinstance(key, ast.Constant) and type(key.value) in _KEY_TYPES for key in keys
+    ):
+        return None
+
+    return name, keys  # type: ignore[return-value]
+
+
+def _get_result(body: list[ast.stmt]) -> tuple[str | None, ast.Constant] | None:
+    """Returns the name body assigns, or None if it returns, and the constant
+    it assigns or returns."""
+    if len(body) != 1:
+        return None
+
+    match body[0]:
+        case ast.Return(value=None):
+            return None, ast.Constant(None)
+        case ast.Return(value=ast.expr() as value):
+            target: str | None = None
+        case ast.Assign(targets=[ast.Name(id=name)], value=value):
+            target = name
+        case _:
+            return None
+
+    constant: ast.Constant | None = as_constant(value)
+    if constant is None:
+        return None
+
+    return target, constant
+
+
+class _Chain:
+    __slots__ = ("branches", "orelse", "subject", "target")
+
+    def __init__(
+        self,
+        subject: str,
+        target: str | None,
+        branches: list[_Branch],
+        orelse: list[ast.stmt],
+    ) -> None:
+        self.subject: str = subject
+        # Name every branch assigns, or None if they return
+        self.target: str | None = target
+        self.branches: list[_Branch] = branches
+        self.orelse: list[ast.stmt] = orelse
+
+
+def _get_chain(node: ast.If) -> _Chain | None:
+    """Returns the branches of the if/elif chain starting at node if each
+    compares the same name to constants and returns or assigns the same name
+    a constant."""
+    chain: _Chain | None = None
+    current: ast.If = node
+    while True:
+        keys: tuple[str, list[ast.Constant]] | None = _get_keys(current.test)
+        result: tuple[str | None, ast.Constant] | None = _get_result(current.body)
+        if keys is None or result is None:
+            return None
+
+        if chain is None:
+            chain = _Chain(keys[0], result[0], [], [])
+        elif keys[0] != chain.subject or result[0] != chain.target:
+            return None
+        chain.branches.append(_Branch(keys[1], result[1]))
+        chain.orelse = current.orelse
+
+        if len(current.orelse) != 1 or not isinstance(current.orelse[0], ast.If):
+            return chain
+        current = current.orelse[0]
+
+
+class IfChainDispatcher:
+    """Replaces if/elif chains that compare the same name to str, bytes or int
+    constants, where every branch returns or assigns the same name a constant,
+    with a lookup in a module level dict."""
+
+    __slots__ = ("_constants", "_function_name", "_min_branches", "_module_names")
+
+    def __init__(self, min_branches: int) -> None:
+        self._min_branches: int = min_branches
+        self._module_names: set[str] = set()
+        self._function_name: str = ""
+        # Assignments of module constants to add before the current statement
+        self._constants: list[ast.stmt] = []
+
+    def visit(self, node: ast.Module) -> bool:
+        """Replaces long if/elif chains in functions in node.
+
+        :param node: Module to replace chains in
+        :returns: True if any chain was replaced"""
+        self._module_names = set(get_module_binding_counts(node)) | {
+            child.id for child in ast.walk(node) if isinstance(child, ast.Name)
+        }
+
+        replaced: bool = False
+        new_body: list[ast.stmt] = []
+        for statement in node.body:
+            self._constants = []
+            for child in ast.walk(statement):
+                if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                    self._function_name = child.name
+                    self._replace_in_body(child.body, True)
+
+            replaced = replaced or bool(self._constants)
+            new_body.extend(self._constants)
+            new_body.append(statement)
+
+        node.body = new_body
+
+        return replaced
+
+    def _replace_in_body(self, body: list[ast.stmt], is_function_body: bool) -> None:
+        index: int = 0
+        while index < len(body):
+            statement: ast.stmt = body[index]
+            if isinstance(statement, ast.If):
+                dispatch: tuple[ast.stmt, int] | None = self._get_dispatch(
+                    statement, body, index, is_function_body
+                )
+                if dispatch is not None:
+                    statement, end = dispatch
+                    body[index:end] = [statement]
+
+            if not isinstance(
+                statement, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)
+            ):
+                for statement_list in get_statement_lists(statement):
+                    self._replace_in_body(statement_list, False)
+
+            index += 1
+
+    def _get_dispatch(
+        self, node: ast.If, body: list[ast.stmt], index: int, is_function_body: bool
+    ) -> tuple[ast.stmt, int] | None:
+        """Returns what replaces the chain starting at node, which is body[index],
+        and the index after the last statement it replaces."""
+        chain: _Chain | None = _get_chain(node)
+        if chain is None:
+            return None
+
+        end: int = index + 1
+        # Ifs that return and are followed by an if on the same name act like elifs
+        while chain.target is None and not chain.orelse and end < len(body):
+            next_statement: ast.stmt = body[end]
+            next_chain: _Chain | None = (
+                _get_chain(next_statement)
+                if isinstance(next_statement, ast.If)
+                else None
+            )
+            if next_chain is None or next_chain.subject != chain.subject:
+                break
+            chain.branches += next_chain.branches
+            chain.orelse = next_chain.orelse
+            end += 1
+
+        if len(chain.branches) < self._min_branches:
+            return None
+
+        if chain.target is None and not chain.orelse:
+            if end < len(body):
+                if _get_result(body[end : end + 1]) is not None:
+                    chain.orelse = [body[end]]
+                    end += 1
+            elif is_function_body:
+                chain.orelse = [ast.Return(ast.Constant(None))]
+
+        return self._build_dispatch(chain), end
+
+    def _build_dispatch(self, chain: _Chain) -> ast.stmt:
+        subject: str = chain.subject
+        target: str | None = chain.target
+        orelse: list[ast.stmt] = chain.orelse
+        # Only the first equal key matches, like in the chain
+        mapping: dict[object, tuple[ast.Constant, ast.Constant]] = {}
+        for branch in chain.branches:
+            for key in branch.keys:
+                if key.value not in mapping:
+                    mapping[key.value] = (key, branch.value)
+
+        name: str = self._get_unused_name(f"_{self._function_name}_{subject}")
+        self._constants.append(
+            ast.Assign(
+                [ast.Name(name, ast.Store())],
+                ast.Dict(
+                    [copy.deepcopy(key) for key, _ in mapping.values()],
+                    [copy.deepcopy(value) for _, value in mapping.values()],
+                ),
+            )
+        )
+
+        default: tuple[str | None, ast.Constant] | None = _get_result(orelse)
+        if default is not None and default[0] == target:
+            return self._build_result(
+                target,
+                ast.Call(
+                    ast.Attribute(ast.Name(name, ast.Load()), "get", ast.Load()),
+                    [ast.Name(subject, ast.Load()), default[1]],
+                    [],
+                ),
+            )
+
+        return ast.If(
+            ast.Compare(
+                ast.Name(subject, ast.Load()),
+                [ast.In()],
+                [ast.Name(name, ast.Load())],
+            ),
+            [
+                self._build_result(
+                    target,
+                    ast.Subscript(
+                        ast.Name(name, ast.Load()),
+                        ast.Name(subject, ast.Load()),
+                        ast.Load(),
+                    ),
+                )
+            ],
+            orelse,
+        )
+
+    @staticmethod
+    def _build_result(target: str | None, value: ast.expr) -> ast.stmt:
+        if target is None:
+            return ast.Return(value)
+
+        return ast.Assign([ast.Name(target, ast.Store())], value)
+
+    def _get_unused_name(self, name: str) -> str:
+        while name in self._module_names:
+            name += "_"
+
+        self._module_names.add(name)
+        return name
@@ -0,0 +1,162 @@
+"""Evaluation of calls with constant arguments in another interpreter."""
+
+import ast
+import copy
+import subprocess
+import sys
+
+from personal_python_ast_optimizer._log import get_logger
+from personal_python_ast_optimizer._optimize.utils import (
+    as_constant,
+    get_name_or_full_attribute_id,
+    replace_child,
+)
+
+_logger = get_logger()
+
+# Reads (name, args, kwargs) of calls from stdin and prints the repr of each
+# result, or None if it raised or isn't a constant. Output of the calls
+# themselves goes to stderr so it can't be mistaken for a result
+_EVALUATE_SCRIPT: str = """\
+import ast, builtins, importlib, sys
+calls = ast.literal_eval(sys.stdin.read())
+stdout, sys.stdout = sys.stdout, sys.stderr
+results = []
+for name, args, kwargs in calls:
+    try:
+        parts = name.split(".")
+        value, index = builtins, 0
+        for index in range(len(parts) - 1, 0, -1):
+            try:
+                value = importlib.import_module(".".join(parts[:index]))
+                break
+            except ImportError:
+                index = 0
+        for part in parts[index:]:
+            value = getattr(value, part)
+        result = value(*args, **kwargs)
+    except Exception:
+        results.append(None)
+        continue
+    constant_types = (str, bytes, bool, int, float, complex, type(None))
+    results.append(repr(result) if type(result) in constant_types else None)
+stdout.write(repr(results))
+"""
+
+# Results of calls already evaluated by each interpreter, None if it failed
+_evaluated_calls: dict[tuple[str, str], ast.Constant | None] = {}
+
+
+def _get_call_key(node: ast.Call, name: str) -> str | None:
+    """Returns a literal of the name and constant arguments of node, or None if
+    an argument isn't constant."""
+    args: list[ast.expr] = []
+    for arg in node.args:
+        constant: ast.Constant | None = as_constant(arg)
+        if constant is None:
+            return None
+        args.append(constant)
+
+    keys: list[ast.expr | None] = []
+    values: list[ast.expr] = []
+    for keyword in node.keywords:
+        constant = as_constant(keyword.value)
+        if keyword.arg is None or constant is None:
+            return None
+        keys.append(ast.Constant(keyword.arg))
+        values.append(constant)
+
+    return ast.unparse(
+        ast.Tuple(
+            [ast.Constant(name), ast.Tuple(args, ast.Load()), ast.Dict(keys, values)],
+            ast.Load(),
+        )
+    )
+
+
+class CallEvaluator:
+    """Replaces calls to whitelisted functions whose arguments are all constant
+    with the value they return when evaluated in a separate interpreter.
+    Results are cached per interpreter so each call is only evaluated once."""
+
+    __slots__ = ("_calls_to_evaluate", "_python_executable", "_timeout")
+
+    def __init__(
+        self,
+        calls_to_evaluate: set[str],
+        python_executable: str | None,
+        timeout: float,
+    ) -> None:
+        self._calls_to_evaluate: set[str] = calls_to_evaluate
+        self._python_executable: str = (
+            sys.executable if python_executable is None else python_executable
+        )
+        self._timeout: float = timeout
+
+    def visit(self, node: ast.Module) -> bool:
+        """Replaces whitelisted calls in node with their result.
+
+        :param node: Module to replace calls in
+        :returns: True if any call was replaced"""
+        calls: list[tuple[ast.AST, ast.Call, str]] = []
+        for parent in ast.walk(node):
+            for child in ast.iter_child_nodes(parent):
+                if not isinstance(child, ast.Call):
+                    continue
+                name: str | None = get_name_or_full_attribute_id(child.func)
+                if name not in self._calls_to_evaluate:
+                    continue
+                key: str | None = _get_call_key(child, name)
+                if key is not None:
+                    calls.append((parent, child, key))
+
+        self._evaluate(
+            [
+                key
+                for key in dict.fromkeys(key for _, _, key in calls)
+                if (self._python_executable, key) not in _evaluated_calls
+            ]
+        )
+
+        replaced: bool = False
+        for parent, call, key in calls:
+            result: ast.Constant | None = _evaluated_calls[
+                (self._python_executable, key)
+            ]
+            if result is not None:
+                replace_child(parent, call, copy.deepcopy(result))
+                replaced = True
+
+        return replaced
+
+    def _evaluate(self, keys: list[str]) -> None:
+        """Evaluates the calls keys describe and caches their results."""
+        if not keys:
+            return
+
+        for key in keys:
+            _evaluated_calls[(self._python_executable, key)] = None
+
+        try:
+            process = subprocess.run(  # noqa: S603
+                [self._python_executable, "-I", "-c", _EVALUATE_SCRIPT],
+                input=f"[{','.join(keys)}]",
+                capture_output=True,
+                text=True,
+                timeout=self._timeout,
+                check=True,
+            )
+            results: list[str | None] = ast.literal_eval(process.stdout)
+        except (OSError, subprocess.SubprocessError, ValueError, SyntaxError) as e:
+            _logger.warning("Could not evaluate calls_to_evaluate: %s", e)
+            return
+
+        for key, result in zip(keys, results, strict=True):
+            if result is None:
+                continue
+            try:
+                constant = ast.Constant(ast.literal_eval(result))
+            except (ValueError, SyntaxError):
+                # Like float("nan"), which has no literal
+                continue
+            _evaluated_calls[(self._python_executable, key)] = constant
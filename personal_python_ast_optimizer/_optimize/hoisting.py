@@ -0,0 +1,686 @@
+"""Hoisting of invariant code out of loops and functions."""
+
+import ast
+import builtins
+import copy
+from collections.abc import Iterable, Iterator
+
+from personal_python_ast_optimizer._optimize.base import AstTransformerBase
+from personal_python_ast_optimizer._optimize.control_flow import get_statement_lists
+from personal_python_ast_optimizer._optimize.dataflow import (
+    get_bound_names_in_scope,
+    get_module_binding_counts,
+)
+from personal_python_ast_optimizer._optimize.typing import AstVisitorProtocol
+from personal_python_ast_optimizer._optimize.utils import (
+    LOCALS_ACCESS,
+    NESTED_SCOPES,
+    as_constant,
+    get_import_alias_bound_name,
+    replace_child,
+)
+from personal_python_ast_optimizer._optimize.visitors import (
+    has_dynamic_globals_access,
+)
+
+# Builtins that can't be renamed, like super which needs the __class__ cell,
+# or that can rebind attributes of other objects
+_BUILTINS_NOT_TO_HOIST: frozenset[str] = frozenset(("super", "setattr", "delattr"))
+
+_BUILTIN_NAMES: frozenset[str] = frozenset(
+    name
+    for name in dir(builtins)
+    if not name.startswith("_") and name not in _BUILTINS_NOT_TO_HOIST
+)
+
+
+def get_stable_global_names(node: ast.Module) -> tuple[set[str], set[str]]:
+    """Returns builtins and imported names that are never rebound once the module
+    is loaded. Loading these in a function gives the same object every time.
+
+    :param node: Module to check
+    :returns: Stable names and the subset of them that are imported modules"""
+    if has_dynamic_globals_access(node):
+        return set(), set()
+
+    binding_counts: dict[str, int] = get_module_binding_counts(node)
+
+    stable_names: set[str] = {
+        name for name in _BUILTIN_NAMES if name not in binding_counts
+    }
+    module_names: set[str] = set()
+    for statement in node.body:
+        if not isinstance(statement, (ast.Import, ast.ImportFrom)):
+            continue
+
+        for alias in statement.names:
+            name: str = get_import_alias_bound_name(alias)
+            if alias.name == "*" or binding_counts[name] != 1:
+                continue
+
+            stable_names.add(name)
+            if isinstance(statement, ast.Import):
+                module_names.add(name)
+
+    return stable_names, module_names
+
+
+def _get_lookup_id(node: ast.Attribute) -> str | None:
+    """Returns full id of an attribute chain that starts with a name."""
+    attrs: list[str] = []
+    child: ast.expr = node
+    while isinstance(child, ast.Attribute):
+        attrs.append(child.attr)
+        child = child.value
+
+    if not isinstance(child, ast.Name):
+        return None
+
+    attrs.append(child.id)
+    return ".".join(reversed(attrs))
+
+
+def _get_lookup_id_or_name(node: ast.Name | ast.Attribute) -> str | None:
+    return node.id if isinstance(node, ast.Name) else _get_lookup_id(node)
+
+
+def _walk_scope(nodes: Iterable[ast.AST]) -> Iterator[ast.AST]:
+    """Walks nodes without going into nested scopes."""
+    to_visit: list[ast.AST] = list(nodes)
+    while to_visit:
+        node: ast.AST = to_visit.pop()
+        yield node
+        if not isinstance(node, NESTED_SCOPES):
+            to_visit.extend(ast.iter_child_nodes(node))
+
+
+def _get_always_evaluated(node: ast.AST) -> Iterator[ast.AST]:
+    """Walks the parts of node that are evaluated every time node is."""
+    yield node
+    match node:
+        case ast.BoolOp(values=[first, *_]):
+            yield from _get_always_evaluated(first)
+        case ast.IfExp(test=test):
+            yield from _get_always_evaluated(test)
+        case (
+            ast.ListComp(generators=[first, *_])
+            | ast.SetComp(generators=[first, *_])
+            | ast.DictComp(generators=[first, *_])
+            | ast.GeneratorExp(generators=[first, *_])
+        ):
+            yield from _get_always_evaluated(first.iter)
+        case _ if not isinstance(node, NESTED_SCOPES):
+            for child in ast.iter_child_nodes(node):
+                yield from _get_always_evaluated(child)
+
+
+def _get_always_evaluated_in_loop(
+    node: ast.For | ast.AsyncFor | ast.While,
+) -> Iterator[ast.AST]:
+    """Walks the parts of a loop evaluated on every iteration."""
+    if isinstance(node, ast.While):
+        yield from _get_always_evaluated(node.test)
+
+    for statement in node.body:
+        if isinstance(statement, ast.If):
+            yield from _get_always_evaluated(statement.test)
+            return
+        if not isinstance(
+            statement,
+            (ast.Expr, ast.Assign, ast.AugAssign, ast.AnnAssign, ast.Return),
+        ):
+            return
+        yield from _get_always_evaluated(statement)
+
+
+class _LookupReplacer(AstTransformerBase, AstVisitorProtocol):
+    """Replaces lookups in the parts of a loop that run on every iteration,
+    so not in a for's iterator or a loop's else."""
+
+    __slots__ = ("_replace_in_test", "_replacements")
+
+    def __init__(self, replacements: dict[str, str], replace_in_test: bool) -> None:
+        self._replacements: dict[str, str] = replacements
+        self._replace_in_test: bool = replace_in_test
+
+    def visit(self, node: ast.For | ast.AsyncFor | ast.While) -> None:
+        if self._replace_in_test and isinstance(node, ast.While):
+            test = ast.Expr(node.test)
+            self._generic_visit(test)
+            node.test = test.value
+
+        for statement in node.body:
+            self._visit(statement)
+
+    def visit_Name(self, node: ast.Name) -> ast.Name:
+        if isinstance(node.ctx, ast.Load) and node.id in self._replacements:
+            return ast.Name(self._replacements[node.id], ast.Load())
+
+        return node
+
+    def visit_Attribute(self, node: ast.Attribute) -> ast.AST:
+        if isinstance(node.ctx, ast.Load):
+            lookup_id: str | None = _get_lookup_id(node)
+            if lookup_id in self._replacements:
+                return ast.Name(self._replacements[lookup_id], ast.Load())
+
+        return self._generic_visit(node)
+
+    def visit_FunctionDef(self, node: ast.FunctionDef) -> ast.AST:
+        return node
+
+    def visit_AsyncFunctionDef(self, node: ast.AsyncFunctionDef) -> ast.AST:
+        return node
+
+    def visit_Lambda(self, node: ast.Lambda) -> ast.AST:
+        return node
+
+    def visit_ClassDef(self, node: ast.ClassDef) -> ast.AST:
+        return node
+
+
+class LoopInvariantLookupHoister:
+    """Binds builtins, imported names and method lookups that are loaded in
+    a loop but can't change while it runs to locals before the loop."""
+
+    __slots__ = (
+        "_local_names",
+        "_module_names",
+        "_stable_names",
+        "_used_names",
+        "hoisted",
+    )
+
+    def __init__(self, stable_names: set[str], module_names: set[str]) -> None:
+        self._stable_names: set[str] = stable_names
+        self._module_names: set[str] = module_names
+        self._local_names: set[str] = set()
+        self._used_names: set[str] = set()
+        self.hoisted: bool = False
+
+    def visit(self, node: ast.FunctionDef | ast.AsyncFunctionDef) -> bool:
+        """Hoists invariant lookups out of loops in the body of node.
+
+        :param node: Function to hoist lookups in
+        :returns: True if any lookup was hoisted"""
+        self.hoisted = False
+        self._local_names = {
+            arg.arg for arg in ast.walk(node.args) if isinstance(arg, ast.arg)
+        }
+        for statement in node.body:
+            self._local_names.update(get_bound_names_in_scope(statement))
+        self._used_names = self._local_names | {
+            child.id for child in ast.walk(node) if isinstance(child, ast.Name)
+        }
+
+        self._hoist_in_body(node.body)
+
+        return self.hoisted
+
+    def _hoist_in_body(self, body: list[ast.stmt]) -> None:
+        index: int = 0
+        while index < len(body):
+            statement: ast.stmt = body[index]
+            if isinstance(statement, (ast.For, ast.AsyncFor, ast.While)):
+                assignments: list[ast.stmt] = self._hoist_from_loop(statement)
+                body[index:index] = assignments
+                index += len(assignments)
+
+            if not isinstance(statement, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                for nested_body in get_statement_lists(statement):
+                    self._hoist_in_body(nested_body)
+
+            index += 1
+
+    def _hoist_from_loop(
+        self, node: ast.For | ast.AsyncFor | ast.While
+    ) -> list[ast.stmt]:
+        function_lookups, receiver_lookups = self._get_invariant_method_lookups(node)
+        # Methods first so modules only used to look them up are not hoisted
+        assignments: list[ast.stmt] = self._replace_lookups(node, function_lookups)
+        assignments.extend(self._bind_on_first_iteration(node, receiver_lookups))
+        assignments.extend(
+            self._replace_lookups(
+                node,
+                {
+                    child.id: child
+                    for child in self._walk_loop(node)
+                    if isinstance(child, ast.Name)
+                    and isinstance(child.ctx, ast.Load)
+                    and child.id in self._stable_names
+                    and child.id not in self._local_names
+                },
+            )
+        )
+
+        return assignments
+
+    @staticmethod
+    def _walk_loop(node: ast.For | ast.AsyncFor | ast.While) -> Iterator[ast.AST]:
+        """Walks the parts of a loop that can be evaluated on every iteration."""
+        if isinstance(node, ast.While):
+            yield from _walk_scope([node.test])
+
+        yield from _walk_scope(node.body)
+
+    def _replace_lookups(
+        self, node: ast.For | ast.AsyncFor | ast.While, lookups: dict[str, ast.expr]
+    ) -> list[ast.stmt]:
+        return [
+            ast.Assign([ast.Name(name, ast.Store())], lookup)
+            for name, lookup in self._replace_with_locals(node, lookups, True).items()
+        ]
+
+    def _bind_on_first_iteration(
+        self, node: ast.For | ast.AsyncFor | ast.While, lookups: dict[str, ast.expr]
+    ) -> list[ast.stmt]:
+        """Replaces lookups in node's body with locals bound on its first
+        iteration, so a lookup that could fail isn't evaluated if the loop never
+        runs. A while's test runs before the body so is left alone."""
+        locals_to_lookups: dict[str, ast.expr] = self._replace_with_locals(
+            node, lookups, False
+        )
+        node.body[:0] = [
+            ast.If(
+                ast.Compare(
+                    ast.Name(name, ast.Load()), [ast.Is()], [ast.Constant(None)]
+                ),
+                [ast.Assign([ast.Name(name, ast.Store())], lookup)],
+                [],
+            )
+            for name, lookup in locals_to_lookups.items()
+        ]
+
+        return [
+            ast.Assign([ast.Name(name, ast.Store())], ast.Constant(None))
+            for name in locals_to_lookups
+        ]
+
+    def _replace_with_locals(
+        self,
+        node: ast.For | ast.AsyncFor | ast.While,
+        lookups: dict[str, ast.expr],
+        replace_in_test: bool,
+    ) -> dict[str, ast.expr]:
+        """Replaces lookups in node with unused locals.
+
+        :returns: Each local to the lookup it needs to be bound to"""
+        if not lookups:
+            return {}
+
+        locals_to_lookups: dict[str, ast.expr] = {}
+        replacements: dict[str, str] = {}
+        for lookup_id, lookup in lookups.items():
+            replacements[lookup_id] = self._get_unused_name(lookup_id)
+            locals_to_lookups[replacements[lookup_id]] = copy.deepcopy(lookup)
+
+        _LookupReplacer(replacements, replace_in_test).visit(node)
+        self.hoisted = True
+
+        return locals_to_lookups
+
+    def _get_invariant_method_lookups(
+        self, node: ast.For | ast.AsyncFor | ast.While
+    ) -> tuple[dict[str, ast.expr], dict[str, ast.expr]]:
+        """Returns lookups of functions like `math.sqrt` and of objects that have
+        methods called on them like `self.items` in `self.items.append(...)`
+        that happen on every iteration and can't change while the loop runs.
+
+        Methods themselves are not hoisted since calling a method directly
+        is faster than calling a bound method object. Objects are only looked
+        up in whiles and fors over locals or literals, since iterating over
+        anything else, like a call to a generator, could change them."""
+        rebound_names: set[str] = get_bound_names_in_scope(node)
+        rebound_attrs: set[str] = {
+            child.attr
+            for child in self._walk_loop(node)
+            if isinstance(child, ast.Attribute)
+            and isinstance(child.ctx, (ast.Store, ast.Del))
+        }
+        calls: list[ast.Call] = [
+            child for child in self._walk_loop(node) if isinstance(child, ast.Call)
+        ]
+
+        # Objects are bound in the body, which runs after a while's test
+        test_nodes: set[ast.AST] = (
+            set(ast.walk(node.test)) if isinstance(node, ast.While) else set()
+        )
+
+        function_lookups: dict[str, ast.expr] = {}
+        receiver_lookups: dict[str, ast.expr] = {}
+        for child in _get_always_evaluated_in_loop(node):
+            if not isinstance(child, ast.Call) or not isinstance(
+                child.func, ast.Attribute
+            ):
+                continue
+
+            lookup_id: str | None = _get_lookup_id(child.func)
+            if lookup_id is None:
+                continue
+
+            root, *attrs = lookup_id.split(".")
+            if rebound_attrs.intersection(attrs) or root in rebound_names:
+                continue
+
+            if root not in self._local_names:
+                if root in self._module_names:
+                    function_lookups[lookup_id] = child.func
+            elif (
+                len(attrs) > 1
+                and child not in test_nodes
+                and self._has_stable_iterator(node)
+            ):
+                receiver_id: str = lookup_id.rpartition(".")[0]
+                if self._is_invariant_receiver(receiver_id, calls):
+                    receiver_lookups[receiver_id] = child.func.value
+
+        return function_lookups, receiver_lookups
+
+    @staticmethod
+    def _has_stable_iterator(node: ast.For | ast.AsyncFor | ast.While) -> bool:
+        """Checks that getting the next item of a loop can't run other code.
+        A while's test is walked with the rest of the loop instead."""
+        if isinstance(node, ast.While):
+            return True
+
+        return isinstance(node, ast.For) and all(
+            isinstance(
+                child, (ast.Name, ast.Constant, ast.Tuple, ast.List, ast.expr_context)
+            )
+            for child in ast.walk(node.iter)
+        )
+
+    def _is_invariant_receiver(self, receiver_id: str, calls: list[ast.Call]) -> bool:
+        # Other methods called in the loop could reassign attributes that lead
+        # to the receiver, like items in self.items
+        return all(
+            self._is_builtin_call(call)
+            or (
+                isinstance(call.func, ast.Attribute)
+                and isinstance(call.func.value, (ast.Name, ast.Attribute))
+                and _get_lookup_id_or_name(call.func.value) == receiver_id
+            )
+            for call in calls
+        )
+
+    def _is_builtin_call(self, node: ast.Call) -> bool:
+        return (
+            isinstance(node.func, ast.Name)
+            and node.func.id in _BUILTIN_NAMES
+            and node.func.id in self._stable_names
+            and node.func.id not in self._local_names
+        )
+
+    def _get_unused_name(self, lookup_id: str) -> str:
+        name: str = "_" + lookup_id.replace(".", "_")
+        while name in self._used_names:
+            name += "_"
+
+        self._used_names.add(name)
+        return name
+
+
+# Calls that only read the container passed to them and don't keep it
+_READ_ONLY_BUILTINS: frozenset[str] = frozenset(
+    (
+        "all",
+        "any",
+        "dict",
+        "frozenset",
+        "len",
+        "list",
+        "max",
+        "min",
+        "set",
+        "sorted",
+        "sum",
+        "tuple",
+    )
+)
+
+# Methods that read a container and are the same on the type it is hoisted as
+_READ_ONLY_METHODS: dict[type[ast.expr], frozenset[str]] = {
+    ast.List: frozenset(("count", "index")),
+    ast.Set: frozenset(("isdisjoint", "issubset", "issuperset")),
+    ast.Dict: frozenset(("copy", "get", "items", "keys", "values")),
+}
+
+
+def _is_constant_container(node: ast.expr) -> bool:
+    match node:
+        case ast.List(elts=elts) | ast.Set(elts=elts):
+            return all(as_constant(e) is not None for e in elts)
+        case ast.Dict(keys=keys, values=values):
+            return all(
+                k is not None and as_constant(k) is not None for k in keys
+            ) and all(as_constant(v) is not None for v in values)
+        case _:
+            return False
+
+
+class ConstantContainerHoister:
+    """Moves constant list, set and dict literals in functions that are only
+    read to module constants so they are not rebuilt on every call. Lists become
+    tuples, which are constants, and sets become frozensets."""
+
+    __slots__ = (
+        "_builtins",
+        "_constants",
+        "_local_names",
+        "_module_names",
+        "_parents",
+        "hoisted",
+    )
+
+    def __init__(self) -> None:
+        self._module_names: set[str] = set()
+        # Builtins that are not shadowed in the module
+        self._builtins: set[str] = set()
+        self._local_names: set[str] = set()
+        self._parents: dict[ast.AST, ast.AST] = {}
+        # Assignments of module constants to add before the current statement
+        self._constants: list[ast.stmt] = []
+        self.hoisted: bool = False
+
+    def visit(self, node: ast.Module) -> bool:
+        """Hoists constant containers out of functions in node.
+
+        :param node: Module to hoist containers in
+        :returns: True if any container was hoisted"""
+        self.hoisted = False
+        binding_counts: dict[str, int] = get_module_binding_counts(node)
+        self._builtins = {name for name in _BUILTIN_NAMES if name not in binding_counts}
+        self._module_names = set(binding_counts) | {
+            child.id for child in ast.walk(node) if isinstance(child, ast.Name)
+        }
+
+        new_body: list[ast.stmt] = []
+        for statement in node.body:
+            self._constants = []
+            for child in ast.walk(statement):
+                if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                    self._hoist_in_function(child)
+
+            new_body.extend(self._constants)
+            new_body.append(statement)
+
+        node.body = new_body
+
+        return self.hoisted
+
+    def _hoist_in_function(self, node: ast.FunctionDef | ast.AsyncFunctionDef) -> None:
+        if any(
+            isinstance(child, ast.Name) and child.id in LOCALS_ACCESS
+            for child in ast.walk(node)
+        ):
+            return
+
+        self._parents = {
+            child: parent
+            for parent in ast.walk(node)
+            for child in ast.iter_child_nodes(parent)
+        }
+        scope: list[ast.AST] = list(_walk_scope(node.body))
+        self._local_names = {
+            arg.arg for arg in ast.walk(node.args) if isinstance(arg, ast.arg)
+        }
+        for statement in node.body:
+            self._local_names.update(get_bound_names_in_scope(statement))
+
+        read_only_locals: set[str] = self._get_read_only_locals(node, scope)
+        for child in scope:
+            if not isinstance(child, (ast.List, ast.Set, ast.Dict)):
+                continue
+            if not _is_constant_container(child):
+                continue
+
+            parent: ast.AST = self._parents[child]
+            if (
+                isinstance(parent, ast.Assign)
+                and len(parent.targets) == 1
+                and isinstance(parent.targets[0], ast.Name)
+                and parent.targets[0].id in read_only_locals
+            ):
+                self._hoist(node, child, parent.targets[0].id)
+            elif self._is_read_only_use(child, type(child)) and not (
+                # Already made a constant when compiled
+                isinstance(child, (ast.List, ast.Set)) and self._is_membership(child)
+            ):
+                self._hoist(node, child, type(child).__name__.lower())
+
+    def _get_read_only_locals(
+        self, node: ast.FunctionDef | ast.AsyncFunctionDef, scope: list[ast.AST]
+    ) -> set[str]:
+        """Returns locals that are assigned a constant container once and only
+        read in ways that work the same on the type it would be hoisted as."""
+        store_counts: dict[str, int] = {}
+        container_types: dict[str, type[ast.expr]] = {}
+        for child in scope:
+            if isinstance(child, ast.Name) and isinstance(
+                child.ctx, (ast.Store, ast.Del)
+            ):
+                store_counts[child.id] = store_counts.get(child.id, 0) + 1
+            elif (
+                isinstance(child, ast.Assign)
+                and len(child.targets) == 1
+                and isinstance(child.targets[0], ast.Name)
+                and _is_constant_container(child.value)
+            ):
+                container_types[child.targets[0].id] = type(child.value)
+
+        # Bound other than by a name, like by an import or def
+        other_bound_names: set[str] = {
+            arg.arg for arg in ast.walk(node.args) if isinstance(arg, ast.arg)
+        }
+        for child in ast.walk(node):
+            match child:
+                case ast.Global(names=names) | ast.Nonlocal(names=names):
+                    other_bound_names.update(names)
+                case (
+                    ast.FunctionDef(name=name)
+                    | ast.AsyncFunctionDef(name=name)
+                    | ast.ClassDef(name=name)
+                    | ast.ExceptHandler(name=str(name))
+                    | ast.MatchAs(name=str(name))
+                    | ast.MatchStar(name=str(name))
+                    | ast.MatchMapping(rest=str(name))
+                ):
+                    other_bound_names.add(name)
+                case ast.alias():
+                    other_bound_names.add(get_import_alias_bound_name(child))
+
+        return {
+            name
+            for name, container_type in container_types.items()
+            if store_counts[name] == 1
+            and name not in other_bound_names
+            and all(
+                self._is_read_only_use(child, container_type)
+                for child in ast.walk(node)
+                if isinstance(child, ast.Name)
+                and child.id == name
+                and isinstance(child.ctx, ast.Load)
+            )
+        }
+
+    def _is_membership(self, node: ast.expr) -> bool:
+        parent: ast.AST = self._parents[node]
+        return (
+            isinstance(parent, (ast.For, ast.AsyncFor, ast.comprehension))
+            and parent.iter is node
+        ) or (
+            isinstance(parent, ast.Compare)
+            and node in parent.comparators
+            and isinstance(
+                parent.ops[parent.comparators.index(node)], (ast.In, ast.NotIn)
+            )
+        )
+
+    def _is_read_only_use(self, node: ast.expr, container_type: type[ast.expr]) -> bool:
+        """Checks if node is used in a way that can't change or keep it and that
+        works the same once hoisted."""
+        if self._is_membership(node):
+            return True
+
+        parent: ast.AST = self._parents[node]
+        match parent:
+            case ast.Subscript(value=value, slice=index, ctx=ast.Load()):
+                # Slicing a tuple gives a tuple instead of a list, and any index
+                # that isn't a constant could be a slice object
+                return value is node and (
+                    container_type is not ast.List
+                    or (isinstance(index, ast.Constant) and type(index.value) is int)
+                )
+            case ast.Attribute(value=value, attr=attr):
+                grandparent: ast.AST | None = self._parents.get(parent)
+                return (
+                    value is node
+                    and attr in _READ_ONLY_METHODS[container_type]
+                    and isinstance(grandparent, ast.Call)
+                    and grandparent.func is parent
+                )
+            case ast.Call(func=ast.Name(id=name), keywords=[]):
+                return (
+                    name in _READ_ONLY_BUILTINS
+                    and name in self._builtins
+                    and name not in self._local_names
+                )
+            case ast.Call(
+                func=ast.Attribute(value=ast.Constant(value=str()), attr="join"),
+                args=[_],
+            ):
+                return True
+            case _:
+                return False
+
+    def _hoist(
+        self,
+        function: ast.FunctionDef | ast.AsyncFunctionDef,
+        node: ast.List | ast.Set | ast.Dict,
+        name_hint: str,
+    ) -> None:
+        new_node: ast.expr
+        if isinstance(node, ast.List):
+            new_node = ast.Tuple(node.elts, ast.Load())
+        else:
+            if isinstance(node, ast.Set) and "frozenset" not in self._builtins:
+                return
+
+            name: str = self._get_unused_name(f"_{function.name}_{name_hint}")
+            value: ast.expr = (
+                ast.Call(ast.Name("frozenset", ast.Load()), [node], [])
+                if isinstance(node, ast.Set)
+                else node
+            )
+            self._constants.append(ast.Assign([ast.Name(name, ast.Store())], value))
+            new_node = ast.Name(name, ast.Load())
+
+        replace_child(self._parents[node], node, new_node)
+        self.hoisted = True
+
+    def _get_unused_name(self, name: str) -> str:
+        while name in self._module_names:
+            name += "_"
+
+        self._module_names.add(name)
+        return name
@@ -0,0 +1,661 @@
+"""Rewrites of slow idioms to equivalent faster ones."""
+
+import ast
+import copy
+import string
+
+from personal_python_ast_optimizer._optimize.base import AstTransformerBase
+from personal_python_ast_optimizer._optimize.control_flow import get_statement_lists
+from personal_python_ast_optimizer._optimize.dataflow import (
+    get_bound_names_in_scope,
+    get_module_binding_counts,
+)
+from personal_python_ast_optimizer._optimize.typing import AstVisitorProtocol
+from personal_python_ast_optimizer._optimize.utils import (
+    NESTED_SCOPES,
+    build_joined_str,
+)
+from personal_python_ast_optimizer._optimize.visitors import (
+    has_dynamic_globals_access,
+)
+from personal_python_ast_optimizer.config import IdiomRewrites
+
+_REWRITTEN_BUILTINS: frozenset[str] = frozenset(
+    ("dict", "enumerate", "len", "list", "range", "set", "str", "tuple")
+)
+
+# Arguments that can be evaluated more than once or out of order
+_SIMPLE_ARGS = (ast.Constant, ast.Name)
+
+# Can't be moved into the scope of a comprehension
+_UNSAFE_IN_COMPREHENSION = (ast.Yield, ast.YieldFrom, ast.NamedExpr, ast.Await)
+
+# Values that are always sequences that can be indexed by position
+_SEQUENCES = (ast.List, ast.Tuple, ast.ListComp)
+
+
+def _is_store_target(node: ast.expr) -> bool:
+    match node:
+        case ast.Name():
+            return True
+        case ast.Tuple(elts=elts) | ast.List(elts=elts):
+            return all(isinstance(elt, ast.Name) for elt in elts)
+        case _:
+            return False
+
+
+def _formatted(
+    value: ast.expr, conversion: str | None, spec: str
+) -> ast.FormattedValue:
+    return ast.FormattedValue(
+        value=value,
+        conversion=-1 if conversion is None else ord(conversion),
+        format_spec=ast.JoinedStr(values=[ast.Constant(spec)]) if spec else None,
+    )
+
+
+def _get_percent_format_fstring(node: ast.BinOp) -> ast.expr | None:
+    """Converts "%s" % (a,) to an f-string. Only %s, %r and %a are converted
+    since other specifiers convert values differently than format does."""
+    template: str = node.left.value  # type: ignore[attr-defined]
+    args: list[ast.expr]
+    match node.right:
+        case ast.Tuple(elts=elts) if not any(
+            isinstance(elt, ast.Starred) for elt in elts
+        ):
+            args = elts
+        case ast.Constant(value=value) if not isinstance(value, tuple):
+            args = [node.right]
+        case _:
+            return None
+
+    parts: list[str | ast.expr] = []
+    arg_index: int = 0
+    index: int = 0
+    while (percent := template.find("%", index)) != -1:
+        parts.append(template[index:percent])
+        conversion: str = template[percent + 1 : percent + 2]
+        if conversion == "%":
+            parts.append("%")
+        elif conversion in ("s", "r", "a") and arg_index < len(args):
+            parts.append(_formatted(args[arg_index], conversion, ""))
+            arg_index += 1
+        else:
+            return None
+        index = percent + 2
+    parts.append(template[index:])
+
+    if arg_index == 0 or arg_index != len(args):
+        return None
+
+    return build_joined_str(parts)
+
+
+def _get_format_call_fstring(node: ast.Call) -> ast.expr | None:
+    """Converts "{}".format(a) to an f-string. Every argument must be used and
+    arguments that are not names or constants must be used once and in order
+    so they are evaluated the same."""
+    match node.func:
+        case ast.Attribute(value=ast.Constant(value=str(template)), attr="format"):
+            pass
+        case _:
+            return None
+
+    if any(isinstance(arg, ast.Starred) for arg in node.args) or any(
+        keyword.arg is None for keyword in node.keywords
+    ):
+        return None
+
+    args: dict[int | str, ast.expr] = dict(enumerate(node.args))
+    args.update((keyword.arg, keyword.value) for keyword in node.keywords)  # type: ignore[misc]
+
+    parsed: tuple[list[str | ast.expr], list[int | str]] | None = _parse_format_fields(
+        template, args
+    )
+    if parsed is None:
+        return None
+
+    parts, used = parsed
+    complex_args: list[int | str] = [
+        key for key, arg in args.items() if not isinstance(arg, _SIMPLE_ARGS)
+    ]
+    if (
+        set(used) != set(args)
+        or [key for key in used if key in complex_args] != complex_args
+    ):
+        return None
+
+    return build_joined_str(parts)
+
+
+def _parse_format_fields(
+    template: str, args: dict[int | str, ast.expr]
+) -> tuple[list[str | ast.expr], list[int | str]] | None:
+    """Splits a str.format template into text and formatted arguments.
+
+    :returns: Parts of the f-string and keys of the arguments in the order used"""
+    try:
+        fields = list(string.Formatter().parse(template))
+    except ValueError:
+        return None
+
+    parts: list[str | ast.expr] = []
+    used: list[int | str] = []
+    auto_numbering: bool | None = None
+    for text, field_name, spec, conversion in fields:
+        parts.append(text)
+        if field_name is None:
+            continue
+
+        key: int | str = field_name
+        if field_name == "" and auto_numbering is not False:
+            auto_numbering = True
+            key = sum(isinstance(used_key, int) for used_key in used)
+        elif field_name.isascii() and field_name.isdigit() and not auto_numbering:
+            auto_numbering = False
+            key = int(field_name)
+        elif not field_name.isidentifier():
+            return None
+
+        format_spec: str = spec or ""
+        if (
+            key not in args
+            or "{" in format_spec
+            or conversion not in (None, "s", "r", "a")
+        ):
+            return None
+
+        used.append(key)
+        parts.append(_formatted(copy.deepcopy(args[key]), conversion, format_spec))
+
+    return parts, used
+
+
+def _is_always_sequence(
+    function: ast.FunctionDef | ast.AsyncFunctionDef, name: str
+) -> bool:
+    """Checks that name is only ever bound to lists, tuples and list
+    comprehensions in function, so indexing it by position can't mean
+    something else like it would for a dict."""
+    if any(
+        arg.arg == name for arg in ast.walk(function.args) if isinstance(arg, ast.arg)
+    ):
+        return False
+
+    sequence_targets: set[ast.AST] = set()
+    for child in ast.walk(function):
+        match child:
+            case ast.Assign(
+                targets=[ast.Name(id=target_name) as target], value=value
+            ) if target_name == name and isinstance(value, _SEQUENCES):
+                sequence_targets.add(target)
+            case ast.Global(names=names) | ast.Nonlocal(names=names) if name in names:
+                return False
+
+    return bool(sequence_targets) and all(
+        child in sequence_targets
+        for child in ast.walk(function)
+        if isinstance(child, ast.Name)
+        and child.id == name
+        and not isinstance(child.ctx, ast.Load)
+    )
+
+
+class IdiomRewriter(AstTransformerBase, AstVisitorProtocol):
+    """Replaces calls and loops that build containers with the literals and
+    comprehensions that build them faster. Only applies where the builtins
+    the idiom uses are not shadowed."""
+
+    __slots__ = ("_builtins", "_rewrites", "_shadowed_names", "rewritten")
+
+    def __init__(self, rewrites: IdiomRewrites) -> None:
+        self._rewrites: IdiomRewrites = rewrites
+        # Builtins that are not shadowed in the module
+        self._builtins: set[str] = set()
+        # Names bound in each scope the visitor is currently in
+        self._shadowed_names: list[set[str]] = []
+        self.rewritten: bool = False
+
+    def visit(self, node: ast.Module) -> bool:
+        """Rewrites idioms in node.
+
+        :param node: Module to rewrite idioms in
+        :returns: True if any idiom was rewritten"""
+        self.rewritten = False
+        if not self._rewrites or has_dynamic_globals_access(node):
+            return False
+
+        binding_counts: dict[str, int] = get_module_binding_counts(node)
+        self._builtins = {
+            name for name in _REWRITTEN_BUILTINS if name not in binding_counts
+        }
+        self._shadowed_names = []
+        self._generic_visit(node)
+
+        return self.rewritten
+
+    def _is_builtin(self, node: ast.expr, *names: str) -> bool:
+        return (
+            isinstance(node, ast.Name)
+            and node.id in names
+            and self._is_unshadowed_builtin(node.id)
+        )
+
+    def _is_unshadowed_builtin(self, name: str) -> bool:
+        return name in self._builtins and not any(
+            name in bound_names for bound_names in self._shadowed_names
+        )
+
+    def visit_FunctionDef(self, node: ast.FunctionDef) -> ast.AST:
+        return self._handle_function(node)
+
+    def visit_AsyncFunctionDef(self, node: ast.AsyncFunctionDef) -> ast.AST:
+        return self._handle_function(node)
+
+    def _handle_function(self, node: ast.FunctionDef | ast.AsyncFunctionDef) -> ast.AST:
+        bound_names: set[str] = {
+            arg.arg for arg in ast.walk(node.args) if isinstance(arg, ast.arg)
+        }
+        for statement in node.body:
+            bound_names.update(get_bound_names_in_scope(statement))
+
+        self._shadowed_names.append(bound_names)
+        try:
+            self._generic_visit(node)
+            if self._rewrites & (
+                IdiomRewrites.RANGE_LEN_TO_ENUMERATE
+                | IdiomRewrites.APPEND_LOOP_TO_COMPREHENSION
+            ):
+                self._rewrite_loops(node, node.body, False)
+        finally:
+            self._shadowed_names.pop()
+
+        return node
+
+    def visit_ClassDef(self, node: ast.ClassDef) -> ast.AST:
+        bound_names: set[str] = set()
+        for statement in node.body:
+            bound_names.update(get_bound_names_in_scope(statement))
+
+        return self._visit_in_scope(node, bound_names)
+
+    def visit_Lambda(self, node: ast.Lambda) -> ast.AST:
+        return self._visit_in_scope(
+            node, {arg.arg for arg in ast.walk(node.args) if isinstance(arg, ast.arg)}
+        )
+
+    def visit_ListComp(self, node: ast.ListComp) -> ast.AST:
+        return self._handle_comprehension(node)
+
+    def visit_SetComp(self, node: ast.SetComp) -> ast.AST:
+        return self._handle_comprehension(node)
+
+    def visit_DictComp(self, node: ast.DictComp) -> ast.AST:
+        return self._handle_comprehension(node)
+
+    def visit_GeneratorExp(self, node: ast.GeneratorExp) -> ast.AST:
+        return self._handle_comprehension(node)
+
+    def _handle_comprehension(
+        self, node: ast.ListComp | ast.SetComp | ast.DictComp | ast.GeneratorExp
+    ) -> ast.AST:
+        bound_names: set[str] = set()
+        for generator in node.generators:
+            bound_names.update(get_bound_names_in_scope(generator.target))
+
+        return self._visit_in_scope(node, bound_names)
+
+    def _visit_in_scope(self, node: ast.AST, bound_names: set[str]) -> ast.AST:
+        self._shadowed_names.append(bound_names)
+        try:
+            return self._generic_visit(node)
+        finally:
+            self._shadowed_names.pop()
+
+    def visit_Call(self, node: ast.Call) -> ast.AST:
+        parsed_node: ast.AST = self._generic_visit(node)
+        if not isinstance(parsed_node, ast.Call):
+            return parsed_node
+
+        new_node: ast.expr | None = None
+        if not self._is_builtin(parsed_node.func, "dict", "list", "set", "tuple"):
+            if self._rewrites & IdiomRewrites.STRING_FORMAT_TO_FSTRING:
+                new_node = _get_format_call_fstring(parsed_node)
+        elif not parsed_node.args:
+            if self._rewrites & IdiomRewrites.EMPTY_CALL_TO_LITERAL:
+                new_node = self._get_empty_call_literal(parsed_node)
+        elif len(parsed_node.args) == 1 and not parsed_node.keywords:
+            if self._rewrites & IdiomRewrites.LITERAL_CALL_TO_LITERAL:
+                new_node = self._get_literal_call_literal(parsed_node)
+            if (
+                new_node is None
+                and self._rewrites & IdiomRewrites.GENERATOR_CALL_TO_COMPREHENSION
+            ):
+                new_node = self._get_generator_call_comprehension(parsed_node)
+
+        if new_node is None:
+            return parsed_node
+
+        self.rewritten = True
+        return ast.copy_location(new_node, parsed_node)
+
+    def visit_BinOp(self, node: ast.BinOp) -> ast.AST:
+        parsed_node: ast.AST = self._generic_visit(node)
+        if (
+            not isinstance(parsed_node, ast.BinOp)
+            or not self._rewrites & IdiomRewrites.STRING_FORMAT_TO_FSTRING
+        ):
+            return parsed_node
+
+        new_node: ast.expr | None = None
+        match parsed_node:
+            case ast.BinOp(left=ast.Constant(value=str()), op=ast.Mod()):
+                new_node = _get_percent_format_fstring(parsed_node)
+            case ast.BinOp(op=ast.Add()):
+                new_node = self._get_concat_fstring(parsed_node)
+
+        if new_node is None:
+            return parsed_node
+
+        self.rewritten = True
+        return ast.copy_location(new_node, parsed_node)
+
+    def _get_concat_fstring(self, node: ast.BinOp) -> ast.expr | None:
+        left: list[str | ast.expr] | None = self._as_fstring_parts(node.left)
+        right: list[str | ast.expr] | None = self._as_fstring_parts(node.right)
+        if left is None or right is None:
+            return None
+
+        parts: list[str | ast.expr] = left + right
+        # Only strings are left for constant folding
+        if all(isinstance(part, str) for part in parts):
+            return None
+
+        return build_joined_str(parts)
+
+    def _as_fstring_parts(self, node: ast.expr) -> list[str | ast.expr] | None:
+        """Returns node as parts of an f-string if it is known to be a str."""
+        match node:
+            case ast.Constant(value=str(value)):
+                return [value]
+            case ast.JoinedStr(values=values):
+                return [
+                    value.value if isinstance(value, ast.Constant) else value  # type: ignore[misc]
+                    for value in values
+                ]
+            case ast.Call(func=func, args=[arg], keywords=[]) if self._is_builtin(
+                func, "str"
+            ) and not isinstance(arg, ast.Starred):
+                return [_formatted(arg, "s", "")]
+            case _:
+                return None
+
+    @staticmethod
+    def _get_empty_call_literal(node: ast.Call) -> ast.expr | None:
+        name: str = node.func.id  # type: ignore[attr-defined]
+        if name == "dict" and all(keyword.arg is not None for keyword in node.keywords):
+            return ast.Dict(
+                keys=[ast.Constant(keyword.arg) for keyword in node.keywords],
+                values=[keyword.value for keyword in node.keywords],
+            )
+
+        if node.keywords:
+            return None
+
+        match name:
+            case "list":
+                return ast.List(elts=[], ctx=ast.Load())
+            case "tuple":
+                return ast.Tuple(elts=[], ctx=ast.Load())
+            case _:
+                return None
+
+    @staticmethod
+    def _get_literal_call_literal(node: ast.Call) -> ast.expr | None:
+        name: str = node.func.id  # type: ignore[attr-defined]
+        arg: ast.expr = node.args[0]
+        match arg:
+            case ast.Dict() if name == "dict":
+                return arg
+            case ast.List(elts=elts) | ast.Tuple(elts=elts) | ast.Set(elts=elts):
+                if name == "list" and not isinstance(arg, ast.Set):
+                    return ast.List(elts=elts, ctx=ast.Load())
+                if name == "tuple" and not isinstance(arg, ast.Set):
+                    return ast.Tuple(elts=elts, ctx=ast.Load())
+                # {} would be a dict
+                if name == "set" and elts:
+                    return ast.Set(elts=elts)
+
+        return None
+
+    @staticmethod
+    def _get_generator_call_comprehension(node: ast.Call) -> ast.expr | None:
+        name: str = node.func.id  # type: ignore[attr-defined]
+        arg: ast.expr = node.args[0]
+        if not isinstance(arg, (ast.GeneratorExp, ast.ListComp)):
+            return None
+
+        match name:
+            case "list":
+                return ast.ListComp(elt=arg.elt, generators=arg.generators)
+            case "set":
+                return ast.SetComp(elt=arg.elt, generators=arg.generators)
+            case "dict" if (
+                isinstance(arg.elt, ast.Tuple)
+                and len(arg.elt.elts) == 2  # noqa: PLR2004
+                and not any(isinstance(elt, ast.Starred) for elt in arg.elt.elts)
+            ):
+                return ast.DictComp(
+                    key=arg.elt.elts[0],
+                    value=arg.elt.elts[1],
+                    generators=arg.generators,
+                )
+            case _:
+                return None
+
+    def _rewrite_loops(
+        self,
+        function: ast.FunctionDef | ast.AsyncFunctionDef,
+        body: list[ast.stmt],
+        in_try: bool,
+    ) -> None:
+        for statement in body:
+            if isinstance(
+                statement, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)
+            ):
+                continue
+            for nested_body in get_statement_lists(statement):
+                self._rewrite_loops(
+                    function,
+                    nested_body,
+                    # Context managers like contextlib.suppress can also
+                    # swallow exceptions raised in the loop
+                    in_try
+                    or isinstance(
+                        statement, (ast.Try, ast.TryStar, ast.With, ast.AsyncWith)
+                    ),
+                )
+
+        if self._rewrites & IdiomRewrites.RANGE_LEN_TO_ENUMERATE:
+            for statement in body:
+                if isinstance(statement, ast.For):
+                    self._rewrite_range_len(function, statement)
+
+        # A list only partly built could be seen if the loop raises
+        if self._rewrites & IdiomRewrites.APPEND_LOOP_TO_COMPREHENSION and not in_try:
+            index: int = 0
+            while index < len(body) - 1:
+                if self._rewrite_append_loop(function, body[index], body[index + 1]):
+                    del body[index + 1]
+                index += 1
+
+    def _rewrite_range_len(
+        self, function: ast.FunctionDef | ast.AsyncFunctionDef, node: ast.For
+    ) -> None:
+        match node:
+            case ast.For(
+                target=ast.Name(id=index),
+                iter=ast.Call(
+                    func=range_func,
+                    args=[
+                        ast.Call(
+                            func=len_func,
+                            args=[ast.Name(id=sequence)],
+                            keywords=[],
+                        )
+                    ],
+                    keywords=[],
+                ),
+                body=[
+                    ast.Assign(
+                        targets=[target],
+                        value=ast.Subscript(
+                            value=ast.Name(id=indexed), slice=ast.Name(id=index_used)
+                        ),
+                    ),
+                    *rest,
+                ],
+            ) if (
+                indexed == sequence
+                and index_used == index
+                and _is_store_target(target)
+                and self._is_builtin(range_func, "range")
+                and self._is_builtin(len_func, "len")
+                and self._is_unshadowed_builtin("enumerate")
+                and _is_always_sequence(function, sequence)
+            ):
+                pass
+            case _:
+                return
+
+        bound_names: set[str] = set()
+        for statement in node.body:
+            bound_names.update(get_bound_names_in_scope(statement))
+        if index in bound_names or sequence in bound_names:
+            return
+
+        # Other uses could resize the sequence
+        parents: dict[ast.AST, ast.AST] = {
+            child: parent
+            for statement in rest
+            for parent in ast.walk(statement)
+            for child in ast.iter_child_nodes(parent)
+        }
+        for statement in rest:
+            for child in ast.walk(statement):
+                if isinstance(child, ast.Name) and child.id == sequence:
+                    parent: ast.AST = parents[child]
+                    if not (
+                        isinstance(parent, ast.Subscript)
+                        and isinstance(parent.ctx, ast.Load)
+                        and parent.value is child
+                    ):
+                        return
+
+        node.target = ast.Tuple(
+            elts=[ast.Name(id=index, ctx=ast.Store()), target], ctx=ast.Store()
+        )
+        node.iter = ast.Call(
+            func=ast.Name(id="enumerate", ctx=ast.Load()),
+            args=[ast.Name(id=sequence, ctx=ast.Load())],
+            keywords=[],
+        )
+        node.body = rest or [ast.Pass()]
+        self.rewritten = True
+
+    def _rewrite_append_loop(
+        self,
+        function: ast.FunctionDef | ast.AsyncFunctionDef,
+        assign: ast.stmt,
+        loop: ast.stmt,
+    ) -> bool:
+        """Rewrites an assignment of an empty list followed by a loop that only
+        appends to it into an assignment of a list comprehension.
+
+        :returns: True if loop was merged into assign and should be removed"""
+        match assign:
+            case ast.Assign(targets=[ast.Name(id=name)], value=ast.List(elts=[])):
+                pass
+            case _:
+                return False
+
+        generators: list[ast.comprehension] = []
+        node: ast.stmt = loop
+        while True:
+            match node:
+                case ast.For(target=target, iter=iter_, body=[body], orelse=[]):
+                    generators.append(
+                        ast.comprehension(target=target, iter=iter_, ifs=[], is_async=0)
+                    )
+                    node = body
+                case ast.If(test=test, body=[body], orelse=[]) if generators:
+                    generators[-1].ifs.append(test)
+                    node = body
+                case ast.Expr(
+                    value=ast.Call(
+                        func=ast.Attribute(value=ast.Name(id=appended), attr="append"),
+                        args=[value],
+                        keywords=[],
+                    )
+                ) if (
+                    generators
+                    and appended == name
+                    and not isinstance(value, ast.Starred)
+                ):
+                    break
+                case _:
+                    return False
+
+        if not self._is_safe_as_comprehension(function, loop, name):
+            return False
+
+        assign.value = ast.ListComp(elt=value, generators=generators)
+        self.rewritten = True
+        return True
+
+    @staticmethod
+    def _is_safe_as_comprehension(
+        function: ast.FunctionDef | ast.AsyncFunctionDef, loop: ast.stmt, name: str
+    ) -> bool:
+        """Checks that moving loop into a comprehension keeps what it can see of
+        the list and that its targets are not used outside it."""
+        loop_names: list[str] = []
+        for child in ast.walk(loop):
+            if isinstance(child, _UNSAFE_IN_COMPREHENSION):
+                return False
+            if isinstance(child, ast.Name):
+                loop_names.append(child.id)
+
+        # The only use of the list should be the append. A function defined
+        # elsewhere could also be called in the loop and see the list
+        if loop_names.count(name) != 1 or any(
+            isinstance(scope, NESTED_SCOPES)
+            and any(
+                isinstance(child, ast.Name) and child.id == name
+                for child in ast.walk(scope)
+            )
+            for scope in ast.walk(function)
+            if scope is not function
+        ):
+            return False
+
+        target_names: set[str] = {
+            child.id
+            for generator in ast.walk(loop)
+            if isinstance(generator, ast.For)
+            for child in ast.walk(generator.target)
+            if isinstance(child, ast.Name)
+        }
+        function_names: list[str] = []
+        for child in ast.walk(function):
+            if isinstance(child, ast.Name):
+                function_names.append(child.id)
+            elif isinstance(child, (ast.Global, ast.Nonlocal)) and (
+                target_names & set(child.names)
+            ):
+                return False
+
+        return all(
+            function_names.count(target) == loop_names.count(target)
+            for target in target_names
+        )
@@ -0,0 +1,324 @@
+"""Inlining of small module level functions into their call sites."""
+
+import ast
+import copy
+
+from personal_python_ast_optimizer._optimize.base import AstTransformerBase
+from personal_python_ast_optimizer._optimize.dataflow import (
+    get_bound_names_in_scope,
+    get_module_binding_counts,
+)
+from personal_python_ast_optimizer._optimize.typing import AstVisitorProtocol
+from personal_python_ast_optimizer._optimize.visitors import (
+    NameReferenceAggregator,
+    get_literal_all,
+    has_dynamic_globals_access,
+    is_side_effect_free,
+)
+
+# Expressions with their own scope or that bind names
+_UNSAFE_IN_INLINED_EXPR = (
+    ast.Lambda,
+    ast.ListComp,
+    ast.SetComp,
+    ast.DictComp,
+    ast.GeneratorExp,
+    ast.NamedExpr,
+)
+
+
+class _InlinableFunction:
+    __slots__ = ("free_names", "node", "params", "return_value", "uses")
+
+    def __init__(
+        self, node: ast.FunctionDef, return_value: ast.expr, params: list[str]
+    ) -> None:
+        self.node: ast.FunctionDef = node
+        self.return_value: ast.expr = return_value
+        self.params: list[str] = params
+
+        names: list[str] = [
+            child.id for child in ast.walk(return_value) if isinstance(child, ast.Name)
+        ]
+        self.uses: dict[str, int] = {param: names.count(param) for param in params}
+        self.free_names: set[str] = set(names) - set(params)
+
+
+class _ArgumentSubstituter(AstTransformerBase, AstVisitorProtocol):
+    __slots__ = ("_args",)
+
+    def __init__(self, args: dict[str, ast.expr]) -> None:
+        self._args: dict[str, ast.expr] = args
+
+    def visit(self, node: ast.expr) -> ast.expr:
+        return self._visit(node)  # type: ignore[return-value]
+
+    def visit_Name(self, node: ast.Name) -> ast.expr:
+        if node.id in self._args:
+            return copy.deepcopy(self._args[node.id])
+
+        return node
+
+
+class FunctionInliner(AstTransformerBase, AstVisitorProtocol):
+    """Replaces calls to module level functions that only return a side effect
+    free expression with that expression. Definitions that are no longer
+    referenced and not exported are removed."""
+
+    __slots__ = (
+        "_excludes",
+        "_function_names",
+        "_functions",
+        "_hot_functions",
+        "_shadowed_names",
+        "inlined",
+    )
+
+    def __init__(self, excludes: set[str], hot_functions: set[str] | None) -> None:
+        self._excludes: set[str] = excludes
+        # Only calls in functions with these names are inlined, or all if None
+        self._hot_functions: set[str] | None = hot_functions
+        self._functions: dict[str, _InlinableFunction] = {}
+        # Names bound in each scope the visitor is currently in
+        self._shadowed_names: list[set[str]] = []
+        # Names of functions the visitor is currently in
+        self._function_names: list[str] = []
+        self.inlined: bool = False
+
+    def visit(self, node: ast.Module) -> bool:
+        """Inlines calls to simple functions in node.
+
+        :param node: Module to inline functions in
+        :returns: True if any call was inlined"""
+        self.inlined = False
+        if has_dynamic_globals_access(node):
+            return False
+
+        self._functions = self._get_inlinable_functions(node)
+        if not self._functions:
+            return False
+
+        self._generic_visit(node)
+
+        if self.inlined:
+            self._skip_unreferenced_functions(node)
+
+        return self.inlined
+
+    def _get_inlinable_functions(
+        self, node: ast.Module
+    ) -> dict[str, _InlinableFunction]:
+        binding_counts: dict[str, int] = get_module_binding_counts(node)
+
+        functions: dict[str, _InlinableFunction] = {}
+        for statement in node.body:
+            if (
+                not isinstance(statement, ast.FunctionDef)
+                or binding_counts[statement.name] != 1
+            ):
+                continue
+
+            function: _InlinableFunction | None = self._as_inlinable(statement)
+            if function is not None:
+                functions[statement.name] = function
+
+        return functions
+
+    def _as_inlinable(self, node: ast.FunctionDef) -> _InlinableFunction | None:
+        args: ast.arguments = node.args
+        if (
+            node.decorator_list
+            or node.type_params
+            or args.vararg
+            or args.kwarg
+            or args.kwonlyargs
+            or args.defaults
+        ):
+            return None
+
+        body: list[ast.stmt] = node.body
+        if (
+            len(body) == 2  # noqa: PLR2004
+            and isinstance(body[0], ast.Expr)
+            and isinstance(body[0].value, ast.Constant)
+        ):
+            body = body[1:]
+
+        if (
+            len(body) != 1
+            or not isinstance(body[0], ast.Return)
+            or body[0].value is None
+        ):
+            return None
+
+        return_value: ast.expr = body[0].value
+        if not is_side_effect_free(return_value, self._excludes) or any(
+            isinstance(child, _UNSAFE_IN_INLINED_EXPR)
+            for child in ast.walk(return_value)
+        ):
+            return None
+
+        function = _InlinableFunction(
+            node, return_value, [arg.arg for arg in (*args.posonlyargs, *args.args)]
+        )
+        # Recursive functions would never finish inlining
+        if node.name in function.free_names:
+            return None
+
+        return function
+
+    def visit_FunctionDef(self, node: ast.FunctionDef) -> ast.AST:
+        return self._handle_function(node)
+
+    def visit_AsyncFunctionDef(self, node: ast.AsyncFunctionDef) -> ast.AST:
+        return self._handle_function(node)
+
+    def _handle_function(self, node: ast.FunctionDef | ast.AsyncFunctionDef) -> ast.AST:
+        function: _InlinableFunction | None = self._functions.get(node.name)
+        if function is not None and function.node is node:
+            # Inlining into a function that will be inlined would change its
+            # free names after they were checked
+            return node
+
+        bound_names: set[str] = {
+            arg.arg for arg in ast.walk(node.args) if isinstance(arg, ast.arg)
+        }
+        for statement in node.body:
+            bound_names.update(get_bound_names_in_scope(statement))
+
+        self._function_names.append(node.name)
+        try:
+            return self._visit_in_scope(node, bound_names)
+        finally:
+            self._function_names.pop()
+
+    def visit_ClassDef(self, node: ast.ClassDef) -> ast.AST:
+        bound_names: set[str] = set()
+        for statement in node.body:
+            bound_names.update(get_bound_names_in_scope(statement))
+
+        return self._visit_in_scope(node, bound_names)
+
+    def visit_Lambda(self, node: ast.Lambda) -> ast.AST:
+        return self._visit_in_scope(
+            node, {arg.arg for arg in ast.walk(node.args) if isinstance(arg, ast.arg)}
+        )
+
+    def visit_ListComp(self, node: ast.ListComp) -> ast.AST:
+        return self._handle_comprehension(node)
+
+    def visit_SetComp(self, node: ast.SetComp) -> ast.AST:
+        return self._handle_comprehension(node)
+
+    def visit_DictComp(self, node: ast.DictComp) -> ast.AST:
+        return self._handle_comprehension(node)
+
+    def visit_GeneratorExp(self, node: ast.GeneratorExp) -> ast.AST:
+        return self._handle_comprehension(node)
+
+    def _handle_comprehension(
+        self, node: ast.ListComp | ast.SetComp | ast.DictComp | ast.GeneratorExp
+    ) -> ast.AST:
+        bound_names: set[str] = set()
+        for generator in node.generators:
+            bound_names.update(get_bound_names_in_scope(generator.target))
+
+        return self._visit_in_scope(node, bound_names)
+
+    def _visit_in_scope(self, node: ast.AST, bound_names: set[str]) -> ast.AST:
+        self._shadowed_names.append(bound_names)
+        try:
+            return self._generic_visit(node)
+        finally:
+            self._shadowed_names.pop()
+
+    def visit_Call(self, node: ast.Call) -> ast.AST:
+        parsed_node: ast.AST = self._generic_visit(node)
+        if not isinstance(parsed_node, ast.Call) or not isinstance(
+            parsed_node.func, ast.Name
+        ):
+            return parsed_node
+
+        function: _InlinableFunction | None = self._functions.get(parsed_node.func.id)
+        if (
+            function is None
+            or not self._is_in_hot_function()
+            or self._is_shadowed({parsed_node.func.id, *function.free_names})
+        ):
+            return parsed_node
+
+        args: dict[str, ast.expr] | None = self._bind_arguments(parsed_node, function)
+        if args is None:
+            return parsed_node
+
+        self.inlined = True
+        return _ArgumentSubstituter(args).visit(copy.deepcopy(function.return_value))
+
+    def _is_in_hot_function(self) -> bool:
+        return self._hot_functions is None or (
+            bool(self._function_names)
+            and self._function_names[-1] in self._hot_functions
+        )
+
+    def _is_shadowed(self, names: set[str]) -> bool:
+        return any(names & bound_names for bound_names in self._shadowed_names)
+
+    def _bind_arguments(
+        self, node: ast.Call, function: _InlinableFunction
+    ) -> dict[str, ast.expr] | None:
+        """Maps parameters to the arguments node passes. None if the call can't
+        be inlined, like when an argument would be evaluated a different number
+        of times or the call would raise a TypeError."""
+        if len(node.args) > len(function.params) or any(
+            isinstance(arg, ast.Starred) for arg in node.args
+        ):
+            return None
+
+        args: dict[str, ast.expr] = dict(zip(function.params, node.args, strict=False))
+        positional_only: int = len(function.node.args.posonlyargs)
+        for keyword in node.keywords:
+            if (
+                keyword.arg is None
+                or keyword.arg in args
+                or keyword.arg not in function.params[positional_only:]
+            ):
+                return None
+            args[keyword.arg] = keyword.value
+
+        if len(args) != len(function.params):
+            return None
+
+        for param, arg in args.items():
+            if isinstance(arg, (ast.Constant, ast.Name)):
+                continue
+            if function.uses[param] != 1 or not is_side_effect_free(
+                arg, self._excludes
+            ):
+                return None
+
+        return args
+
+    def _skip_unreferenced_functions(self, node: ast.Module) -> None:
+        exports: set[str] | None = get_literal_all(node)
+        removable_names: set[str] = {
+            name
+            for name in self._functions
+            if not (name.startswith("__") and name.endswith("__"))
+            and (name.startswith("_") or (exports is not None and name not in exports))
+        }
+        if not removable_names:
+            return
+
+        referenced_names: set[str] = set()
+        for statement in node.body:
+            referenced_names.update(NameReferenceAggregator().visit(statement))
+
+        node.body = [
+            statement
+            for statement in node.body
+            if not (
+                isinstance(statement, ast.FunctionDef)
+                and statement.name in removable_names
+                and statement.name not in referenced_names
+            )
+        ]
@@ -0,0 +1,707 @@
+"""Optimizations that need to see every module in a package."""
+
+import ast
+from collections.abc import Iterable
+from pathlib import PurePath
+
+from personal_python_ast_optimizer._log import get_logger
+from personal_python_ast_optimizer._optimize.base import AstVisitorBase
+from personal_python_ast_optimizer._optimize.typing import AstVisitorProtocol
+from personal_python_ast_optimizer._optimize.utils import (
+    get_bound_names,
+    get_full_attribute_id,
+    get_name_or_full_attribute_id,
+)
+from personal_python_ast_optimizer._optimize.visitors import (
+    SAFE_BUILTIN_BASES,
+    SAFE_METHOD_DECORATORS,
+    get_side_effect_free_bound_names,
+    has_dynamic_globals_access,
+    is_side_effect_free_definition,
+)
+from personal_python_ast_optimizer.typing import FoldableConstant
+
+_logger = get_logger()
+
+
+def get_module_name(path: str) -> tuple[str, bool]:
+    """Returns the dotted name of a module from its path.
+
+    :param path: Path of a python file relative to the root of the package
+    :returns: Module name and if the module is a package"""
+    parts: tuple[str, ...] = PurePath(path).with_suffix("").parts
+    if parts[-1] == "__init__":
+        return ".".join(parts[:-1]), True
+
+    return ".".join(parts), False
+
+
+def resolve_import_from_module(
+    node: ast.ImportFrom, module_name: str, is_package: bool
+) -> str:
+    """Returns the absolute name of the module an ImportFrom imports from.
+
+    :param node: ImportFrom to resolve
+    :param module_name: Name of the module node is in
+    :param is_package: If the module node is in is a package
+    :returns: Absolute module name"""
+    if not node.level:
+        return node.module or ""
+
+    parts: list[str] = module_name.split(".")
+    if not is_package:
+        parts.pop()
+    if node.level > 1:
+        del parts[len(parts) - node.level + 1 :]
+    if node.module:
+        parts.append(node.module)
+
+    return ".".join(parts)
+
+
+def get_module_constant_folds(
+    modules: dict[str, ast.Module],
+) -> dict[str, dict[str, FoldableConstant]]:
+    """Finds module level names bound once to a constant and how each other
+    module can access them. Names are never folded in the module defining them.
+
+    :param modules: Path relative to the root of the package to its module
+    :returns: Path relative to the root of the package to names or attributes
+    that module can fold"""
+    unsafe_names: set[str] | None = _get_names_set_as_attributes(modules)
+    if unsafe_names is None:
+        return {}
+
+    module_names: dict[str, tuple[str, bool]] = {
+        path: get_module_name(path) for path in modules
+    }
+    bound_once: dict[str, set[str]] = {
+        path: _get_names_bound_once(module) for path, module in modules.items()
+    }
+
+    constants: dict[str, dict[str, FoldableConstant]] = {}
+    for path, module in modules.items():
+        module_constants: dict[str, FoldableConstant] = {}
+        if not has_dynamic_globals_access(module):
+            for statement in module.body:
+                match statement:
+                    case (
+                        ast.Assign(
+                            targets=[ast.Name(id=name)], value=ast.Constant(value=value)
+                        )
+                        | ast.AnnAssign(
+                            target=ast.Name(id=name), value=ast.Constant(value=value)
+                        )
+                    ) if name in bound_once[path] and name not in unsafe_names:
+                        module_constants[name] = value
+        constants[module_names[path][0]] = module_constants
+
+    # Constants imported from another module can be used from this one as well
+    changed: bool = True
+    while changed:
+        changed = False
+        for path, module in modules.items():
+            module_name, is_package = module_names[path]
+            for from_module, alias in _get_top_level_import_from_aliases(
+                module, module_name, is_package
+            ):
+                bound_name: str = alias.asname or alias.name
+                if (
+                    bound_name in bound_once[path]
+                    and bound_name not in constants[module_name]
+                    and alias.name in constants.get(from_module, {})
+                ):
+                    constants[module_name][bound_name] = constants[from_module][
+                        alias.name
+                    ]
+                    changed = True
+
+    return {
+        path: _get_importer_folds(
+            module, *module_names[path], bound_once[path], constants
+        )
+        for path, module in modules.items()
+    }
+
+
+def _get_names_set_as_attributes(modules: dict[str, ast.Module]) -> set[str] | None:
+    """Returns attribute names that are assigned or deleted in any module
+    or None if setattr or delattr is called with a dynamic name."""
+    names: set[str] = set()
+
+    for module in modules.values():
+        for node in ast.walk(module):
+            match node:
+                case ast.Attribute(attr=attr, ctx=ast.Store() | ast.Del()):
+                    names.add(attr)
+                case ast.Call(func=ast.Name(id="setattr" | "delattr"), args=args):
+                    if (
+                        len(args) < 2  # noqa: PLR2004
+                        or not isinstance(args[1], ast.Constant)
+                        or not isinstance(args[1].value, str)
+                    ):
+                        return None
+                    names.add(args[1].value)
+
+    return names
+
+
+def _get_names_bound_once(module: ast.Module) -> set[str]:
+    seen: set[str] = set()
+    bound_more_than_once: set[str] = set()
+
+    for statement in module.body:
+        for name in get_bound_names(statement):
+            if name in seen:
+                bound_more_than_once.add(name)
+            seen.add(name)
+
+    return seen - bound_more_than_once
+
+
+def _get_top_level_import_from_aliases(
+    module: ast.Module, module_name: str, is_package: bool
+) -> Iterable[tuple[str, ast.alias]]:
+    for statement in module.body:
+        if isinstance(statement, ast.ImportFrom):
+            from_module: str = resolve_import_from_module(
+                statement, module_name, is_package
+            )
+            for alias in statement.names:
+                yield from_module, alias
+
+
+def _get_importer_folds(
+    module: ast.Module,
+    module_name: str,
+    is_package: bool,
+    bound_once: set[str],
+    constants: dict[str, dict[str, FoldableConstant]],
+) -> dict[str, FoldableConstant]:
+    folds: dict[str, FoldableConstant] = {}
+
+    for statement in module.body:
+        if isinstance(statement, ast.Import):
+            for alias in statement.names:
+                _add_import_folds(folds, alias, bound_once, constants)
+
+    for from_module, alias in _get_top_level_import_from_aliases(
+        module, module_name, is_package
+    ):
+        bound_name: str = alias.asname or alias.name
+        if bound_name not in bound_once:
+            continue
+
+        submodule: str = f"{from_module}.{alias.name}"
+        if submodule in constants:
+            _add_attribute_folds(folds, bound_name, submodule, constants)
+        elif alias.name in constants.get(from_module, {}):
+            folds[bound_name] = constants[from_module][alias.name]
+
+    return folds
+
+
+def _add_import_folds(
+    folds: dict[str, FoldableConstant],
+    alias: ast.alias,
+    bound_once: set[str],
+    constants: dict[str, dict[str, FoldableConstant]],
+) -> None:
+    if alias.asname is not None:
+        if alias.asname in bound_once:
+            _add_attribute_folds(folds, alias.asname, alias.name, constants)
+        return
+
+    if alias.name.partition(".")[0] not in bound_once:
+        return
+
+    # import a.b binds a, but a.b is accessible through it as well
+    parts: list[str] = alias.name.split(".")
+    for i in range(1, len(parts) + 1):
+        imported_module: str = ".".join(parts[:i])
+        _add_attribute_folds(folds, imported_module, imported_module, constants)
+
+
+def _add_attribute_folds(
+    folds: dict[str, FoldableConstant],
+    bound_name: str,
+    module_name: str,
+    constants: dict[str, dict[str, FoldableConstant]],
+) -> None:
+    for name, value in constants.get(module_name, {}).items():
+        folds[f"{bound_name}.{name}"] = value
+
+
+class _ImportTarget:
+    """What a name bound by an import refers to."""
+
+    __slots__ = ("loads", "module", "name")
+
+    def __init__(self, module: str, name: str | None, loads: str) -> None:
+        self.module: str = module
+        # None if the name is bound to the module itself
+        self.name: str | None = name
+        # Module that is imported when the import runs
+        self.loads: str = loads
+
+
+class _ReferenceAggregator(AstVisitorBase, AstVisitorProtocol):
+    """Visitor that aggregates everything in a node that could refer to
+    a definition in some module of the package."""
+
+    __slots__ = ("attrs", "chains", "imports", "names")
+
+    def __init__(self) -> None:
+        self.names: set[str] = set()
+        self.chains: list[list[str]] = []
+        self.attrs: set[str] = set()
+        self.imports: list[ast.Import | ast.ImportFrom] = []
+
+    def visit(self, node: ast.AST) -> None:
+        self._visit(node)
+
+    def visit_Name(self, node: ast.Name) -> None:
+        self.names.add(node.id)
+
+    def visit_Attribute(self, node: ast.Attribute) -> None:
+        full_id: str | None = get_full_attribute_id(node)
+        if full_id is None:
+            self.attrs.add(node.attr)
+            self._generic_visit(node)
+        else:
+            chain: list[str] = full_id.split(".")
+            self.chains.append(chain)
+            self.attrs.update(chain[1:])
+
+    def visit_Constant(self, node: ast.Constant) -> None:
+        # Could be used with getattr
+        if isinstance(node.value, str) and node.value.isidentifier():
+            self.names.add(node.value)
+            self.attrs.add(node.value)
+
+    def visit_Import(self, node: ast.Import) -> None:
+        self.imports.append(node)
+
+    def visit_ImportFrom(self, node: ast.ImportFrom) -> None:
+        self.imports.append(node)
+
+
+class _ModuleState:
+    __slots__ = (
+        "aliases",
+        "candidates",
+        "class_names",
+        "escaped",
+        "is_package",
+        "live",
+        "loaded",
+        "module",
+        "name",
+        "top_level",
+    )
+
+    def __init__(self, name: str, is_package: bool, module: ast.Module) -> None:
+        self.name: str = name
+        self.is_package: bool = is_package
+        self.module: ast.Module = module
+        # Name to statements that can be removed if the name is never used
+        self.candidates: dict[str, list[ast.stmt]] = {}
+        self.aliases: dict[str, list[_ImportTarget]] = {}
+        self.class_names: set[str] = set()
+        self.top_level: set[ast.stmt] = set(module.body)
+        self.live: set[ast.AST] = set()
+        self.loaded: bool = False
+        # Every name could be used from outside the package
+        self.escaped: bool = False
+
+
+class UnreachableDefinitionSkipper:
+    """Removes module level functions, classes and assignments along with
+    methods that can't be reached from any entry point of a package.
+
+    Modules that are never imported are left as is. If methods are skipped, a
+    method is reachable if its name is used as an attribute or string anywhere
+    in reachable code. Methods of classes with bases from outside the package
+    are always kept."""
+
+    __slots__ = (
+        "_attr_names",
+        "_entry_points",
+        "_excludes",
+        "_imports_to_preserve",
+        "_marked_names",
+        "_modules",
+        "_pending_methods",
+        "_skip_unreachable_methods",
+        "_skip_unused_imports",
+        "_worklist",
+    )
+
+    def __init__(
+        self,
+        entry_points: Iterable[str],
+        excludes: set[str],
+        skip_unused_imports: bool,
+        imports_to_preserve: Iterable[str],
+        skip_unreachable_methods: bool,
+    ) -> None:
+        self._entry_points: list[str] = list(entry_points)
+        self._excludes: set[str] = excludes
+        # Unused imports will be removed, so only imports used by
+        # reachable code will load their module
+        self._skip_unused_imports: bool = skip_unused_imports
+        self._imports_to_preserve: set[str] = set(imports_to_preserve)
+        self._skip_unreachable_methods: bool = skip_unreachable_methods
+
+        self._modules: dict[str, _ModuleState] = {}
+        self._attr_names: set[str] = set()
+        self._marked_names: set[tuple[str, str]] = set()
+        self._pending_methods: dict[
+            str,
+            list[
+                tuple[
+                    _ModuleState, ast.ClassDef, ast.FunctionDef | ast.AsyncFunctionDef
+                ]
+            ],
+        ] = {}
+        self._worklist: list[tuple[_ModuleState, ast.AST]] = []
+
+    def visit(self, modules: dict[str, ast.Module]) -> list[str]:
+        """Removes unreachable definitions from modules.
+
+        :param modules: Path relative to the root of the package to its module
+        :returns: Paths of modules that were changed"""
+        paths: dict[str, str] = {}
+        for path, module in modules.items():
+            name, is_package = get_module_name(path)
+            paths[name] = path
+            self._modules[name] = _ModuleState(name, is_package, module)
+
+        for state in self._modules.values():
+            self._prepare_module_state(state)
+
+        for entry_point in self._entry_points:
+            if entry_point not in self._modules:
+                _logger.warning("Entry point %s was not found", entry_point)
+            self._escape(entry_point)
+
+        while self._worklist:
+            state, node = self._worklist.pop()
+            self._scan(state, node)
+
+        return [
+            paths[state.name]
+            for state in self._modules.values()
+            if self._remove_unreachable(state)
+        ]
+
+    def _prepare_module_state(self, state: _ModuleState) -> None:
+        unsafe_names: set[str] = {
+            name
+            for child in ast.walk(state.module)
+            if isinstance(child, ast.Global)
+            for name in child.names
+        }
+        candidates: dict[ast.stmt, set[str]] = {}
+        for statement in state.module.body:
+            if isinstance(statement, ast.ClassDef):
+                state.class_names.add(statement.name)
+
+            if isinstance(statement, (ast.Import, ast.ImportFrom)):
+                self._add_aliases(state, statement)
+                continue
+
+            bound_names: set[str] | None = get_side_effect_free_bound_names(
+                statement, self._excludes
+            )
+            if bound_names is None:
+                unsafe_names.update(get_bound_names(statement))
+            else:
+                candidates[statement] = bound_names
+
+        for statement, bound_names in candidates.items():
+            if bound_names & unsafe_names or any(
+                n.startswith("__") and n.endswith("__") for n in bound_names
+            ):
+                continue
+
+            for bound_name in bound_names:
+                state.candidates.setdefault(bound_name, []).append(statement)
+
+    def _add_aliases(
+        self, state: _ModuleState, node: ast.Import | ast.ImportFrom
+    ) -> None:
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                if alias.asname is None:
+                    bound_name: str = alias.name.partition(".")[0]
+                    target = _ImportTarget(bound_name, None, alias.name)
+                else:
+                    bound_name = alias.asname
+                    target = _ImportTarget(alias.name, None, alias.name)
+                state.aliases.setdefault(bound_name, []).append(target)
+            return
+
+        from_module: str = resolve_import_from_module(
+            node, state.name, state.is_package
+        )
+        for alias in node.names:
+            if alias.name == "*":
+                continue
+
+            submodule: str = f"{from_module}.{alias.name}"
+            target = (
+                _ImportTarget(submodule, None, submodule)
+                if submodule in self._modules
+                else _ImportTarget(from_module, alias.name, from_module)
+            )
+            state.aliases.setdefault(alias.asname or alias.name, []).append(target)
+
+    def _mark_live(self, state: _ModuleState, node: ast.AST) -> None:
+        if node not in state.live:
+            state.live.add(node)
+            self._worklist.append((state, node))
+
+    def _load(self, module_name: str) -> None:
+        """Runs everything a module does when imported."""
+        parent: str = module_name.rpartition(".")[0]
+        if parent:
+            self._load(parent)
+
+        state: _ModuleState | None = self._modules.get(module_name)
+        if state is None or state.loaded:
+            return
+
+        state.loaded = True
+        if has_dynamic_globals_access(state.module):
+            self._escape(module_name)
+
+        candidates: set[ast.stmt] = {
+            s for statements in state.candidates.values() for s in statements
+        }
+        for statement in state.module.body:
+            if statement not in candidates:
+                self._mark_live(state, statement)
+
+    def _escape(self, module_name: str) -> None:
+        """Marks everything in a module as used since it may be
+        accessed from outside the package."""
+        state: _ModuleState | None = self._modules.get(module_name)
+        if state is None or state.escaped:
+            return
+
+        state.escaped = True
+        self._load(module_name)
+
+        for name in state.candidates:
+            self._mark_name(module_name, name)
+
+        # Modules it imports are not accessible from outside by themselves
+        for name, targets in state.aliases.items():
+            if any(target.name is not None for target in targets):
+                self._mark_name(module_name, name)
+            else:
+                for target in targets:
+                    self._load(target.loads)
+
+        for name, methods in self._pending_methods.items():
+            self._pending_methods[name] = [m for m in methods if m[0] is not state]
+            for method_state, _, method in methods:
+                if method_state is state:
+                    self._mark_live(state, method)
+
+    def _mark_name(self, module_name: str, name: str) -> None:
+        state: _ModuleState | None = self._modules.get(module_name)
+        if state is None or (module_name, name) in self._marked_names:
+            return
+
+        self._marked_names.add((module_name, name))
+        self._load(module_name)
+
+        for statement in state.candidates.get(name, ()):
+            self._mark_live(state, statement)
+
+        for target in state.aliases.get(name, ()):
+            self._load(target.loads)
+            if target.name is None:
+                self._escape(target.module)
+            else:
+                self._mark_name(target.module, target.name)
+
+    def _mark_chain(self, state: _ModuleState, chain: list[str]) -> None:
+        root: str = chain[0]
+        if root in state.candidates:
+            self._mark_name(state.name, root)
+
+        for target in state.aliases.get(root, ()):
+            self._load(target.loads)
+            if target.name is not None:
+                self._mark_name(target.module, target.name)
+                continue
+
+            module_name: str = target.module
+            for part in chain[1:]:
+                submodule: str = f"{module_name}.{part}"
+                if submodule not in self._modules:
+                    self._mark_name(module_name, part)
+                    break
+                module_name = submodule
+            else:
+                self._escape(module_name)
+
+    def _mark_attr_names(self, attrs: set[str]) -> None:
+        for attr in attrs - self._attr_names:
+            self._attr_names.add(attr)
+            for state, _, method in self._pending_methods.pop(attr, ()):
+                self._mark_live(state, method)
+
+    def _scan(self, state: _ModuleState, node: ast.AST) -> None:
+        if isinstance(node, (ast.Assign, ast.AugAssign)) and get_bound_names(node) == {
+            "__all__"
+        }:
+            # Only used by star imports which escape the whole module
+            return
+
+        if isinstance(node, ast.ClassDef) and node in state.top_level:
+            self._scan_class(state, node)
+            return
+
+        references = _ReferenceAggregator()
+        references.visit(node)
+
+        for import_node in references.imports:
+            self._scan_import(state, import_node, node is import_node)
+
+        for name in references.names:
+            self._mark_name(state.name, name)
+
+        for chain in references.chains:
+            self._mark_chain(state, chain)
+
+        self._mark_attr_names(references.attrs)
+
+    def _scan_import(
+        self, state: _ModuleState, node: ast.Import | ast.ImportFrom, top_level: bool
+    ) -> None:
+        if not top_level:
+            self._add_aliases(state, node)
+
+        if isinstance(node, ast.ImportFrom) and any(a.name == "*" for a in node.names):
+            self._escape(resolve_import_from_module(node, state.name, state.is_package))
+
+        if (
+            top_level
+            and self._skip_unused_imports
+            and not any(
+                (a.asname or a.name) in self._imports_to_preserve for a in node.names
+            )
+        ):
+            # Loaded once a name it binds is used
+            return
+
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                self._load(alias.name)
+        else:
+            from_module: str = resolve_import_from_module(
+                node, state.name, state.is_package
+            )
+            self._load(from_module)
+            for alias in node.names:
+                self._load(f"{from_module}.{alias.name}")
+
+    def _scan_class(self, state: _ModuleState, node: ast.ClassDef) -> None:
+        keep_all_methods: bool = (
+            not self._skip_unreachable_methods
+            or state.escaped
+            or not all(self._is_package_base(state, base) for base in node.bases)
+        )
+
+        for child in (*node.decorator_list, *node.bases, *node.keywords):
+            self._scan(state, child)
+
+        for statement in node.body:
+            if (
+                not keep_all_methods
+                and isinstance(statement, (ast.FunctionDef, ast.AsyncFunctionDef))
+                and not (
+                    statement.name.startswith("__") and statement.name.endswith("__")
+                )
+                and statement.name not in self._attr_names
+                and is_side_effect_free_definition(
+                    statement, self._excludes, SAFE_METHOD_DECORATORS
+                )
+            ):
+                self._pending_methods.setdefault(statement.name, []).append(
+                    (state, node, statement)
+                )
+            else:
+                self._mark_live(state, statement)
+
+    def _is_package_base(self, state: _ModuleState, base: ast.expr) -> bool:
+        """Checks if base is a class defined in the package or a safe builtin.
+        Other classes could call methods by name from outside the package."""
+        name: str | None = get_name_or_full_attribute_id(base)
+        if name is None:
+            return False
+
+        if (
+            name in SAFE_BUILTIN_BASES
+            and name not in state.aliases
+            and name not in state.class_names
+        ):
+            return True
+
+        return self._is_package_class(state.name, name, set())
+
+    def _is_package_class(
+        self, module_name: str, name: str, seen: set[tuple[str, str]]
+    ) -> bool:
+        state: _ModuleState | None = self._modules.get(module_name)
+        if state is None or (module_name, name) in seen:
+            return False
+
+        seen.add((module_name, name))
+        root, _, rest = name.partition(".")
+        if not rest:
+            return root in state.class_names
+
+        submodule: str = f"{module_name}.{root}"
+        if submodule in self._modules:
+            return self._is_package_class(submodule, rest, seen)
+
+        targets: list[_ImportTarget] = state.aliases.get(root, [])
+        return bool(targets) and all(
+            self._is_package_class(
+                target.module,
+                rest if target.name is None else f"{target.name}.{rest}",
+                seen,
+            )
+            for target in targets
+        )
+
+    def _remove_unreachable(self, state: _ModuleState) -> bool:
+        if not state.loaded:
+            return False
+
+        changed: bool = False
+
+        candidates: set[ast.stmt] = {
+            s for statements in state.candidates.values() for s in statements
+        }
+        new_body: list[ast.stmt] = [
+            s for s in state.module.body if s in state.live or s not in candidates
+        ]
+        if len(new_body) != len(state.module.body):
+            state.module.body = new_body
+            changed = True
+
+        for methods in self._pending_methods.values():
+            for method_state, class_node, method in methods:
+                if method_state is state and class_node in state.live:
+                    class_node.body.remove(method)
+                    if not class_node.body:
+                        class_node.body.append(ast.Pass())
+                    changed = True
+
+        return changed
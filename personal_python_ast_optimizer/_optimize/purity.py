@@ -0,0 +1,149 @@
+"""Inference of module level functions that have no side effects."""
+
+import ast
+
+from personal_python_ast_optimizer._optimize.dataflow import (
+    get_bound_names_in_scope,
+    get_module_binding_counts,
+)
+from personal_python_ast_optimizer._optimize.utils import (
+    NESTED_SCOPES_WITH_COMPREHENSIONS,
+    get_bound_names,
+)
+from personal_python_ast_optimizer._optimize.visitors import (
+    has_dynamic_globals_access,
+    is_side_effect_free,
+)
+
+
+def _get_nested_scope_names(node: ast.Module) -> set[str]:
+    """Returns names bound in any scope nested in node, like parameters."""
+    names: set[str] = set()
+    for child in ast.walk(node):
+        if not isinstance(child, NESTED_SCOPES_WITH_COMPREHENSIONS):
+            continue
+        for field, value in ast.iter_fields(child):
+            if field in ("name", "decorator_list", "bases", "keywords", "returns"):
+                continue
+            for inner in value if isinstance(value, list) else [value]:
+                if isinstance(inner, ast.AST):
+                    names.update(get_bound_names(inner))
+
+    return names
+
+
+def _get_statement_values(node: ast.stmt) -> list[ast.expr] | None:  # noqa: PLR0911
+    """Returns expressions node evaluates or None if node could have side
+    effects other than binding locals or raising."""
+    match node:
+        case ast.Return(value=value):
+            return [] if value is None else [value]
+        case ast.Assign(targets=targets, value=value) if all(
+            isinstance(target, ast.Name) for target in targets
+        ):
+            return [value]
+        case ast.AugAssign(target=ast.Name(), value=value):
+            return [value]
+        case ast.AnnAssign(target=ast.Name(), value=value):
+            return [] if value is None else [value]
+        case ast.If(test=test):
+            return [test]
+        case ast.Raise(exc=exc, cause=cause):
+            return [value for value in (exc, cause) if value is not None]
+        case ast.Assert(test=test, msg=msg):
+            return [test] if msg is None else [test, msg]
+        case ast.Expr(value=ast.Constant() as value):
+            return [value]
+        case ast.Pass():
+            return []
+        case _:
+            return None
+
+
+class _PurityChecker:
+    __slots__ = ("_stable_globals",)
+
+    def __init__(self, stable_globals: set[str]) -> None:
+        # Globals that are never rebound once the module is loaded
+        self._stable_globals: set[str] = stable_globals
+
+    def is_pure(self, node: ast.FunctionDef, excludes: set[str]) -> bool:
+        """Checks if calling node can only raise or return a value that
+        depends on its arguments and globals that are never rebound."""
+        if node.decorator_list:
+            return False
+
+        local_names: set[str] = {
+            arg.arg for arg in ast.walk(node.args) if isinstance(arg, ast.arg)
+        }
+        for statement in node.body:
+            local_names.update(get_bound_names_in_scope(statement))
+
+        return self._is_pure_body(node.body, local_names, excludes)
+
+    def _is_pure_body(
+        self, body: list[ast.stmt], local_names: set[str], excludes: set[str]
+    ) -> bool:
+        for statement in body:
+            values: list[ast.expr] | None = _get_statement_values(statement)
+            if values is None:
+                return False
+
+            for value in values:
+                if not is_side_effect_free(value, excludes) or any(
+                    isinstance(child, ast.Name)
+                    and child.id not in local_names
+                    and child.id not in self._stable_globals
+                    for child in ast.walk(value)
+                ):
+                    return False
+
+            if isinstance(statement, ast.If) and not (
+                self._is_pure_body(statement.body, local_names, excludes)
+                and self._is_pure_body(statement.orelse, local_names, excludes)
+            ):
+                return False
+
+        return True
+
+
+def get_pure_functions(node: ast.Module, excludes: set[str]) -> set[str]:
+    """Returns names of module level functions whose bodies only bind locals,
+    return, raise and call functions in excludes or other pure functions.
+    Functions that call each other are pure unless one of them isn't.
+
+    Callers look functions up by name, so functions whose name is also bound
+    in a nested scope, like a parameter, are never inferred.
+
+    :param node: Module to check
+    :param excludes: Functions that have no side effects
+    :returns: Names of functions that have no side effects"""
+    if has_dynamic_globals_access(node):
+        return set()
+
+    binding_counts: dict[str, int] = get_module_binding_counts(node)
+    shadowed_names: set[str] = _get_nested_scope_names(node)
+    stable_globals: set[str] = {
+        child.id
+        for child in ast.walk(node)
+        if isinstance(child, ast.Name) and binding_counts.get(child.id, 0) <= 1
+    }
+    functions: dict[str, ast.FunctionDef] = {
+        statement.name: statement
+        for statement in node.body
+        if isinstance(statement, ast.FunctionDef)
+        and binding_counts[statement.name] == 1
+        and statement.name not in shadowed_names
+    }
+
+    checker = _PurityChecker(stable_globals)
+    pure_functions: set[str] = set(functions)
+    changed: bool = True
+    while changed:
+        changed = False
+        for name in list(pure_functions):
+            if not checker.is_pure(functions[name], excludes | pure_functions):
+                pure_functions.discard(name)
+                changed = True
+
+    return pure_functions
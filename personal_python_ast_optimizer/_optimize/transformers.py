@@ -1,27 +1,58 @@
 """Transformer classes to optimize Python ASTs."""
 
 import ast
+import logging
 import sys
 from collections.abc import Callable, Iterable
 from enum import Enum
 from typing import assert_never, override
 
+from personal_python_ast_optimizer._optimize.algebra import (
+    reorder_test_operands,
+    simplify_not,
+    simplify_numeric_bin_op,
+    simplify_test,
+)
 from personal_python_ast_optimizer._optimize.base import (
     AstTransformerBase,
 )
+from personal_python_ast_optimizer._optimize.control_flow import (
+    UnreachableCodeSkipper,
+)
+from personal_python_ast_optimizer._optimize.dataflow import (
+    DeadStoreSkipper,
+    FunctionConstantPropagator,
+    get_module_binding_counts,
+)
+from personal_python_ast_optimizer._optimize.hoisting import (
+    LoopInvariantLookupHoister,
+    get_stable_global_names,
+)
 from personal_python_ast_optimizer._optimize.typing import AstVisitorProtocol
 from personal_python_ast_optimizer._optimize.utils import (
     NodeContext,
     TokensTracker,
+    as_constant,
+    build_joined_str,
+    get_bound_names,
     get_full_attribute_id,
+    get_import_alias_bound_name,
     get_name_or_full_attribute_id,
     is_return_literal_none,
 )
 from personal_python_ast_optimizer._optimize.visitors import (
     CallAggregator,
     FunctionFoldableLocalsAggregator,
+    NameReferenceAggregator,
+    get_literal_all,
+    get_side_effect_free_bound_names,
+    has_dynamic_globals_access,
+    is_side_effect_free,
+)
+from personal_python_ast_optimizer.config import (
+    TypeHintsToSkip,
+    UnusedDefinitionsToSkip,
 )
-from personal_python_ast_optimizer.config import TypeHintsToSkip
 
 
 class OptimizationPass(AstTransformerBase, AstVisitorProtocol):
@@ -29,10 +60,20 @@ class OptimizationPass(AstTransformerBase, AstVisitorProtocol):
     like constant folding or dead code elimination."""
 
     __slots__ = (
+        "_loop_invariant_lookup_hoister",
+        "_unreachable_code_skipper",
         "additional_pass_needed",
+        "assume_numeric_operands",
         "fold_constants",
+        "fold_fstrings",
         "fold_simple_function_locals",
         "functions_safe_to_exclude_in_test_expr",
+        "hoist_loop_invariant_lookups",
+        "hot_functions",
+        "propagate_function_constants",
+        "reorder_bool_op_operands",
+        "simplify_algebra",
+        "skip_dead_stores",
     )
 
     def __init__(
@@ -40,17 +81,61 @@ class OptimizationPass(AstTransformerBase, AstVisitorProtocol):
         fold_constants: bool,
         fold_simple_function_locals: bool,
         functions_safe_to_exclude_in_test_expr: set[str],
+        *,
+        propagate_function_constants: bool,
+        skip_dead_stores: bool,
+        skip_unreachable_code: bool,
+        no_return_functions: Iterable[str],
+        hoist_loop_invariant_lookups: bool,
+        fold_fstrings: bool,
+        simplify_algebra: bool,
+        assume_numeric_operands: bool,
+        reorder_bool_op_operands: bool,
+        hot_functions: set[str] | None,
     ) -> None:
         self.fold_constants: bool = fold_constants
         self.fold_simple_function_locals: bool = fold_simple_function_locals
         self.functions_safe_to_exclude_in_test_expr: set[str] = (
             functions_safe_to_exclude_in_test_expr
         )
+        self.propagate_function_constants: bool = propagate_function_constants
+        self.skip_dead_stores: bool = skip_dead_stores
+        self._unreachable_code_skipper: UnreachableCodeSkipper | None = (
+            UnreachableCodeSkipper(no_return_functions)
+            if skip_unreachable_code
+            else None
+        )
+        self.hoist_loop_invariant_lookups: bool = hoist_loop_invariant_lookups
+        self._loop_invariant_lookup_hoister: LoopInvariantLookupHoister | None = None
+        # Functions loop invariant lookups are hoisted in, or all if None
+        self.hot_functions: set[str] | None = hot_functions
+        self.fold_fstrings: bool = fold_fstrings
+        self.simplify_algebra: bool = simplify_algebra
+        self.assume_numeric_operands: bool = assume_numeric_operands
+        self.reorder_bool_op_operands: bool = reorder_bool_op_operands
         self.additional_pass_needed: bool = False
 
     def visit(self, node: ast.Module) -> None:
         self.additional_pass_needed = False
+        self._visit_module(node)
+
+    def _visit_module(self, node: ast.Module) -> None:
+        if self.hoist_loop_invariant_lookups:
+            self._loop_invariant_lookup_hoister = LoopInvariantLookupHoister(
+                *get_stable_global_names(node)
+            )
+
         self._generic_visit(node)
+        self._skip_unreachable_code(node)
+
+    def _skip_unreachable_code(
+        self, node: ast.Module | ast.FunctionDef | ast.AsyncFunctionDef
+    ) -> None:
+        if (
+            self._unreachable_code_skipper is not None
+            and self._unreachable_code_skipper.visit(node)
+        ):
+            self.additional_pass_needed = True
 
     def visit_FunctionDef(self, node: ast.FunctionDef) -> ast.AST | None:
         return self._handle_function(node)
@@ -63,6 +148,16 @@ class OptimizationPass(AstTransformerBase, AstVisitorProtocol):
     ) -> ast.AST | None:
         parsed_node: ast.AST | None = self._generic_visit(node)
 
+        if isinstance(parsed_node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            self._skip_unreachable_code(parsed_node)
+
+        if (
+            self.propagate_function_constants
+            and isinstance(parsed_node, (ast.FunctionDef, ast.AsyncFunctionDef))
+            and FunctionConstantPropagator().visit(parsed_node)
+        ):
+            self.additional_pass_needed = True
+
         if self.fold_simple_function_locals and isinstance(
             parsed_node, (ast.FunctionDef, ast.AsyncFunctionDef)
         ):
@@ -75,6 +170,22 @@ class OptimizationPass(AstTransformerBase, AstVisitorProtocol):
                 _FunctionLocalsFolder(to_fold).visit(parsed_node)
                 self.additional_pass_needed = True
 
+        if (
+            self.skip_dead_stores
+            and isinstance(parsed_node, (ast.FunctionDef, ast.AsyncFunctionDef))
+            and DeadStoreSkipper(self.functions_safe_to_exclude_in_test_expr).visit(
+                parsed_node
+            )
+        ):
+            self.additional_pass_needed = True
+
+        if (
+            self._loop_invariant_lookup_hoister is not None
+            and isinstance(parsed_node, (ast.FunctionDef, ast.AsyncFunctionDef))
+            and (self.hot_functions is None or parsed_node.name in self.hot_functions)
+        ):
+            self._loop_invariant_lookup_hoister.visit(parsed_node)
+
         return parsed_node
 
     def visit_Try(self, node: ast.Try) -> ast.AST | list[ast.stmt] | None:
@@ -99,6 +210,7 @@ class OptimizationPass(AstTransformerBase, AstVisitorProtocol):
         parsed_node: ast.AST = self._generic_visit(node)
 
         if isinstance(parsed_node, ast.If):
+            parsed_node.test = self._simplify_test(parsed_node.test)
             if isinstance(parsed_node.test, ast.Constant):
                 if_body: list[ast.stmt] = (
                     parsed_node.body if parsed_node.test.value else parsed_node.orelse
@@ -135,6 +247,8 @@ class OptimizationPass(AstTransformerBase, AstVisitorProtocol):
 
     def visit_IfExp(self, node: ast.IfExp) -> ast.AST | None:
         parsed_node: ast.AST = self._generic_visit(node)
+        if isinstance(parsed_node, ast.IfExp):
+            parsed_node.test = self._simplify_test(parsed_node.test)
 
         if isinstance(parsed_node, ast.IfExp) and isinstance(
             parsed_node.test, ast.Constant
@@ -148,6 +262,8 @@ class OptimizationPass(AstTransformerBase, AstVisitorProtocol):
 
     def visit_While(self, node: ast.While) -> ast.AST | None:
         parsed_node = self._generic_visit(node)
+        if isinstance(parsed_node, ast.While):
+            parsed_node.test = self._simplify_test(parsed_node.test)
 
         if (
             isinstance(parsed_node, ast.While)
@@ -193,11 +309,74 @@ class OptimizationPass(AstTransformerBase, AstVisitorProtocol):
             if index > 0:
                 parsed_node.values = parsed_node.values[index:]
 
+            parsed_node.values = self._skip_duplicate_operands(parsed_node.values)
+            if len(parsed_node.values) == 1:
+                return parsed_node.values[0]
+
+        return parsed_node
+
+    def _skip_duplicate_operands(self, values: list[ast.expr]) -> list[ast.expr]:
+        """Removes operands of an and/or that can't change the result since the
+        same side effect free operand was already evaluated."""
+        new_values: list[ast.expr] = []
+        dumps: list[str] = []
+        for index, value in enumerate(values):
+            dump: str = ast.dump(value)
+            if dump in dumps and (
+                # The last value is the result if reached so must stay unless
+                # the same value is right before it
+                index < len(values) - 1 or dumps[-1] == dump
+            ):
+                first: int = dumps.index(dump)
+                if all(
+                    is_side_effect_free(
+                        new_value, self.functions_safe_to_exclude_in_test_expr
+                    )
+                    for new_value in new_values[first:]
+                ):
+                    continue
+
+            new_values.append(value)
+            dumps.append(dump)
+
+        return new_values
+
+    def visit_comprehension(self, node: ast.comprehension) -> ast.AST:
+        parsed_node: ast.AST = self._generic_visit(node)
+        if isinstance(parsed_node, ast.comprehension):
+            parsed_node.ifs = [self._simplify_test(test) for test in parsed_node.ifs]
+
         return parsed_node
 
+    def _simplify_test(self, node: ast.expr) -> ast.expr:
+        if self.simplify_algebra:
+            node = simplify_test(node, self.assume_numeric_operands)
+        if self.reorder_bool_op_operands:
+            node = reorder_test_operands(
+                node, self.functions_safe_to_exclude_in_test_expr
+            )
+
+        return node
+
     def visit_UnaryOp(self, node: ast.UnaryOp) -> ast.AST:
         parsed_node: ast.AST = self._generic_visit(node)
 
+        if (
+            self.simplify_algebra
+            and isinstance(parsed_node, ast.UnaryOp)
+            and isinstance(parsed_node.op, ast.Not)
+        ):
+            parsed_node = simplify_not(parsed_node, self.assume_numeric_operands)
+
+        if (
+            self.reorder_bool_op_operands
+            and isinstance(parsed_node, ast.UnaryOp)
+            and isinstance(parsed_node.op, ast.Not)
+        ):
+            parsed_node.operand = reorder_test_operands(
+                parsed_node.operand, self.functions_safe_to_exclude_in_test_expr
+            )
+
         if isinstance(parsed_node, ast.UnaryOp) and isinstance(
             parsed_node.operand, ast.Constant
         ):
@@ -224,25 +403,87 @@ class OptimizationPass(AstTransformerBase, AstVisitorProtocol):
                 parsed_node.left, parsed_node.right, parsed_node.op
             )
 
+        if (
+            self.simplify_algebra
+            and self.assume_numeric_operands
+            and isinstance(parsed_node, ast.BinOp)
+        ):
+            return simplify_numeric_bin_op(parsed_node)
+
+        return parsed_node
+
+    def visit_JoinedStr(self, node: ast.JoinedStr) -> ast.AST:
+        parsed_node: ast.AST = self._generic_visit(node)
+        if not self.fold_fstrings or not isinstance(parsed_node, ast.JoinedStr):
+            return parsed_node
+
+        parts: list[str | ast.expr] = []
+        folded: bool = False
+        for value in parsed_node.values:
+            text: str | None = (
+                self._format_constant(value)
+                if isinstance(value, ast.FormattedValue)
+                else value.value  # type: ignore[attr-defined]
+            )
+            if text is None:
+                parts.append(value)
+            else:
+                parts.append(text)
+                folded = folded or isinstance(value, ast.FormattedValue)
+
+        return build_joined_str(parts) if folded else parsed_node
+
+    def visit_FormattedValue(self, node: ast.FormattedValue) -> ast.AST:
+        parsed_node: ast.AST = self._generic_visit(node)
+        # Format specs must stay f-strings even if folded
+        if isinstance(parsed_node, ast.FormattedValue) and isinstance(
+            parsed_node.format_spec, ast.Constant
+        ):
+            parsed_node.format_spec = ast.JoinedStr(values=[parsed_node.format_spec])
+
         return parsed_node
 
+    @staticmethod
+    def _format_constant(node: ast.FormattedValue) -> str | None:
+        """Returns the text node would format to if it only uses constants."""
+        if not isinstance(node.value, ast.Constant):
+            return None
+
+        spec: str = ""
+        if node.format_spec is not None:
+            if not isinstance(node.format_spec, ast.JoinedStr) or not all(
+                isinstance(value, ast.Constant) for value in node.format_spec.values
+            ):
+                return None
+            spec = "".join(value.value for value in node.format_spec.values)  # type: ignore[attr-defined]
+
+        value: object = node.value.value
+        match node.conversion:
+            case 115:
+                value = str(value)
+            case 114:
+                value = repr(value)
+            case 97:
+                value = ascii(value)
+
+        try:
+            return format(value, spec)
+        except (TypeError, ValueError):
+            return None
+
     def visit_Compare(self, node: ast.Compare) -> ast.AST:
         parsed_node = self._generic_visit(node)
 
-        if (
-            isinstance(parsed_node, ast.Compare)
-            and isinstance(parsed_node.left, ast.Constant)
-            and len(parsed_node.comparators) == 1
-            and isinstance(parsed_node.comparators[0], ast.Constant)
-        ):
-            return self._ast_constants_operation(
-                parsed_node.left, parsed_node.comparators[0], parsed_node.ops[0]
-            )
+        if isinstance(parsed_node, ast.Compare) and len(parsed_node.comparators) == 1:
+            left: ast.Constant | None = as_constant(parsed_node.left)
+            right: ast.Constant | None = as_constant(parsed_node.comparators[0])
+            if left is not None and right is not None:
+                return self._ast_constants_operation(left, right, parsed_node.ops[0])
 
         return parsed_node
 
     @staticmethod
-    def _ast_constants_operation(  # noqa: C901, PLR0912
+    def _ast_constants_operation(  # noqa: C901, PLR0912, PLR0915
         left: ast.Constant,
         right: ast.Constant,
         operation: ast.operator | ast.cmpop,
@@ -299,6 +540,10 @@ class OptimizationPass(AstTransformerBase, AstVisitorProtocol):
                 result = left_value is right_value
             case ast.IsNot():
                 result = left_value is not right_value
+            case ast.In():
+                result = left_value in right_value  # type: ignore[operator]
+            case ast.NotIn():
+                result = left_value not in right_value  # type: ignore[operator]
             case _:  # pragma: no cover
                 assert_never(operation)  # type: ignore[arg-type]
 
@@ -318,11 +563,58 @@ class _SimplifyNamedTuple(Enum):
         return self != _SimplifyNamedTuple.NO
 
 
+_TYPING_MODULES: tuple[str, ...] = ("typing", "typing_extensions")
+
+_LOGGING_METHOD_LEVELS: dict[str, int] = {
+    "debug": logging.DEBUG,
+    "info": logging.INFO,
+    "warn": logging.WARNING,
+    "warning": logging.WARNING,
+    "error": logging.ERROR,
+    "exception": logging.ERROR,
+    "critical": logging.CRITICAL,
+    "fatal": logging.CRITICAL,
+}
+
+
+def _get_logging_level(node: ast.expr) -> int | None:
+    """Gets level from first arg of a log call like `logger.log(logging.INFO, ...)`"""
+    if isinstance(node, ast.Constant):
+        return node.value if isinstance(node.value, int) else None
+
+    level_id: str | None = get_name_or_full_attribute_id(node)
+    if level_id is None or not level_id.startswith("logging."):
+        return None
+
+    return logging.getLevelNamesMapping().get(level_id.removeprefix("logging."))
+
+
+def _is_get_logger_call(node: ast.expr) -> bool:
+    return (
+        isinstance(node, ast.Call)
+        and get_name_or_full_attribute_id(node.func) == "logging.getLogger"
+    )
+
+
+def _get_module_logger_names(node: ast.Module) -> set[str]:
+    """Returns globals only ever assigned the result of logging.getLogger."""
+    binding_counts: dict[str, int] = get_module_binding_counts(node)
+    return {
+        target.id
+        for statement in node.body
+        if isinstance(statement, ast.Assign) and _is_get_logger_call(statement.value)
+        for target in statement.targets
+        if isinstance(target, ast.Name) and binding_counts.get(target.id) == 1
+    }
+
+
 class FirstPassOptimizer(OptimizationPass):
     """Removes All nodes that only need to be removed once and can't be
     optimized into removal later. Intened to be called once as a first pass."""
 
     __slots__ = (
+        "_logger_names",
+        "_names_to_fold_false",
         "_node_context",
         "_unneeded_futures",
         "collection_concat_to_unpack",
@@ -330,10 +622,12 @@ class FirstPassOptimizer(OptimizationPass):
         "skip_asserts",
         "skip_dangling_expressions",
         "skip_generics_and_alias",
+        "skip_logging_calls_below_level",
         "skip_overload_functions",
         "skip_type_hints",
         "skip_typing_cast",
         "skip_useless_else",
+        "target_python_version",
         "tokens_to_skip",
     )
 
@@ -352,11 +646,37 @@ class FirstPassOptimizer(OptimizationPass):
         skip_typing_cast: bool,
         skip_overload_functions: bool,
         skip_useless_else: bool,
+        *,
+        target_python_version: tuple[int, ...] | None,
+        skip_type_checking_blocks: bool,
+        skip_debug_blocks: bool,
+        skip_logging_calls_below_level: int,
+        logger_names: Iterable[str],
+        propagate_function_constants: bool,
+        skip_dead_stores: bool,
+        skip_unreachable_code: bool,
+        no_return_functions: Iterable[str],
+        hoist_loop_invariant_lookups: bool,
+        fold_fstrings: bool,
+        simplify_algebra: bool,
+        assume_numeric_operands: bool,
+        reorder_bool_op_operands: bool,
+        hot_functions: set[str] | None,
     ) -> None:
         super().__init__(
             fold_constants,
             fold_simple_function_locals,
             functions_safe_to_exclude_in_test_expr,
+            propagate_function_constants=propagate_function_constants,
+            skip_dead_stores=skip_dead_stores,
+            skip_unreachable_code=skip_unreachable_code,
+            no_return_functions=no_return_functions,
+            hoist_loop_invariant_lookups=hoist_loop_invariant_lookups,
+            fold_fstrings=fold_fstrings,
+            simplify_algebra=simplify_algebra,
+            assume_numeric_operands=assume_numeric_operands,
+            reorder_bool_op_operands=reorder_bool_op_operands,
+            hot_functions=hot_functions,
         )
         self.collection_concat_to_unpack: bool = collection_concat_to_unpack
         self.simplify_named_tuple: _SimplifyNamedTuple = _SimplifyNamedTuple(
@@ -372,8 +692,19 @@ class FirstPassOptimizer(OptimizationPass):
         self.skip_typing_cast: bool = skip_typing_cast
         self.skip_overload_functions: bool = skip_overload_functions
         self.skip_useless_else: bool = skip_useless_else
+        self.target_python_version: tuple[int, ...] | None = target_python_version
+        self.skip_logging_calls_below_level: int = skip_logging_calls_below_level
+        self._logger_names: set[str] = set(logger_names)
         self._node_context: NodeContext = NodeContext.NONE
 
+        self._names_to_fold_false: set[str] = set()
+        if skip_type_checking_blocks:
+            self._names_to_fold_false.update(
+                f"{module}.TYPE_CHECKING" for module in _TYPING_MODULES
+            )
+        if skip_debug_blocks:
+            self._names_to_fold_false.add("__debug__")
+
         if skip_type_hints:
             self.tokens_tracker.from_imports_to_skip.add(
                 ("__future__", "annotations"), True
@@ -381,7 +712,10 @@ class FirstPassOptimizer(OptimizationPass):
 
     @override
     def visit(self, node: ast.Module) -> None:
-        self._generic_visit(node)
+        if self.skip_logging_calls_below_level:
+            self._logger_names.update(_get_module_logger_names(node))
+
+        self._visit_module(node)
 
         if self.simplify_named_tuple == _SimplifyNamedTuple.FOUND:
             handled: bool = False
@@ -474,7 +808,7 @@ class FirstPassOptimizer(OptimizationPass):
         ):
             self.simplify_named_tuple = _SimplifyNamedTuple.FOUND
             named_tuple: ast.Call = self._build_named_tuple(node)
-            return ast.Assign([ast.Name(node.name)], named_tuple)
+            return ast.Assign([ast.Name(node.name, ast.Store())], named_tuple)
 
         return self._visit_with_context(node, NodeContext.CLASS, self._generic_visit)
 
@@ -501,6 +835,11 @@ class FirstPassOptimizer(OptimizationPass):
             )
         ]
 
+        if self._names_to_fold_false:
+            for alias in node.names:
+                if alias.asname is not None and alias.name in _TYPING_MODULES:
+                    self._track_type_checking_name(f"{alias.asname}.TYPE_CHECKING")
+
         return node if node.names else None
 
     def visit_ImportFrom(self, node: ast.ImportFrom) -> ast.AST | None:
@@ -515,8 +854,17 @@ class FirstPassOptimizer(OptimizationPass):
             )
         ]
 
+        if self._names_to_fold_false and node.module in _TYPING_MODULES:
+            for alias in node.names:
+                if alias.name == "TYPE_CHECKING":
+                    self._track_type_checking_name(alias.asname or alias.name)
+
         return node if node.names else None
 
+    def _track_type_checking_name(self, name: str) -> None:
+        if "typing.TYPE_CHECKING" in self._names_to_fold_false:
+            self._names_to_fold_false.add(name)
+
     def visit_arg(self, node: ast.arg) -> ast.AST | None:
         if self.skip_type_hints:
             node.annotation = None
@@ -536,6 +884,63 @@ class FirstPassOptimizer(OptimizationPass):
         if node_id is not None and self.tokens_tracker.calls_to_fold.has(node_id):
             return ast.Constant(self.tokens_tracker.calls_to_fold.get(node_id))
 
+        if isinstance(node.func, ast.Attribute) and node.func.attr in (
+            "startswith",
+            "endswith",
+        ):
+            # Attributes of folded values are not folded, but these are safe
+            receiver_id: str | None = get_name_or_full_attribute_id(node.func.value)
+            if receiver_id is not None and self.tokens_tracker.name_or_attr_to_fold.has(
+                receiver_id
+            ):
+                node.func.value = ast.Constant(
+                    self.tokens_tracker.name_or_attr_to_fold.get(receiver_id)
+                )
+
+        parsed_node: ast.AST = self._generic_visit(node)
+
+        if (
+            isinstance(parsed_node, ast.Call)
+            and isinstance(parsed_node.func, ast.Attribute)
+            and parsed_node.func.attr in ("startswith", "endswith")
+            and isinstance(parsed_node.func.value, ast.Constant)
+            and isinstance(parsed_node.func.value.value, str)
+            and not parsed_node.keywords
+            and len(parsed_node.args) == 1
+            and (prefix := as_constant(parsed_node.args[0])) is not None
+            and isinstance(prefix.value, (str, tuple))
+        ):
+            # Mostly found in platform checks like sys.platform.startswith("win")
+            return ast.Constant(
+                getattr(parsed_node.func.value.value, parsed_node.func.attr)(
+                    prefix.value
+                )
+            )
+
+        return parsed_node
+
+    def visit_Compare(self, node: ast.Compare) -> ast.AST:
+        if self.target_python_version is not None and len(node.comparators) == 1:
+            folded_version_check: ast.Constant | None = self._fold_version_info_compare(
+                node.left, node.ops[0], node.comparators[0]
+            )
+            if folded_version_check is not None:
+                return folded_version_check
+
+        return super().visit_Compare(node)
+
+    def visit_Subscript(self, node: ast.Subscript) -> ast.AST:
+        if (
+            self.target_python_version is not None
+            and isinstance(node.ctx, ast.Load)
+            and get_name_or_full_attribute_id(node.value) == "sys.version_info"
+        ):
+            version_slice: ast.expr | None = self._get_version_info_slice(
+                self.target_python_version, node.slice
+            )
+            if version_slice is not None:
+                return version_slice
+
         return self._generic_visit(node)
 
     def visit_Assign(self, node: ast.Assign) -> ast.AST | None:
@@ -596,7 +1001,7 @@ class FirstPassOptimizer(OptimizationPass):
     def visit_Pass(self, _: ast.Pass) -> ast.AST | None:
         return None
 
-    def visit_Expr(self, node: ast.Expr) -> ast.AST | None:
+    def visit_Expr(self, node: ast.Expr) -> ast.AST | list[ast.stmt] | None:
         if isinstance(
             node.value, ast.Call
         ) and self.tokens_tracker.functions_to_skip.has(
@@ -604,7 +1009,26 @@ class FirstPassOptimizer(OptimizationPass):
         ):
             return None
 
-        return self._generic_visit(node)
+        parsed_node: ast.AST = self._generic_visit(node)
+
+        if (
+            isinstance(parsed_node, ast.Expr)
+            and isinstance(parsed_node.value, ast.Call)
+            and self._is_skippable_logging_call(parsed_node.value)
+        ):
+            # Keep anything in the call that may have side effects
+            call: ast.Call = parsed_node.value
+            call_finder = CallAggregator(self.functions_safe_to_exclude_in_test_expr)
+            return [
+                ast.Expr(expr)
+                for expr in call_finder.visit(
+                    ast.Tuple(
+                        [call.func, *call.args, *(k.value for k in call.keywords)]
+                    )
+                )
+            ] or None
+
+        return parsed_node
 
     def visit_BinOp(self, node: ast.BinOp) -> ast.AST | None:
         parsed_node: ast.AST | None = super().visit_BinOp(node)
@@ -642,6 +1066,9 @@ class FirstPassOptimizer(OptimizationPass):
                 self.tokens_tracker.name_or_attr_to_fold.get(full_attr_id)
             )
 
+        if full_attr_id in self._names_to_fold_false and isinstance(node.ctx, ast.Load):
+            return ast.Constant(False)
+
         if isinstance(node.value, (ast.Attribute, ast.Name)):
             node.value.no_check_fold = True  # type: ignore[union-attr]
 
@@ -653,6 +1080,9 @@ class FirstPassOptimizer(OptimizationPass):
         ) and self.tokens_tracker.name_or_attr_to_fold.has(node.id):
             return ast.Constant(self.tokens_tracker.name_or_attr_to_fold.get(node.id))
 
+        if node.id in self._names_to_fold_false and isinstance(node.ctx, ast.Load):
+            return ast.Constant(False)
+
         return node
 
     def _visit_with_context[P, R](
@@ -701,7 +1131,7 @@ class FirstPassOptimizer(OptimizationPass):
         )
 
         return ast.Call(
-            ast.Name("namedtuple"),
+            ast.Name("namedtuple", ast.Load()),
             [
                 ast.Constant(node.name),
                 ast.List([ast.Constant(n.target.id) for n in node.body]),  # type: ignore[attr-defined]
@@ -709,6 +1139,107 @@ class FirstPassOptimizer(OptimizationPass):
             keywords,
         )
 
+    def _is_skippable_logging_call(self, node: ast.Call) -> bool:
+        if not isinstance(node.func, ast.Attribute) or not self._is_logger(
+            node.func.value
+        ):
+            return False
+
+        level: int | None
+        if node.func.attr == "log":
+            level = (
+                _get_logging_level(node.args[0])
+                if node.args and not isinstance(node.args[0], ast.Starred)
+                else None
+            )
+        else:
+            level = _LOGGING_METHOD_LEVELS.get(node.func.attr)
+
+        return level is not None and level < self.skip_logging_calls_below_level
+
+    def _is_logger(self, node: ast.expr) -> bool:
+        if _is_get_logger_call(node):
+            return True
+
+        name: str | None = get_name_or_full_attribute_id(node)
+        return name == "logging" or name in self._logger_names
+
+    def _fold_version_info_compare(
+        self, left: ast.expr, operation: ast.cmpop, right: ast.expr
+    ) -> ast.Constant | None:
+        """Folds comparisons of sys.version_info to a tuple like
+        `sys.version_info >= (3, 12)`. The real sys.version_info is always longer than
+        the tuple it is compared to, so a trailing 0 is added to the target version to
+        keep the result the same when the compared parts are equal."""
+        assert self.target_python_version is not None
+
+        if not isinstance(
+            operation, (ast.Lt, ast.LtE, ast.Gt, ast.GtE, ast.Eq, ast.NotEq)
+        ):
+            return None
+
+        version_is_left: bool = (
+            get_name_or_full_attribute_id(left) == "sys.version_info"
+        )
+        if (
+            not version_is_left
+            and get_name_or_full_attribute_id(right) != "sys.version_info"
+        ):
+            return None
+
+        other: ast.Constant | None = as_constant(right if version_is_left else left)
+        if (
+            other is None
+            or not isinstance(other.value, tuple)
+            or len(other.value) > len(self.target_python_version)
+            or not all(isinstance(v, int) for v in other.value)
+        ):
+            return None
+
+        version = ast.Constant((*self.target_python_version[: len(other.value)], 0))
+
+        return (
+            self._ast_constants_operation(version, other, operation)
+            if version_is_left
+            else self._ast_constants_operation(other, version, operation)
+        )
+
+    @staticmethod
+    def _get_version_info_slice(
+        target_python_version: tuple[int, ...], version_slice: ast.expr
+    ) -> ast.expr | None:
+        """Folds index or slice of sys.version_info like `sys.version_info[:2]`
+        if the result is within the known version."""
+        if isinstance(version_slice, ast.Constant):
+            index = version_slice.value
+            if isinstance(index, int) and 0 <= index < len(target_python_version):
+                return ast.Constant(target_python_version[index])
+
+            return None
+
+        if (
+            not isinstance(version_slice, ast.Slice)
+            or version_slice.step is not None
+            or not isinstance(version_slice.upper, ast.Constant)
+        ):
+            return None
+
+        lower = 0
+        if version_slice.lower is not None:
+            if not isinstance(version_slice.lower, ast.Constant):
+                return None
+            lower = version_slice.lower.value  # type: ignore[assignment]
+
+        upper = version_slice.upper.value
+        if (
+            not isinstance(lower, int)
+            or not isinstance(upper, int)
+            or not 0 <= lower <= upper <= len(target_python_version)
+        ):
+            return None
+
+        return ast.Tuple([ast.Constant(v) for v in target_python_version[lower:upper]])
+
     @staticmethod
     def _is_overload_function(node: ast.FunctionDef | ast.AsyncFunctionDef) -> bool:
         return (
@@ -718,20 +1249,134 @@ class FirstPassOptimizer(OptimizationPass):
         )
 
 
+class UnusedDefinitionSkipper(AstTransformerBase, AstVisitorProtocol):
+    """Removes module level functions, classes and assignments that are never
+    referenced. Definitions whose creation could have side effects, like ones
+    with decorators or metaclasses, are always kept."""
+
+    __slots__ = ("_excludes", "_mode", "_names_to_preserve")
+
+    def __init__(
+        self,
+        mode: UnusedDefinitionsToSkip,
+        names_to_preserve: Iterable[str],
+        excludes: set[str],
+    ) -> None:
+        self._mode: UnusedDefinitionsToSkip = mode
+        self._names_to_preserve: set[str] = set(names_to_preserve)
+        self._excludes: set[str] = excludes
+
+    def visit(self, node: ast.Module) -> None:
+        if not self._mode or has_dynamic_globals_access(node):
+            return
+
+        removable_names: set[str] = self._get_removable_names(node)
+        candidates: dict[ast.stmt, set[str]] = {}
+        live_names: set[str] = set()
+
+        for statement in node.body:
+            bound_names: set[str] | None = get_side_effect_free_bound_names(
+                statement, self._excludes
+            )
+            if bound_names and bound_names <= removable_names:
+                candidates[statement] = bound_names
+            else:
+                live_names.update(NameReferenceAggregator().visit(statement))
+
+        # Anything referenced by live code is live, repeat until nothing changes
+        newly_live: list[ast.stmt] = [
+            s for s, names in candidates.items() if names & live_names
+        ]
+        while newly_live:
+            statement = newly_live.pop()
+            del candidates[statement]
+            live_names.update(NameReferenceAggregator().visit(statement))
+            newly_live = [s for s, names in candidates.items() if names & live_names]
+
+        if candidates:
+            node.body = [s for s in node.body if s not in candidates]
+
+    def _get_removable_names(self, node: ast.Module) -> set[str]:
+        """Returns names whose definitions can be removed if not referenced."""
+        exports: set[str] | None = get_literal_all(node)
+
+        removable_names: set[str] = set()
+        unsafe_names: set[str] = set(self._names_to_preserve)
+        unsafe_names.update(
+            name
+            for child in ast.walk(node)
+            if isinstance(child, ast.Global)
+            for name in child.names
+        )
+        for statement in node.body:
+            bound_names: set[str] | None = get_side_effect_free_bound_names(
+                statement, self._excludes
+            )
+            if bound_names is None:
+                unsafe_names.update(get_bound_names(statement))
+                continue
+
+            for name in bound_names:
+                if name.startswith("__") and name.endswith("__"):
+                    continue
+                if (
+                    name.startswith("_")
+                    or self._mode == UnusedDefinitionsToSkip.ALL
+                    or (exports is not None and name not in exports)
+                ):
+                    removable_names.add(name)
+
+        return removable_names - unsafe_names
+
+
 class LastPassOptimizer(AstTransformerBase, AstVisitorProtocol):
     """Removes unused import nodes from AST and other final touches."""
 
-    __slots__ = ("_names_and_attrs", "_skip_unused_imports")
+    __slots__ = (
+        "_defer_function_only_imports",
+        "_function_names",
+        "_functions_using_names",
+        "_imports_to_defer",
+        "_module_names",
+        "_names_and_attrs",
+        "_skip_unused_imports",
+        "_top_level_imports",
+        "deferred_imports",
+    )
 
     def __init__(
-        self, skip_unused_imports: bool, imports_to_preserve: Iterable[str]
+        self,
+        skip_unused_imports: bool,
+        imports_to_preserve: Iterable[str],
+        defer_function_only_imports: bool = False,
     ) -> None:
         self._skip_unused_imports: bool = skip_unused_imports
         self._names_and_attrs: set[str] = set(imports_to_preserve)
 
+        self._defer_function_only_imports: bool = defer_function_only_imports
+        # Names used at module load vs names used per function body
+        self._module_names: set[str] = set(imports_to_preserve)
+        self._function_names: set[str] | None = None
+        self._functions_using_names: list[
+            tuple[ast.FunctionDef | ast.AsyncFunctionDef, set[str]]
+        ] = []
+        self._top_level_imports: set[ast.Import | ast.ImportFrom] = set()
+        self._imports_to_defer: dict[
+            ast.FunctionDef | ast.AsyncFunctionDef,
+            dict[ast.Import | ast.ImportFrom, list[ast.alias]],
+        ] = {}
+        # Import name to names of functions it was moved into
+        self.deferred_imports: dict[str, list[str]] = {}
+
     def visit(self, node: ast.Module) -> None:
+        if self._defer_function_only_imports:
+            self._prepare_deferring_imports(node)
+
         self._generic_visit(node)
 
+        if self._imports_to_defer:
+            self._insert_deferred_imports()
+
     @override
     def _should_add_node_to_body(self, new_nodes: list[ast.AST], node: ast.AST) -> bool:
         if new_nodes:
@@ -756,36 +1401,140 @@ class LastPassOptimizer(AstTransformerBase, AstVisitorProtocol):
         return reversed(ast_list)
 
     def visit_Import(self, node: ast.Import) -> ast.Import | None:
-        if not self._skip_unused_imports:
+        return self._handle_import(node)
+
+    def visit_ImportFrom(self, node: ast.ImportFrom) -> ast.ImportFrom | None:
+        if node.module == "__future__":
             return node
 
-        self._filter_imports(node)
+        return self._handle_import(node)
+
+    def _handle_import[T: (ast.Import, ast.ImportFrom)](self, node: T) -> T | None:
+        if self._skip_unused_imports:
+            node.names = [
+                alias
+                for alias in node.names
+                if alias.name == "*"
+                or get_import_alias_bound_name(alias) in self._names_and_attrs
+            ]
+
+        if node in self._top_level_imports:
+            self._defer_imports(node)
 
         return node if node.names else None
 
-    def visit_ImportFrom(self, node: ast.ImportFrom) -> ast.ImportFrom | None:
-        if not self._skip_unused_imports:
-            return node
+    def visit_FunctionDef(self, node: ast.FunctionDef) -> ast.AST:
+        return self._handle_function(node)
 
-        if node.module != "__future__":
-            self._filter_imports(node)
+    def visit_AsyncFunctionDef(self, node: ast.AsyncFunctionDef) -> ast.AST:
+        return self._handle_function(node)
 
-        return node if node.names else None
+    def _handle_function(self, node: ast.FunctionDef | ast.AsyncFunctionDef) -> ast.AST:
+        if not self._defer_function_only_imports or self._function_names is not None:
+            return self._generic_visit(node)
+
+        # Run when the function is defined so count as module level uses
+        self._visit(node.args)
+        for decorator in node.decorator_list:
+            self._visit(decorator)
+        if node.returns is not None:
+            self._visit(node.returns)
+
+        self._function_names = set()
+        try:
+            parsed_node: ast.AST = self._generic_visit(node)
+            self._functions_using_names.append((node, self._function_names))
+        finally:
+            self._function_names = None
+
+        return parsed_node
 
     def visit_Name(self, node: ast.Name) -> ast.Name:
         self._names_and_attrs.add(node.id)
+
+        if self._defer_function_only_imports:
+            if self._function_names is None:
+                self._module_names.add(node.id)
+            else:
+                self._function_names.add(node.id)
+
         return node
 
     def visit_Attribute(self, node: ast.Attribute) -> ast.AST:
         self._names_and_attrs.add(node.attr)
         return self._generic_visit(node)
 
-    def _filter_imports(self, node: ast.Import | ast.ImportFrom) -> None:
-        node.names = [
-            alias
-            for alias in node.names
-            if (alias.asname or alias.name) in self._names_and_attrs
-        ]
+    def _prepare_deferring_imports(self, node: ast.Module) -> None:
+        for n in node.body:
+            if isinstance(n, (ast.Import, ast.ImportFrom)):
+                self._top_level_imports.add(n)
+            elif isinstance(n, (ast.Assign, ast.AugAssign, ast.AnnAssign)) and any(
+                isinstance(t, ast.Name) and t.id == "__all__"
+                for t in (n.targets if isinstance(n, ast.Assign) else [n.target])
+            ):
+                # Exported names need to remain on the module
+                self._module_names.update(
+                    c.value
+                    for c in ast.walk(n)
+                    if isinstance(c, ast.Constant) and isinstance(c.value, str)
+                )
+
+    def _defer_imports(self, node: ast.Import | ast.ImportFrom) -> None:
+        """Moves imports only used in function bodies into those functions.
+        Imports used during module load or rebound in a function stay as is."""
+        kept_names: list[ast.alias] = []
+
+        for alias in node.names:
+            name: str = get_import_alias_bound_name(alias)
+            functions: list[ast.FunctionDef | ast.AsyncFunctionDef] = [
+                function
+                for function, names in self._functions_using_names
+                if name in names
+            ]
+
+            if (
+                name == "*"
+                or name in self._module_names
+                or not functions
+                or any(name in get_bound_names(f) for f in functions)
+            ):
+                kept_names.append(alias)
+                continue
+
+            for function in functions:
+                self._imports_to_defer.setdefault(function, {}).setdefault(
+                    node, []
+                ).append(alias)
+
+            self.deferred_imports[alias.asname or alias.name] = [
+                f.name for f in functions
+            ]
+
+        node.names = kept_names
+
+    def _insert_deferred_imports(self) -> None:
+        for function, imports in self._imports_to_defer.items():
+            # Imports were visited last to first
+            new_imports: list[ast.stmt] = [
+                ast.Import([ast.alias(a.name, a.asname) for a in aliases])
+                if isinstance(import_node, ast.Import)
+                else ast.ImportFrom(
+                    import_node.module,
+                    [ast.alias(a.name, a.asname) for a in aliases],
+                    import_node.level,
+                )
+                for import_node, aliases in reversed(imports.items())
+            ]
+
+            first_node: ast.stmt = function.body[0]
+            insert_index: int = (
+                1
+                if isinstance(first_node, ast.Expr)
+                and isinstance(first_node.value, ast.Constant)
+                and isinstance(first_node.value.value, str)
+                else 0
+            )
+            function.body[insert_index:insert_index] = new_imports
 
     def visit_While(self, node: ast.While) -> ast.AST:
         if isinstance(node.test, ast.Constant) and node.test.value:
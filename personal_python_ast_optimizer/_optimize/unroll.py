@@ -0,0 +1,241 @@
+"""Unrolling of loops over a small constant number of values."""
+
+import ast
+import copy
+
+from personal_python_ast_optimizer._optimize.base import AstTransformerBase
+from personal_python_ast_optimizer._optimize.control_flow import get_statement_lists
+from personal_python_ast_optimizer._optimize.dataflow import get_bound_names_in_scope
+from personal_python_ast_optimizer._optimize.typing import AstVisitorProtocol
+from personal_python_ast_optimizer._optimize.utils import (
+    LOCALS_ACCESS,
+    NESTED_SCOPES_WITH_COMPREHENSIONS,
+    as_constant,
+    get_bound_names,
+)
+
+
+def _has_loop_control(body: list[ast.stmt]) -> bool:
+    """Checks if a break or continue in body belongs to the loop body is in."""
+    for node in body:
+        match node:
+            case ast.Break() | ast.Continue():
+                return True
+            case ast.For() | ast.AsyncFor() | ast.While():
+                if _has_loop_control(node.orelse):
+                    return True
+            case _ if not isinstance(node, NESTED_SCOPES_WITH_COMPREHENSIONS):
+                if any(_has_loop_control(body) for body in get_statement_lists(node)):
+                    return True
+
+    return False
+
+
+def _get_nested_scope_names(node: ast.FunctionDef | ast.AsyncFunctionDef) -> set[str]:
+    """Returns names used in scopes nested in node, which could see a loop
+    variable at any time."""
+    names: set[str] = set()
+    for child in ast.walk(node):
+        if child is not node and isinstance(child, NESTED_SCOPES_WITH_COMPREHENSIONS):
+            names.update(
+                name.id for name in ast.walk(child) if isinstance(name, ast.Name)
+            )
+
+    return names
+
+
+class _LoopVariableSubstituter(AstTransformerBase, AstVisitorProtocol):
+    __slots__ = ("_name", "_value")
+
+    def __init__(self, name: str, value: ast.expr) -> None:
+        self._name: str = name
+        self._value: ast.expr = value
+
+    def visit(self, node: ast.stmt) -> ast.stmt:
+        return self._visit(node)  # type: ignore[return-value]
+
+    def _visit(self, node: ast.AST) -> ast.AST | None:
+        if isinstance(node, NESTED_SCOPES_WITH_COMPREHENSIONS):
+            return node
+
+        return super()._visit(node)
+
+    def visit_Name(self, node: ast.Name) -> ast.expr:
+        if node.id == self._name and isinstance(node.ctx, ast.Load):
+            return copy.deepcopy(self._value)
+
+        return node
+
+
+class LoopUnroller:
+    """Replaces for loops in functions over small constant ranges and tuples
+    with a copy of their body for each value, with uses of the loop variable
+    replaced by the value. Loops with a break or continue are not unrolled."""
+
+    __slots__ = (
+        "_assigned_names",
+        "_hot_functions",
+        "_local_names",
+        "_max_iterations",
+        "_max_statements",
+        "_range_is_builtin",
+        "unrolled",
+    )
+
+    def __init__(
+        self,
+        max_iterations: int,
+        max_statements: int,
+        hot_functions: set[str] | None,
+    ) -> None:
+        self._max_iterations: int = max_iterations
+        self._max_statements: int = max_statements
+        # Only functions with these names are unrolled in, or all if None
+        self._hot_functions: set[str] | None = hot_functions
+        self._range_is_builtin: bool = False
+        self._local_names: set[str] = set()
+        # Locals that need assigning on each iteration since a nested
+        # scope could read them
+        self._assigned_names: set[str] = set()
+        self.unrolled: bool = False
+
+    def visit(self, node: ast.Module) -> bool:
+        """Unrolls loops in functions in node.
+
+        :param node: Module to unroll loops in
+        :returns: True if any loop was unrolled"""
+        self.unrolled = False
+        self._range_is_builtin = "range" not in get_bound_names(node)
+
+        for child in ast.walk(node):
+            if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef)) and (
+                self._hot_functions is None or child.name in self._hot_functions
+            ):
+                self._unroll_in_function(child)
+
+        return self.unrolled
+
+    def _unroll_in_function(self, node: ast.FunctionDef | ast.AsyncFunctionDef) -> None:
+        if any(
+            isinstance(child, ast.Name) and child.id in LOCALS_ACCESS
+            for child in ast.walk(node)
+        ):
+            return
+
+        self._local_names = {
+            arg.arg for arg in ast.walk(node.args) if isinstance(arg, ast.arg)
+        }
+        for statement in node.body:
+            self._local_names.update(get_bound_names_in_scope(statement))
+        for child in ast.walk(node):
+            if isinstance(child, (ast.Global, ast.Nonlocal)):
+                self._local_names.difference_update(child.names)
+
+        self._assigned_names = _get_nested_scope_names(node)
+        node.body = self._unroll_in_body(node.body, False)
+
+    def _unroll_in_body(self, body: list[ast.stmt], in_try: bool) -> list[ast.stmt]:
+        new_body: list[ast.stmt] = []
+        for statement in body:
+            if not isinstance(
+                statement, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)
+            ):
+                # Context managers like contextlib.suppress can also swallow
+                # exceptions raised in the loop
+                statement_in_try: bool = in_try or isinstance(
+                    statement, (ast.Try, ast.TryStar, ast.With, ast.AsyncWith)
+                )
+                for statement_list in get_statement_lists(statement):
+                    statement_list[:] = self._unroll_in_body(
+                        statement_list, statement_in_try
+                    )
+
+            unrolled: list[ast.stmt] | None = (
+                self._unroll(statement, in_try)
+                if isinstance(statement, ast.For)
+                else None
+            )
+            if unrolled is None:
+                new_body.append(statement)
+            else:
+                new_body.extend(unrolled)
+                self.unrolled = True
+
+        return new_body
+
+    def _get_values(self, node: ast.expr) -> list[ast.expr] | None:
+        match node:
+            case ast.Call(func=ast.Name(id="range"), args=args, keywords=[]) if (
+                self._range_is_builtin
+            ):
+                bounds: list[int] = [
+                    arg.value
+                    for arg in args
+                    if isinstance(arg, ast.Constant) and type(arg.value) is int
+                ]
+                if not 0 < len(bounds) == len(args) <= 3:  # noqa: PLR2004
+                    return None
+                values: range = range(*bounds)
+                if not values or len(values) > self._max_iterations:
+                    return None
+                return [ast.Constant(value) for value in values]
+            case ast.Tuple(elts=elts) | ast.List(elts=elts):
+                if (
+                    not elts
+                    or len(elts) > self._max_iterations
+                    or any(as_constant(elt) is None for elt in elts)
+                ):
+                    return None
+                return elts
+            case _:
+                return None
+
+    def _unroll(self, node: ast.For, in_try: bool) -> list[ast.stmt] | None:
+        if not isinstance(node.target, ast.Name) or node.target.id not in (
+            self._local_names
+        ):
+            return None
+
+        name: str = node.target.id
+        values: list[ast.expr] | None = self._get_values(node.iter)
+        if (
+            values is None
+            or _has_loop_control(node.body)
+            or sum(
+                isinstance(child, ast.stmt)
+                for statement in node.body
+                for child in ast.walk(statement)
+            )
+            > self._max_statements
+            or any(
+                isinstance(child, ast.Name)
+                and child.id == name
+                and not isinstance(child.ctx, ast.Load)
+                for statement in node.body
+                for child in ast.walk(statement)
+            )
+        ):
+            return None
+
+        # An exception could be caught where the loop variable is read
+        assign_each_value: bool = in_try or name in self._assigned_names
+
+        unrolled: list[ast.stmt] = []
+        for value in values:
+            if assign_each_value:
+                unrolled.append(self._assign(name, value))
+            substituter = _LoopVariableSubstituter(name, value)
+            unrolled.extend(
+                substituter.visit(copy.deepcopy(statement)) for statement in node.body
+            )
+
+        if not assign_each_value:
+            unrolled.append(self._assign(name, values[-1]))
+
+        unrolled.extend(node.orelse)
+
+        return unrolled
+
+    @staticmethod
+    def _assign(name: str, value: ast.expr) -> ast.stmt:
+        return ast.Assign([ast.Name(name, ast.Store())], copy.deepcopy(value))
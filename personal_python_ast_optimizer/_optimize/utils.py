@@ -6,11 +6,29 @@ from enum import Enum
 from typing import Any, override
 
 from personal_python_ast_optimizer._log import get_logger
-from personal_python_ast_optimizer.config import TokensToFold, TokensToSkip
+from personal_python_ast_optimizer.config import (
+    FunctionProfile,
+    TargetProfile,
+    TokensToFold,
+    TokensToSkip,
+)
 from personal_python_ast_optimizer.typing import FoldableConstant
 
 _logger = get_logger()
 
+NESTED_SCOPES = (ast.FunctionDef, ast.AsyncFunctionDef, ast.Lambda, ast.ClassDef)
+
+NESTED_SCOPES_WITH_COMPREHENSIONS = (
+    *NESTED_SCOPES,
+    ast.ListComp,
+    ast.SetComp,
+    ast.DictComp,
+    ast.GeneratorExp,
+)
+
+# Calls that can read or change locals by name
+LOCALS_ACCESS: frozenset[str] = frozenset(("locals", "vars", "eval", "exec"))
+
 
 class NodeContext(Enum):
     NONE = 0
@@ -26,6 +44,92 @@ def is_return_literal_none(node: ast.Return) -> bool:
     return isinstance(node.value, ast.Constant) and node.value.value is None
 
 
+def get_import_alias_bound_name(alias: ast.alias) -> str:
+    """Returns the name an import alias binds. `import a.b` binds `a`.
+
+    :param alias: An alias node from an Import or ImportFrom
+    :returns: Name that is bound by the alias"""
+    return alias.asname or alias.name.partition(".")[0]
+
+
+def get_bound_names(node: ast.AST) -> set[str]:  # noqa: C901
+    """Returns all names bound anywhere within node, including nested scopes.
+
+    :param node: An AST node to check
+    :returns: Names of parameters, assignments, imports, definitions and
+    names declared global or nonlocal"""
+    bound_names: set[str] = set()
+
+    for child in ast.walk(node):
+        match child:
+            case ast.Name(id=name, ctx=ast.Store() | ast.Del()):
+                bound_names.add(name)
+            case ast.arg(arg=name):
+                bound_names.add(name)
+            case ast.FunctionDef(name=name) | ast.AsyncFunctionDef(name=name):
+                bound_names.add(name)
+            case ast.ClassDef(name=name):
+                bound_names.add(name)
+            case ast.alias():
+                bound_names.add(get_import_alias_bound_name(child))
+            case ast.Global(names=names) | ast.Nonlocal(names=names):
+                bound_names.update(names)
+            case ast.ExceptHandler(name=str(name)):
+                bound_names.add(name)
+            case ast.MatchAs(name=str(name)) | ast.MatchStar(name=str(name)):
+                bound_names.add(name)
+            case ast.MatchMapping(rest=str(name)):
+                bound_names.add(name)
+
+    return bound_names
+
+
+def as_constant(node: ast.AST) -> ast.Constant | None:
+    """Returns node as a Constant if it is one or is a Tuple made of only constants.
+
+    :param node: An AST node to check
+    :returns: Constant or None if node is not constant"""
+    if isinstance(node, ast.Constant):
+        return node
+
+    if not isinstance(node, ast.Tuple):
+        return None
+
+    values: list[object] = []
+    for elt in node.elts:
+        constant: ast.Constant | None = as_constant(elt)
+        if constant is None:
+            return None
+        values.append(constant.value)
+
+    return ast.Constant(tuple(values))  # type: ignore[arg-type]
+
+
+def build_joined_str(parts: list[str | ast.expr]) -> ast.expr:
+    """Builds an f-string from parts, merging text next to each other.
+
+    :param parts: Text and FormattedValue nodes in order
+    :returns: JoinedStr or a Constant if parts is only text"""
+    values: list[ast.expr] = []
+    text: str = ""
+    for part in parts:
+        if isinstance(part, str):
+            text += part
+        else:
+            if text:
+                values.append(ast.Constant(text))
+                text = ""
+            values.append(part)
+
+    if not values:
+        return ast.Constant(text)
+
+    if text:
+        values.append(ast.Constant(text))
+
+    return ast.JoinedStr(values=values)
+
+
 def get_name_or_full_attribute_id(node: ast.AST) -> str | None:
     """Returns id of Name nodes or full id of Attribute nodes.
 
@@ -64,6 +168,60 @@ def get_full_attribute_id(node: ast.Attribute) -> str | None:
     )
 
 
+def get_target_profile_folds(
+    target_profile: TargetProfile | None,
+) -> tuple[dict[str, FoldableConstant], dict[str, FoldableConstant]]:
+    """Converts a target profile into calls and names/attributes to fold.
+
+    :param target_profile: Profile of the environment code will run in
+    :returns: Tuple of calls to fold and names/attributes to fold"""
+    calls_to_fold: dict[str, FoldableConstant] = {}
+    name_or_attr_to_fold: dict[str, FoldableConstant] = {}
+
+    if target_profile is None:
+        return calls_to_fold, name_or_attr_to_fold
+
+    if target_profile.python_version is not None:
+        for attr, version_part in zip(
+            ("major", "minor", "micro"), target_profile.python_version, strict=False
+        ):
+            name_or_attr_to_fold[f"sys.version_info.{attr}"] = version_part
+
+    if target_profile.platform is not None:
+        name_or_attr_to_fold["sys.platform"] = target_profile.platform
+
+    if target_profile.os_name is not None:
+        name_or_attr_to_fold["os.name"] = target_profile.os_name
+
+    if target_profile.implementation_name is not None:
+        name_or_attr_to_fold["sys.implementation.name"] = (
+            target_profile.implementation_name
+        )
+
+    if target_profile.platform_system is not None:
+        calls_to_fold["platform.system"] = target_profile.platform_system
+
+    return calls_to_fold, name_or_attr_to_fold
+
+
+def get_hot_functions(
+    function_profile: FunctionProfile | None, file_name: str
+) -> set[str] | None:
+    """Returns names of functions in a module called often enough to be hot.
+
+    :param function_profile: Profile of how often functions were called
+    :param file_name: File name of the module
+    :returns: Names of hot functions, or None if every function is treated as hot"""
+    if function_profile is None:
+        return None
+
+    return {
+        name
+        for name, count in function_profile.call_counts.get(file_name, {}).items()
+        if count >= function_profile.min_calls
+    }
+
+
 _UNVISITED = 0
 _VISITED = 1
 
@@ -107,13 +265,21 @@ class _TokensToSkipVisitCounter[T]:
 
 class _TokensToFoldVisitCounter(_TokensToSkipVisitCounter[str]):
     def __init__(
-        self, tokens_to_fold: TokensToFold[str, FoldableConstant] | None
+        self,
+        tokens_to_fold: TokensToFold[str, FoldableConstant] | None,
+        implicit_tokens: dict[str, FoldableConstant],
     ) -> None:
         super().__init__(tokens_to_fold)
         self.map: dict[str, FoldableConstant] = (
             {} if tokens_to_fold is None else tokens_to_fold.tokens
         )
 
+        # Implicit tokens are never warned about and user tokens take priority
+        if implicit_tokens:
+            self.map = {**implicit_tokens, **self.map}
+            for token in implicit_tokens:
+                self._tokens_to_skip.setdefault(token, _VISITED)
+
     @override
     def add(self, key: str, already_visitied: bool) -> None:
         raise NotImplementedError  # pragma: no cover
@@ -122,6 +288,18 @@ class _TokensToFoldVisitCounter(_TokensToSkipVisitCounter[str]):
         return self.map[key]
 
 
+def log_deferred_imports(
+    file_name: str, deferred_imports: dict[str, list[str]]
+) -> None:
+    for import_name, function_names in deferred_imports.items():
+        _logger.info(
+            "%sDeferred import of %s from module load into: %s",
+            f"{file_name}: " if file_name != "" else "",
+            import_name,
+            ", ".join(function_names),
+        )
+
+
 class TokensTracker:
     __slots__ = (
         "assignments_to_skip",
@@ -144,6 +322,9 @@ class TokensTracker:
         module_imports_to_skip: TokensToSkip[str] | None,
         calls_to_fold: TokensToFold[str, FoldableConstant] | None,
         name_or_attr_to_fold: TokensToFold[str, FoldableConstant] | None,
+        *,
+        implicit_calls_to_fold: dict[str, FoldableConstant] | None = None,
+        implicit_name_or_attr_to_fold: dict[str, FoldableConstant] | None = None,
     ) -> None:
         self.assignments_to_skip = _TokensToSkipVisitCounter(assignments_to_skip)
         self.classes_to_skip = _TokensToSkipVisitCounter(classes_to_skip)
@@ -151,8 +332,12 @@ class TokensTracker:
         self.from_imports_to_skip = _TokensToSkipVisitCounter(from_imports_to_skip)
         self.functions_to_skip = _TokensToSkipVisitCounter(functions_to_skip)
         self.module_imports_to_skip = _TokensToSkipVisitCounter(module_imports_to_skip)
-        self.calls_to_fold = _TokensToFoldVisitCounter(calls_to_fold)
-        self.name_or_attr_to_fold = _TokensToFoldVisitCounter(name_or_attr_to_fold)
+        self.calls_to_fold = _TokensToFoldVisitCounter(
+            calls_to_fold, implicit_calls_to_fold or {}
+        )
+        self.name_or_attr_to_fold = _TokensToFoldVisitCounter(
+            name_or_attr_to_fold, implicit_name_or_attr_to_fold or {}
+        )
 
     def warn_not_found_skips(self, file_name: str) -> None:
         for attribute in self.__slots__:
@@ -166,3 +351,16 @@ class TokensTracker:
                     attribute,
                     not_found,
                 )
+
+
+def replace_child(parent: ast.AST, old: ast.expr, new: ast.expr) -> None:
+    """Replaces old with new in the fields of parent.
+
+    :param parent: Node old is a child of
+    :param old: Child to replace
+    :param new: Node to replace it with"""
+    for field, value in ast.iter_fields(parent):
+        if value is old:
+            setattr(parent, field, new)
+        elif isinstance(value, list):
+            value[:] = [new if v is old else v for v in value]
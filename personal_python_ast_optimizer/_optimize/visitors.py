@@ -4,27 +4,278 @@ import ast
 
 from personal_python_ast_optimizer._optimize.base import AstVisitorBase
 from personal_python_ast_optimizer._optimize.typing import AstVisitorProtocol
-from personal_python_ast_optimizer._optimize.utils import get_name_or_full_attribute_id
+from personal_python_ast_optimizer._optimize.utils import (
+    get_bound_names,
+    get_name_or_full_attribute_id,
+)
+
+# Builtin bases that do nothing when subclassed
+SAFE_BUILTIN_BASES: frozenset[str] = frozenset(
+    (
+        "object",
+        "int",
+        "float",
+        "str",
+        "bytes",
+        "tuple",
+        "list",
+        "dict",
+        "set",
+        "frozenset",
+        "BaseException",
+        "Exception",
+        "ValueError",
+        "TypeError",
+        "KeyError",
+        "IndexError",
+        "LookupError",
+        "RuntimeError",
+        "AttributeError",
+        "NotImplementedError",
+        "OSError",
+    )
+)
+
+# Builtin decorators, others could do anything
+SAFE_METHOD_DECORATORS: tuple[str, ...] = ("staticmethod", "classmethod", "property")
+
+# Names that can look up module globals dynamically
+_DYNAMIC_GLOBALS_ACCESS: frozenset[str] = frozenset(
+    ("globals", "locals", "vars", "eval", "exec", "sys.modules")
+)
 
 
 class CallAggregator(AstVisitorBase, AstVisitorProtocol):
-    """Visitor that aggregates all Calls."""
+    """Visitor that aggregates all Calls and other expressions that may have
+    side effects. Calls to functions in excludes are considered side effect free."""
 
-    __slots__ = ("calls", "excludes")
+    __slots__ = ("_calls", "_excludes")
 
     def __init__(self, excludes: set[str]) -> None:
         self._excludes: set[str] = excludes
-        self._calls: list[ast.Call] = []
+        self._calls: list[ast.expr] = []
 
-    def visit(self, node: ast.expr) -> list[ast.Call]:
+    def visit(self, node: ast.expr) -> list[ast.expr]:
         self._visit(node)
         return self._calls
 
-    def visit_Call(self, node: ast.Call) -> ast.Call:
-        if get_name_or_full_attribute_id(node.func) not in self._excludes:
+    def visit_Call(self, node: ast.Call) -> None:
+        if get_name_or_full_attribute_id(node.func) in self._excludes:
+            self._generic_visit(node)
+        else:
+            self._calls.append(node)
+
+    def visit_Lambda(self, _: ast.Lambda) -> None:
+        # Body is not run until called
+        pass
+
+    def visit_NamedExpr(self, node: ast.NamedExpr) -> None:
+        self._calls.append(node)
+
+    def visit_Await(self, node: ast.Await) -> None:
+        self._calls.append(node)
+
+    def visit_Yield(self, node: ast.Yield) -> None:
+        self._calls.append(node)
+
+    def visit_YieldFrom(self, node: ast.YieldFrom) -> None:
+        self._calls.append(node)
+
+    def visit_ListComp(self, node: ast.ListComp) -> None:
+        self._handle_comprehension(node)
+
+    def visit_SetComp(self, node: ast.SetComp) -> None:
+        self._handle_comprehension(node)
+
+    def visit_DictComp(self, node: ast.DictComp) -> None:
+        self._handle_comprehension(node)
+
+    def visit_GeneratorExp(self, node: ast.GeneratorExp) -> None:
+        self._handle_comprehension(node)
+
+    def _handle_comprehension(
+        self, node: ast.ListComp | ast.SetComp | ast.DictComp | ast.GeneratorExp
+    ) -> None:
+        # Calls in a comprehension run per item so they can't be split out
+        comprehension_calls = CallAggregator(self._excludes)
+        comprehension_calls._generic_visit(node)
+        if comprehension_calls._calls:
             self._calls.append(node)
 
-        return node
+
+def is_side_effect_free(node: ast.expr, excludes: set[str]) -> bool:
+    """Checks if evaluating node can have side effects other than raising.
+
+    :param node: Expression to check
+    :param excludes: Functions that have no side effects
+    :returns: True if CallAggregator finds nothing with side effects"""
+    return not CallAggregator(excludes).visit(node)
+
+
+def has_dynamic_globals_access(node: ast.Module) -> bool:
+    """Checks if module globals could be looked up by something other than
+    a name, like globals() or a module level __getattr__.
+
+    :param node: Module to check
+    :returns: True if any global could be accessed dynamically"""
+    if any(
+        isinstance(child, (ast.Name, ast.Attribute))
+        and get_name_or_full_attribute_id(child) in _DYNAMIC_GLOBALS_ACCESS
+        for child in ast.walk(node)
+    ):
+        return True
+
+    return any(
+        isinstance(s, (ast.FunctionDef, ast.AsyncFunctionDef))
+        and s.name in ("__getattr__", "__dir__")
+        for s in node.body
+    )
+
+
+def get_literal_all(node: ast.Module) -> set[str] | None:
+    """Returns names in __all__ if it is a single literal list or tuple of
+    strings. Otherwise, None since exports can't be known.
+
+    :param node: Module to check
+    :returns: Exported names or None if unknown"""
+    exports: set[str] | None = None
+
+    for statement in node.body:
+        if "__all__" not in get_bound_names(statement) and not (
+            isinstance(statement, ast.Expr)
+            and isinstance(statement.value, ast.Call)
+            and isinstance(statement.value.func, ast.Attribute)
+            and get_name_or_full_attribute_id(statement.value.func.value) == "__all__"
+        ):
+            continue
+
+        if (
+            exports is None
+            and isinstance(statement, ast.Assign)
+            and len(statement.targets) == 1
+            and isinstance(statement.targets[0], ast.Name)
+            and isinstance(statement.value, (ast.List, ast.Tuple))
+            and all(
+                isinstance(e, ast.Constant) and isinstance(e.value, str)
+                for e in statement.value.elts
+            )
+        ):
+            exports = {e.value for e in statement.value.elts}  # type: ignore[attr-defined]
+        else:
+            return None
+
+    return exports
+
+
+def get_side_effect_free_bound_names(
+    node: ast.stmt, excludes: set[str]
+) -> set[str] | None:
+    """Returns names bound by node if node can be removed without changing
+    behavior other than those names no longer existing.
+
+    :param node: Statement to check
+    :param excludes: Functions that have no side effects
+    :returns: Names bound by node or None if node could have side effects"""
+    match node:
+        case ast.FunctionDef() | ast.AsyncFunctionDef() | ast.ClassDef() if (
+            is_side_effect_free_definition(node, excludes)
+        ):
+            return {node.name}
+        case ast.Assign(targets=targets, value=value) if all(
+            isinstance(t, ast.Name) for t in targets
+        ) and is_side_effect_free(value, excludes):
+            return {t.id for t in targets}  # type: ignore[attr-defined]
+        case ast.AnnAssign(target=ast.Name(id=name)) if all(
+            n is None or is_side_effect_free(n, excludes)
+            for n in (node.annotation, node.value)
+        ):
+            return {name}
+
+    return None
+
+
+def is_side_effect_free_definition(
+    node: ast.FunctionDef | ast.AsyncFunctionDef | ast.ClassDef,
+    excludes: set[str],
+    safe_decorators: tuple[str, ...] = (),
+) -> bool:
+    """Checks if defining node can have side effects. Decorators, metaclasses
+    and bases not known to be builtins are all considered to have side effects.
+
+    :param node: Definition to check
+    :param excludes: Functions that have no side effects
+    :param safe_decorators: Decorators known to have no side effects
+    :returns: True if defining node has no side effects"""
+    if any(
+        get_name_or_full_attribute_id(d) not in safe_decorators
+        for d in node.decorator_list
+    ):
+        return False
+
+    if isinstance(node, ast.ClassDef):
+        if node.keywords:
+            return False
+
+        # A base defined in this module could have __init_subclass__
+        return all(
+            isinstance(base, ast.Name) and base.id in SAFE_BUILTIN_BASES
+            for base in node.bases
+        ) and all(_is_side_effect_free_class_statement(s, excludes) for s in node.body)
+
+    return all(
+        is_side_effect_free(n, excludes)
+        for n in (
+            *node.args.defaults,
+            *(d for d in node.args.kw_defaults if d is not None),
+            *(
+                a.annotation
+                for a in (
+                    *node.args.posonlyargs,
+                    *node.args.args,
+                    node.args.vararg,
+                    *node.args.kwonlyargs,
+                    node.args.kwarg,
+                )
+                if a is not None and a.annotation is not None
+            ),
+            *((node.returns,) if node.returns is not None else ()),
+        )
+    )
+
+
+def _is_side_effect_free_class_statement(node: ast.stmt, excludes: set[str]) -> bool:
+    match node:
+        case ast.Pass():
+            return True
+        case ast.Expr(value=ast.Constant()):
+            return True
+        case ast.FunctionDef() | ast.AsyncFunctionDef():
+            return is_side_effect_free_definition(
+                node, excludes, SAFE_METHOD_DECORATORS
+            )
+
+    return get_side_effect_free_bound_names(node, excludes) is not None
+
+
+class NameReferenceAggregator(AstVisitorBase, AstVisitorProtocol):
+    """Visitor that aggregates all names and any strings that could be used
+    to look a name up, like in __all__ or getattr."""
+
+    __slots__ = ("_names",)
+
+    def __init__(self) -> None:
+        self._names: set[str] = set()
+
+    def visit(self, node: ast.AST) -> set[str]:
+        self._visit(node)
+        return self._names
+
+    def visit_Name(self, node: ast.Name) -> None:
+        self._names.add(node.id)
+
+    def visit_Constant(self, node: ast.Constant) -> None:
+        if isinstance(node.value, str) and node.value.isidentifier():
+            self._names.add(node.value)
 
 
 class FunctionFoldableLocalsAggregator(AstVisitorBase, AstVisitorProtocol):
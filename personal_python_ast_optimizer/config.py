@@ -1,7 +1,8 @@
 """Config files for running the AST optimizer."""
 
+import logging
 from collections.abc import Iterable
-from enum import Enum
+from enum import Enum, Flag
 from typing import Literal
 
 from personal_python_ast_optimizer.typing import FoldableConstant
@@ -18,6 +19,39 @@ class TypeHintsToSkip(Enum):
         return self != TypeHintsToSkip.NONE
 
 
+class UnusedDefinitionsToSkip(Enum):
+    NONE = 0
+    # Private definitions and public ones missing from __all__ if it is defined
+    NOT_EXPORTED = 1
+    # All definitions, for modules that are never imported from
+    ALL = 2
+
+    def __bool__(self) -> bool:
+        return self != UnusedDefinitionsToSkip.NONE
+
+
+class IdiomRewrites(Flag):
+    NONE = 0
+    # dict() to {}, list() to [], tuple() to () and dict(a=1) to {"a": 1}
+    EMPTY_CALL_TO_LITERAL = 1
+    # set([1, 2]) to {1, 2}, list((1, 2)) to [1, 2] and similar
+    LITERAL_CALL_TO_LITERAL = 2
+    # list(x for x in y) to [x for x in y], set(...) and dict(...) similarly
+    GENERATOR_CALL_TO_COMPREHENSION = 4
+    # for i in range(len(xs)): x = xs[i] to for i, x in enumerate(xs).
+    # Only if xs is always bound to a list, tuple or list comprehension in the
+    # function, so not a parameter, and is not resized in the loop
+    RANGE_LEN_TO_ENUMERATE = 8
+    # result = [] followed by a loop that only appends to result
+    # to a list comprehension
+    APPEND_LOOP_TO_COMPREHENSION = 16
+    # "%s" % (a,), "{}".format(a) and "a" + str(b) to f-strings. Folds f-strings
+    # of constants if fold_constants is also set. Assumes converting a value to
+    # a str does not change the other values in the same string
+    STRING_FORMAT_TO_FSTRING = 32
+    ALL = 63
+
+
 class TokensToSkip[T]:
     __slots__ = ("no_warn", "tokens")
 
@@ -70,9 +104,11 @@ class TokensToSkipConfig:
 
 class TokenTypesToSkipConfig:
     __slots__ = (
+        "logger_names",
         "skip_asserts",
         "skip_dangling_expressions",
         "skip_generics_and_alias",
+        "skip_logging_calls_below_level",
         "skip_type_hints",
     )
 
@@ -83,27 +119,54 @@ class TokenTypesToSkipConfig:
         skip_type_hints: TypeHintsToSkip = TypeHintsToSkip.ALL_BUT_CLASS_VARS,
         skip_generics_and_alias: bool = False,
         skip_asserts: bool = False,
+        skip_logging_calls_below_level: int = logging.NOTSET,
+        logger_names: Iterable[str] | None = None,
     ) -> None:
         if skip_generics_and_alias and skip_type_hints != TypeHintsToSkip.ALL:
             raise ValueError("Can't skip Generics unless all type hints are skipped")
 
+        if (
+            logger_names is not None
+            and skip_logging_calls_below_level == logging.NOTSET
+        ):
+            raise ValueError(
+                "Can't set logger_names if skip_logging_calls_below_level is NOTSET"
+            )
+
         self.skip_dangling_expressions: bool = skip_dangling_expressions
         self.skip_type_hints: TypeHintsToSkip = skip_type_hints
         self.skip_generics_and_alias: bool = skip_generics_and_alias and bool(
             skip_type_hints
         )
         self.skip_asserts: bool = skip_asserts
+        # Statements like `logger.debug(...)` are skipped if their level is
+        # below this, so logging.INFO would skip all debug logs. Only calls on
+        # the logging module, logging.getLogger(...), globals only assigned its
+        # result and logger_names are logging calls, so parser.error(...) is kept
+        self.skip_logging_calls_below_level: int = skip_logging_calls_below_level
+        # Other names or attributes like self.logger that are loggers
+        self.logger_names: Iterable[str] = () if logger_names is None else logger_names
 
 
 _NO_IMPORTS_TO_PRESERVE: list[str] = []
+_NO_DEFINITIONS_TO_PRESERVE: list[str] = []
+# Functions that never return, so code after calling them is unreachable
+_default_no_return_functions: set[str] = {"sys.exit", "os._exit", "os.abort"}
 
 
 class CodeToSkipConfig:
     __slots__ = (
+        "no_return_functions",
+        "skip_dead_stores",
+        "skip_debug_blocks",
         "skip_overload_functions",
+        "skip_type_checking_blocks",
         "skip_typing_cast",
+        "skip_unreachable_code",
+        "skip_unused_definitions",
         "skip_unused_imports",
         "skip_useless_else",
+        "unused_definitions_to_preserve",
         "unused_imports_to_preserve",
     )
 
@@ -115,10 +178,27 @@ class CodeToSkipConfig:
         skip_unused_imports: bool = True,
         unused_imports_to_preserve: Iterable[str] | None = None,
         skip_overload_functions: bool = False,
+        skip_type_checking_blocks: bool = False,
+        skip_debug_blocks: bool = False,
+        skip_unused_definitions: UnusedDefinitionsToSkip = UnusedDefinitionsToSkip.NONE,
+        unused_definitions_to_preserve: Iterable[str] | None = None,
+        skip_dead_stores: bool = False,
+        skip_unreachable_code: bool = False,
+        no_return_functions: Iterable[str] | None = None,
     ) -> None:
         if unused_imports_to_preserve and not skip_unused_imports:
             raise ValueError("Can't preserve imports if skip_unused_imports is False")
 
+        if unused_definitions_to_preserve and not skip_unused_definitions:
+            raise ValueError(
+                "Can't preserve definitions if skip_unused_definitions is NONE"
+            )
+
+        if no_return_functions is not None and not skip_unreachable_code:
+            raise ValueError(
+                "Can't set no_return_functions if skip_unreachable_code is False"
+            )
+
         self.skip_typing_cast: bool = skip_typing_cast
         self.skip_useless_else: bool = skip_useless_else
         self.skip_unused_imports: bool = skip_unused_imports
@@ -128,6 +208,85 @@ class CodeToSkipConfig:
             else unused_imports_to_preserve
         )
         self.skip_overload_functions: bool = skip_overload_functions
+        # Folds typing.TYPE_CHECKING to False
+        self.skip_type_checking_blocks: bool = skip_type_checking_blocks
+        # Folds __debug__ to False like running with python -O
+        self.skip_debug_blocks: bool = skip_debug_blocks
+        self.skip_unused_definitions: UnusedDefinitionsToSkip = skip_unused_definitions
+        self.unused_definitions_to_preserve: Iterable[str] = (
+            _NO_DEFINITIONS_TO_PRESERVE
+            if unused_definitions_to_preserve is None
+            else unused_definitions_to_preserve
+        )
+        # Assignments to locals that are never read and have no side effects
+        self.skip_dead_stores: bool = skip_dead_stores
+        # Statements after a return, raise, break, continue, endless loop
+        # or call to a function in no_return_functions
+        self.skip_unreachable_code: bool = skip_unreachable_code
+        self.no_return_functions: Iterable[str] = (
+            _default_no_return_functions
+            if no_return_functions is None
+            else no_return_functions
+        )
+
+
+class TargetProfile:
+    """Describes the environment the optimized code will run in so version and
+    platform checks can be folded to constants. Values left as None are not folded."""
+
+    __slots__ = (
+        "implementation_name",
+        "os_name",
+        "platform",
+        "platform_system",
+        "python_executable",
+        "python_version",
+    )
+
+    def __init__(
+        self,
+        *,
+        python_version: tuple[int, ...] | None = None,
+        platform: str | None = None,
+        os_name: str | None = None,
+        implementation_name: str | None = None,
+        platform_system: str | None = None,
+        python_executable: str | None = None,
+    ) -> None:
+        if python_version is not None and not 0 < len(python_version) <= 3:  # noqa: PLR2004
+            raise ValueError("python_version must be in the form (major, minor, micro)")
+
+        self.python_version: tuple[int, ...] | None = python_version
+        # Value of sys.platform
+        self.platform: str | None = platform
+        # Value of os.name
+        self.os_name: str | None = os_name
+        # Value of sys.implementation.name
+        self.implementation_name: str | None = implementation_name
+        # Return value of platform.system()
+        self.platform_system: str | None = platform_system
+        # Path to an interpreter like the one the code will run in that
+        # calls_to_evaluate are evaluated in. The running interpreter if None
+        self.python_executable: str | None = python_executable
+
+
+class FunctionProfile:
+    """Number of times functions in each module were called, like in a cProfile
+    run, so optimizations that make code bigger are only applied to hot functions."""
+
+    __slots__ = ("call_counts", "min_calls")
+
+    def __init__(
+        self, call_counts: dict[str, dict[str, int]], *, min_calls: int = 1
+    ) -> None:
+        if min_calls < 1:
+            raise ValueError("min_calls must be at least 1")
+
+        # File name of each module, as passed when optimizing it, to the
+        # number of times functions in it were called by function name
+        self.call_counts: dict[str, dict[str, int]] = call_counts
+        # Times a function needs to have been called to be hot
+        self.min_calls: int = min_calls
 
 
 # Functions that have no side effects and thus are safe to remove
@@ -145,13 +304,31 @@ _default_functions_safe_to_exclude_in_test_expr: set[str] = {
 
 class PerfOptimizationsConfig:
     __slots__ = (
+        "assume_numeric_operands",
+        "calls_to_evaluate",
         "calls_to_fold",
         "collection_concat_to_unpack",
+        "defer_function_only_imports",
+        "eliminate_repeated_lookups",
+        "evaluate_calls_timeout",
         "fold_constants",
         "fold_simple_function_locals",
+        "function_profile",
         "functions_safe_to_exclude_in_test_expr",
+        "hoist_constant_containers",
+        "hoist_loop_invariant_lookups",
+        "idiom_rewrites",
+        "if_chains_to_dict_min_branches",
+        "infer_pure_functions",
+        "inline_simple_functions",
         "name_or_attr_to_fold",
+        "propagate_function_constants",
+        "reorder_bool_op_operands",
+        "simplify_algebra",
         "simplify_named_tuple",
+        "target_profile",
+        "unroll_loops_max_iterations",
+        "unroll_loops_max_statements",
     )
 
     def __init__(
@@ -164,9 +341,41 @@ class PerfOptimizationsConfig:
         functions_safe_to_exclude_in_test_expr: set[str] | None = None,
         collection_concat_to_unpack: bool = False,
         simplify_named_tuple: bool = False,
+        target_profile: TargetProfile | None = None,
+        defer_function_only_imports: bool = False,
+        propagate_function_constants: bool = False,
+        inline_simple_functions: bool = False,
+        hoist_loop_invariant_lookups: bool = False,
+        hoist_constant_containers: bool = False,
+        idiom_rewrites: IdiomRewrites = IdiomRewrites.NONE,
+        simplify_algebra: bool = False,
+        assume_numeric_operands: bool = False,
+        reorder_bool_op_operands: bool = False,
+        if_chains_to_dict_min_branches: int = 0,
+        unroll_loops_max_iterations: int = 0,
+        unroll_loops_max_statements: int = 4,
+        eliminate_repeated_lookups: bool = False,
+        infer_pure_functions: bool = False,
+        calls_to_evaluate: set[str] | None = None,
+        evaluate_calls_timeout: float = 10.0,
+        function_profile: FunctionProfile | None = None,
     ) -> None:
+        if assume_numeric_operands and not simplify_algebra:
+            raise ValueError(
+                "Can't set assume_numeric_operands if simplify_algebra is False"
+            )
+
+        if if_chains_to_dict_min_branches < 0 or if_chains_to_dict_min_branches == 1:
+            raise ValueError("if_chains_to_dict_min_branches must be 0 or at least 2")
+
+        if evaluate_calls_timeout <= 0:
+            raise ValueError("evaluate_calls_timeout must be positive")
+
         self.fold_constants: bool = fold_constants
         self.fold_simple_function_locals: bool = fold_simple_function_locals
+        # Replaces uses of locals with a constant if every assignment that
+        # could reach the use assigns that constant
+        self.propagate_function_constants: bool = propagate_function_constants
 
         self.calls_to_fold: TokensToFold[str, FoldableConstant] | None = calls_to_fold
         self.name_or_attr_to_fold: TokensToFold[str, FoldableConstant] | None = (
@@ -181,11 +390,129 @@ class PerfOptimizationsConfig:
 
         self.collection_concat_to_unpack: bool = collection_concat_to_unpack
         self.simplify_named_tuple: bool = simplify_named_tuple
+        self.target_profile: TargetProfile | None = target_profile
+        # Moves module level imports only used inside functions into those
+        # functions so they are not imported when the module loads
+        self.defer_function_only_imports: bool = defer_function_only_imports
+        # Replaces calls to module level functions that only return a side
+        # effect free expression with that expression
+        self.inline_simple_functions: bool = inline_simple_functions
+        # Binds builtins, imported names, module functions and objects methods
+        # are called on in loops to locals before the loop. Objects are bound
+        # on the first iteration and only in loops over locals or literals.
+        # Assumes modules are not patched and iterating over locals doesn't
+        # reassign attributes while the loop runs
+        self.hoist_loop_invariant_lookups: bool = hoist_loop_invariant_lookups
+        # Moves constant lists, sets and dicts in functions that are only read
+        # to module constants. Lists become tuples and sets become frozensets
+        self.hoist_constant_containers: bool = hoist_constant_containers
+        # Rewrites of slow idioms to faster equivalents where the builtins
+        # they use are not shadowed
+        self.idiom_rewrites: IdiomRewrites = idiom_rewrites
+        # Simplifies expressions that are partly constant, like not not x
+        # in the test of an if or x == True when x is a bool
+        self.simplify_algebra: bool = simplify_algebra
+        # Also simplifies x * 1, x + 0 and x ** 2 and inverts comparisons like
+        # not a < b. Assumes operands of arithmetic and comparisons are ints or
+        # floats, not bools, that are never NaN or -0.0 and that don't overflow
+        self.assume_numeric_operands: bool = assume_numeric_operands
+        # Orders and/or operands in tests of ifs, whiles and similar from cheap
+        # to expensive. Only when every operand is made of names, constants,
+        # ==, !=, is, is not and isinstance checks against builtin types, which
+        # can't raise. Other calls, even to functions_safe_to_exclude_in_test_expr
+        # like int, could raise, so a guard like isinstance(x, str) and int(x)
+        # is never reordered
+        self.reorder_bool_op_operands: bool = reorder_bool_op_operands
+        # Replaces if/elif chains in functions with at least this many branches,
+        # each comparing the same name to str, bytes or int constants with == or
+        # in and returning or assigning the same name a constant, with a lookup
+        # in a module level dict. 0 to disable. Assumes the name is hashable,
+        # since looking up an unhashable value like a list raises TypeError
+        # where comparing it with == doesn't, and that its hash agrees with ==,
+        # which is true of builtins but not enum members compared to their values
+        self.if_chains_to_dict_min_branches: int = if_chains_to_dict_min_branches
+        # Unrolls for loops in functions over constant ranges, tuples and lists
+        # of at most this many values, with the loop variable replaced by each
+        # value. 0 to disable. Loops with a break or continue are not unrolled
+        self.unroll_loops_max_iterations: int = unroll_loops_max_iterations
+        # Most statements the body of a loop can have to be unrolled,
+        # counting statements nested in it
+        self.unroll_loops_max_statements: int = unroll_loops_max_statements
+        # Binds attribute chains like self.a.b and calls to
+        # functions_safe_to_exclude_in_test_expr that are repeated in a block of
+        # statements in a function to a local with := the first time. Assumes
+        # only assignments and calls change attributes and that those functions
+        # return the same value for the same arguments
+        self.eliminate_repeated_lookups: bool = eliminate_repeated_lookups
+        # Treats module level functions as if they were in
+        # functions_safe_to_exclude_in_test_expr when their bodies only bind
+        # locals, return, raise, read globals that are never rebound and call
+        # functions that are in it or are also inferred
+        self.infer_pure_functions: bool = infer_pure_functions
+        # Full names of functions, like platform.machine, whose calls with only
+        # constant arguments are replaced by what they return when called in
+        # target_profile.python_executable. Calls that raise or return something
+        # other than a constant are kept. Assumes the functions return the same
+        # value every time they are called in the environment the code runs in
+        self.calls_to_evaluate: set[str] | None = calls_to_evaluate
+        # Seconds evaluating the calls of a module can take before giving up
+        self.evaluate_calls_timeout: float = evaluate_calls_timeout
+        # Limits inlining, loop unrolling and hoisting loop invariant lookups,
+        # which make code bigger, to functions the profile shows are hot.
+        # Module and class level code, and modules not in the profile, are cold
+        self.function_profile: FunctionProfile | None = function_profile
+
+
+class PackageOptimizationsConfig:
+    """Optimizations that need every module in a package to be optimized together."""
+
+    __slots__ = (
+        "entry_points",
+        "fold_module_constants",
+        "skip_unreachable_definitions",
+        "skip_unreachable_methods",
+    )
+
+    def __init__(
+        self,
+        *,
+        entry_points: Iterable[str] | None = None,
+        skip_unreachable_definitions: bool = False,
+        fold_module_constants: bool = False,
+        skip_unreachable_methods: bool = False,
+    ) -> None:
+        if skip_unreachable_definitions and not entry_points:
+            raise ValueError(
+                "Can't skip unreachable definitions without any entry_points"
+            )
+
+        if skip_unreachable_methods and not skip_unreachable_definitions:
+            raise ValueError(
+                "Can't set skip_unreachable_methods if "
+                "skip_unreachable_definitions is False"
+            )
+
+        # Module names that are run or imported from outside the package.
+        # All their top level names are treated as used, but not names of
+        # modules they import
+        self.entry_points: list[str] = (
+            [] if entry_points is None else list(entry_points)
+        )
+        # Removes functions and classes that entry points can't reach
+        self.skip_unreachable_definitions: bool = skip_unreachable_definitions
+        # Also removes methods whose name is never used as an attribute or
+        # string in reachable code. Assumes code outside the package never
+        # calls methods by name, which is false for methods like write on an
+        # object passed to print(file=...)
+        self.skip_unreachable_methods: bool = skip_unreachable_methods
+        # Folds module level names bound once to a constant in modules importing them
+        self.fold_module_constants: bool = fold_module_constants
 
 
 class OptimizeConfig:
     __slots__ = (
         "code_to_skip",
+        "package_optimizations",
         "perf_optimizations",
         "token_types_to_skip",
         "tokens_to_skip",
@@ -198,6 +525,7 @@ class OptimizeConfig:
         tokens_to_skip: TokensToSkipConfig | None = None,
         token_types_to_skip: TokenTypesToSkipConfig | None = None,
         perf_optimizations: PerfOptimizationsConfig | None = None,
+        package_optimizations: PackageOptimizationsConfig | None = None,
     ) -> None:
         self.code_to_skip: CodeToSkipConfig = (
             CodeToSkipConfig() if code_to_skip is None else code_to_skip
@@ -215,3 +543,8 @@ class OptimizeConfig:
             if perf_optimizations is None
             else perf_optimizations
         )
+        self.package_optimizations: PackageOptimizationsConfig = (
+            PackageOptimizationsConfig()
+            if package_optimizations is None
+            else package_optimizations
+        )
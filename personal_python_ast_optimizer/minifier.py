@@ -88,6 +88,8 @@ class MinifyUnparser(ast._Unparser):  # type: ignore[misc, name-defined]
     def visit(self, node: ast.AST) -> str:
         """Outputs a source code string that, if converted back to an ast
         (using ast.parse) will generate an AST equivalent to *node*"""
+        self._source = []
+        self.previous_node_in_body = None
         self.traverse(node)
         return "".join(self._source)
 
@@ -0,0 +1,46 @@
+"""Loading of profiles of how often functions are called."""
+
+import json
+import os
+import pstats
+
+from personal_python_ast_optimizer.config import FunctionProfile
+
+
+def load_pstats_profile(path: str, root: str, min_calls: int = 1) -> FunctionProfile:
+    """Loads a profile saved by cProfile or profile. Functions outside of root,
+    like builtins, are left out.
+
+    :param path: Path to the saved stats
+    :param root: Directory file names of modules are relative to
+    :param min_calls: Times a function needs to have been called to be hot
+    :returns: Profile keyed by file names relative to root"""
+    stats: pstats.Stats = pstats.Stats(path)
+    root = os.path.abspath(root)
+
+    call_counts: dict[str, dict[str, int]] = {}
+    for (file_name, _, function_name), (_, calls, *_) in stats.stats.items():  # type: ignore[attr-defined]
+        relative_name: str = os.path.relpath(os.path.abspath(file_name), root)
+        if relative_name.startswith(".."):
+            continue
+
+        module_counts: dict[str, int] = call_counts.setdefault(
+            relative_name.replace(os.sep, "/"), {}
+        )
+        # Functions with the same name, like methods of different classes
+        module_counts[function_name] = module_counts.get(function_name, 0) + calls
+
+    return FunctionProfile(call_counts, min_calls=min_calls)
+
+
+def load_json_profile(path: str, min_calls: int = 1) -> FunctionProfile:
+    """Loads a profile from a JSON object of module file names to objects of
+    function names to the number of times they were called.
+
+    :param path: Path to the JSON file
+    :param min_calls: Times a function needs to have been called to be hot
+    :returns: Profile with the counts in the file"""
+    with open(path, encoding="utf-8") as fp:
+        call_counts: dict[str, dict[str, int]] = json.load(fp)
+
+    return FunctionProfile(call_counts, min_calls=min_calls)
@@ -2,21 +2,41 @@
 
 import ast
 
+from personal_python_ast_optimizer._optimize.cse import RepeatedLookupEliminator
+from personal_python_ast_optimizer._optimize.dispatch import IfChainDispatcher
+from personal_python_ast_optimizer._optimize.evaluate import CallEvaluator
+from personal_python_ast_optimizer._optimize.hoisting import ConstantContainerHoister
+from personal_python_ast_optimizer._optimize.idioms import IdiomRewriter
+from personal_python_ast_optimizer._optimize.inliner import FunctionInliner
+from personal_python_ast_optimizer._optimize.package import (
+    UnreachableDefinitionSkipper,
+    get_module_constant_folds,
+)
+from personal_python_ast_optimizer._optimize.purity import get_pure_functions
 from personal_python_ast_optimizer._optimize.transformers import (
     FirstPassOptimizer,
     LastPassOptimizer,
     OptimizationPass,
+    UnusedDefinitionSkipper,
+)
+from personal_python_ast_optimizer._optimize.unroll import LoopUnroller
+from personal_python_ast_optimizer._optimize.utils import (
+    TokensTracker,
+    get_hot_functions,
+    get_target_profile_folds,
+    log_deferred_imports,
 )
-from personal_python_ast_optimizer._optimize.utils import TokensTracker
 from personal_python_ast_optimizer.config import (
     CodeToSkipConfig,
+    IdiomRewrites,
     OptimizeConfig,
+    PackageOptimizationsConfig,
     PerfOptimizationsConfig,
     TokensToSkipConfig,
     TokenTypesToSkipConfig,
 )
 from personal_python_ast_optimizer.minifier import MinifyUnparser
-from personal_python_ast_optimizer.typing import Unparser
+from personal_python_ast_optimizer.typing import FoldableConstant, Unparser
 
 
 def optimize_module(
@@ -30,11 +50,33 @@ def optimize_module(
     :param module: Module to optimize
     :param optimize_config: Config for what is allowed to be optimized
     :param file_name: Optionally used for logging"""
+    _optimize_module(module, optimize_config, file_name, {})
+
+
+def _optimize_module(  # noqa: C901
+    module: ast.Module,
+    optimize_config: OptimizeConfig,
+    file_name: str,
+    module_constants_to_fold: dict[str, FoldableConstant],
+) -> None:
     code_to_skip: CodeToSkipConfig = optimize_config.code_to_skip
     tokens_to_skip: TokensToSkipConfig = optimize_config.tokens_to_skip
     token_types_to_skip: TokenTypesToSkipConfig = optimize_config.token_types_to_skip
     perf_optimizations: PerfOptimizationsConfig = optimize_config.perf_optimizations
 
+    excludes: set[str] = perf_optimizations.functions_safe_to_exclude_in_test_expr
+    if perf_optimizations.infer_pure_functions:
+        excludes = excludes | get_pure_functions(module, excludes)
+
+    hot_functions: set[str] | None = get_hot_functions(
+        perf_optimizations.function_profile, file_name
+    )
+
+    implicit_calls_to_fold, implicit_name_or_attr_to_fold = get_target_profile_folds(
+        perf_optimizations.target_profile
+    )
+    implicit_name_or_attr_to_fold.update(module_constants_to_fold)
+
     tokens_to_skip_tracker = TokensTracker(
         tokens_to_skip.assignments_to_skip,
         tokens_to_skip.classes_to_skip,
@@ -44,13 +86,38 @@ def optimize_module(
         tokens_to_skip.module_imports_to_skip,
         perf_optimizations.calls_to_fold,
         perf_optimizations.name_or_attr_to_fold,
+        implicit_calls_to_fold=implicit_calls_to_fold,
+        implicit_name_or_attr_to_fold=implicit_name_or_attr_to_fold,
+    )
+
+    fold_fstrings: bool = (
+        perf_optimizations.fold_constants
+        and IdiomRewrites.STRING_FORMAT_TO_FSTRING in perf_optimizations.idiom_rewrites
     )
+    if perf_optimizations.idiom_rewrites:
+        IdiomRewriter(perf_optimizations.idiom_rewrites).visit(module)
+
+    if perf_optimizations.unroll_loops_max_iterations:
+        LoopUnroller(
+            perf_optimizations.unroll_loops_max_iterations,
+            perf_optimizations.unroll_loops_max_statements,
+            hot_functions,
+        ).visit(module)
+
+    if perf_optimizations.calls_to_evaluate:
+        CallEvaluator(
+            perf_optimizations.calls_to_evaluate,
+            None
+            if perf_optimizations.target_profile is None
+            else perf_optimizations.target_profile.python_executable,
+            perf_optimizations.evaluate_calls_timeout,
+        ).visit(module)
 
     first_pass = FirstPassOptimizer(
         tokens_to_skip_tracker,
         perf_optimizations.fold_constants,
         perf_optimizations.fold_simple_function_locals,
-        perf_optimizations.functions_safe_to_exclude_in_test_expr,
+        excludes,
         perf_optimizations.collection_concat_to_unpack,
         perf_optimizations.simplify_named_tuple,
         token_types_to_skip.skip_dangling_expressions,
@@ -60,26 +127,127 @@ def optimize_module(
         code_to_skip.skip_typing_cast,
         code_to_skip.skip_overload_functions,
         code_to_skip.skip_useless_else,
+        target_python_version=None
+        if perf_optimizations.target_profile is None
+        else perf_optimizations.target_profile.python_version,
+        skip_type_checking_blocks=code_to_skip.skip_type_checking_blocks,
+        skip_debug_blocks=code_to_skip.skip_debug_blocks,
+        skip_logging_calls_below_level=token_types_to_skip.skip_logging_calls_below_level,
+        logger_names=token_types_to_skip.logger_names,
+        propagate_function_constants=perf_optimizations.propagate_function_constants,
+        skip_dead_stores=code_to_skip.skip_dead_stores,
+        skip_unreachable_code=code_to_skip.skip_unreachable_code,
+        no_return_functions=code_to_skip.no_return_functions,
+        hoist_loop_invariant_lookups=perf_optimizations.hoist_loop_invariant_lookups,
+        fold_fstrings=fold_fstrings,
+        simplify_algebra=perf_optimizations.simplify_algebra,
+        assume_numeric_operands=perf_optimizations.assume_numeric_operands,
+        reorder_bool_op_operands=perf_optimizations.reorder_bool_op_operands,
+        hot_functions=hot_functions,
     )
     first_pass.visit(module)
 
     tokens_to_skip_tracker.warn_not_found_skips(file_name)
 
     additional_pass_needed: bool = first_pass.additional_pass_needed
+    if perf_optimizations.inline_simple_functions and FunctionInliner(
+        excludes, hot_functions
+    ).visit(module):
+        additional_pass_needed = True
+
     if additional_pass_needed:
         optimization_pass = OptimizationPass(
             perf_optimizations.fold_constants,
             perf_optimizations.fold_simple_function_locals,
-            perf_optimizations.functions_safe_to_exclude_in_test_expr,
+            excludes,
+            propagate_function_constants=perf_optimizations.propagate_function_constants,
+            skip_dead_stores=code_to_skip.skip_dead_stores,
+            skip_unreachable_code=code_to_skip.skip_unreachable_code,
+            no_return_functions=code_to_skip.no_return_functions,
+            hoist_loop_invariant_lookups=perf_optimizations.hoist_loop_invariant_lookups,
+            fold_fstrings=fold_fstrings,
+            simplify_algebra=perf_optimizations.simplify_algebra,
+            assume_numeric_operands=perf_optimizations.assume_numeric_operands,
+            reorder_bool_op_operands=perf_optimizations.reorder_bool_op_operands,
+            hot_functions=hot_functions,
         )
         while additional_pass_needed:
             optimization_pass.visit(module)
             additional_pass_needed = optimization_pass.additional_pass_needed
 
-    LastPassOptimizer(
+    if perf_optimizations.if_chains_to_dict_min_branches:
+        IfChainDispatcher(perf_optimizations.if_chains_to_dict_min_branches).visit(
+            module
+        )
+
+    if perf_optimizations.eliminate_repeated_lookups:
+        RepeatedLookupEliminator(excludes).visit(module)
+
+    if perf_optimizations.hoist_constant_containers:
+        ConstantContainerHoister().visit(module)
+
+    UnusedDefinitionSkipper(
+        code_to_skip.skip_unused_definitions,
+        code_to_skip.unused_definitions_to_preserve,
+        excludes,
+    ).visit(module)
+
+    _run_last_pass(module, optimize_config, file_name)
+
+
+def _run_last_pass(
+    module: ast.Module, optimize_config: OptimizeConfig, file_name: str
+) -> None:
+    code_to_skip: CodeToSkipConfig = optimize_config.code_to_skip
+
+    last_pass = LastPassOptimizer(
         code_to_skip.skip_unused_imports,
         code_to_skip.unused_imports_to_preserve,
-    ).visit(module)
+        optimize_config.perf_optimizations.defer_function_only_imports,
+    )
+    last_pass.visit(module)
+
+    log_deferred_imports(file_name, last_pass.deferred_imports)
+
+
+def optimize_modules(
+    modules: dict[str, ast.Module], optimize_config: OptimizeConfig
+) -> None:
+    """Optimizes every module in a package. Allows optimizations that
+    need to know how modules use each other.
+
+    :param modules: Path relative to the root of the package to its module
+    :param optimize_config: Config for what is allowed to be optimized"""
+    package_optimizations: PackageOptimizationsConfig = (
+        optimize_config.package_optimizations
+    )
+
+    module_constant_folds: dict[str, dict[str, FoldableConstant]] = (
+        get_module_constant_folds(modules)
+        if package_optimizations.fold_module_constants
+        else {}
+    )
+
+    for file_name, module in modules.items():
+        _optimize_module(
+            module,
+            optimize_config,
+            file_name,
+            module_constant_folds.get(file_name, {}),
+        )
+
+    if package_optimizations.skip_unreachable_definitions:
+        changed_file_names: list[str] = UnreachableDefinitionSkipper(
+            package_optimizations.entry_points,
+            optimize_config.perf_optimizations.functions_safe_to_exclude_in_test_expr,
+            optimize_config.code_to_skip.skip_unused_imports,
+            optimize_config.code_to_skip.unused_imports_to_preserve,
+            package_optimizations.skip_unreachable_methods,
+        ).visit(modules)
+
+        # Imports only used by removed code can now be removed
+        for file_name in changed_file_names:
+            _run_last_pass(modules[file_name], optimize_config, file_name)
 
 
 def optimize_source(
@@ -112,3 +280,31 @@ def optimize_source_and_minify(
     :param file_name: Optionally used for `ast.parse` and logging
     :returns: Optimized python code"""
     return optimize_source(source, optimize_config, MinifyUnparser(), file_name)
+
+
+def optimize_sources(
+    sources: dict[str, str], optimize_config: OptimizeConfig, unparser: Unparser
+) -> dict[str, str]:
+    """Optimizes the Python code of every module in a package.
+
+    :param sources: Path relative to the root of the package to its code
+    :param optimize_config: Config for what is allowed to be optimized
+    :param unparser: A class that can convert the ast.Module back into python
+    :returns: Path relative to the root of the package to its optimized code"""
+    modules: dict[str, ast.Module] = {
+        file_name: ast.parse(source, file_name) for file_name, source in sources.items()
+    }
+    optimize_modules(modules, optimize_config)
+    return {file_name: unparser.visit(module) for file_name, module in modules.items()}
+
+
+def optimize_sources_and_minify(
+    sources: dict[str, str], optimize_config: OptimizeConfig
+) -> dict[str, str]:
+    """Optimizes the Python code of every module in a package and returns it
+    in a minified format.
+
+    :param sources: Path relative to the root of the package to its code
+    :param optimize_config: Config for what is allowed to be optimized
+    :returns: Path relative to the root of the package to its optimized code"""
+    return optimize_sources(sources, optimize_config, MinifyUnparser())
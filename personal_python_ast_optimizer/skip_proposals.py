@@ -0,0 +1,365 @@
+"""Proposal of tokens to skip from coverage data."""
+
+import ast
+import json
+import os
+
+from personal_python_ast_optimizer._optimize.control_flow import get_statement_lists
+from personal_python_ast_optimizer._optimize.utils import get_name_or_full_attribute_id
+from personal_python_ast_optimizer._optimize.visitors import (
+    get_literal_all,
+    has_dynamic_globals_access,
+)
+from personal_python_ast_optimizer.config import TokensToSkip, TokensToSkipConfig
+
+# Nodes with their own line in coverage data
+_STATEMENTS = (ast.stmt, ast.excepthandler)
+
+_FUNCTIONS = (ast.FunctionDef, ast.AsyncFunctionDef)
+
+_DEFINITIONS = (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)
+
+# Decorators that don't use the function they decorate until it is called
+_HARMLESS_DECORATORS: frozenset[str] = frozenset(
+    (
+        "staticmethod",
+        "classmethod",
+        "property",
+        "dataclass",
+        "dataclasses.dataclass",
+        "functools.cache",
+        "functools.lru_cache",
+        "functools.wraps",
+    )
+)
+
+
+class SkipProposal:
+    """Definitions in a module that never ran, with warnings about why skipping
+    them could still break something."""
+
+    __slots__ = (
+        "classes_to_skip",
+        "functions_to_skip",
+        "module_imports_to_skip",
+        "warnings",
+    )
+
+    def __init__(self) -> None:
+        self.classes_to_skip: list[str] = []
+        self.functions_to_skip: list[str] = []
+        self.module_imports_to_skip: list[str] = []
+        # Risks of the proposal and definitions left out of it
+        self.warnings: list[str] = []
+
+    def to_tokens_to_skip_config(self) -> TokensToSkipConfig:
+        """Returns a config skipping the proposed tokens that warns about any
+        that are not found, like after the module changes.
+
+        :returns: Config to optimize the module with"""
+        return TokensToSkipConfig(
+            classes_to_skip=TokensToSkip(self.classes_to_skip, []),
+            functions_to_skip=TokensToSkip(self.functions_to_skip, []),
+            module_imports_to_skip=TokensToSkip(self.module_imports_to_skip, []),
+        )
+
+
+def _get_name_loads(node: ast.Module) -> list[tuple[ast.Name, int]]:
+    """Returns names loaded in node with the line of the statement loading them."""
+    loads: list[tuple[ast.Name, int]] = []
+    for statement in ast.walk(node):
+        if not isinstance(statement, _STATEMENTS):
+            continue
+
+        stack: list[ast.AST] = [
+            child
+            for child in ast.iter_child_nodes(statement)
+            if not isinstance(child, _STATEMENTS)
+        ]
+        while stack:
+            child: ast.AST = stack.pop()
+            if isinstance(child, ast.Name) and isinstance(child.ctx, ast.Load):
+                loads.append((child, statement.lineno))
+            stack.extend(
+                grandchild
+                for grandchild in ast.iter_child_nodes(child)
+                if not isinstance(grandchild, _STATEMENTS)
+            )
+
+    return loads
+
+
+class _ProposalBuilder:
+    __slots__ = ("_executed_lines", "_kept_names", "_loads", "proposal", "skipped")
+
+    def __init__(self, node: ast.Module, executed_lines: set[int]) -> None:
+        self._executed_lines: set[int] = executed_lines
+        self._loads: list[tuple[ast.Name, int]] = _get_name_loads(node)
+        # Definitions are skipped by name, so a name is kept if any definition
+        # with it ran or wasn't even defined, like one for another platform
+        self._kept_names: set[str] = set()
+        self.proposal = SkipProposal()
+        # Nodes in definitions that are proposed to be skipped
+        self.skipped: set[ast.AST] = set()
+
+    def build(self, node: ast.Module) -> SkipProposal:
+        candidates: list[ast.FunctionDef | ast.AsyncFunctionDef | ast.ClassDef] = []
+        self._find_candidates(node.body, candidates)
+
+        proposed: list[ast.FunctionDef | ast.AsyncFunctionDef | ast.ClassDef] = []
+        for candidate in candidates:
+            if candidate.name in self._kept_names:
+                continue
+
+            line: int | None = self._get_executed_use(candidate)
+            if line is None:
+                proposed.append(candidate)
+            else:
+                self.proposal.warnings.append(
+                    f"Not skipping {candidate.name} since line {line} uses it and ran"
+                )
+
+        for candidate in self._without_unskipped_uses(proposed):
+            if candidate in self.skipped:
+                continue
+
+            if isinstance(candidate, ast.ClassDef):
+                self.proposal.classes_to_skip.append(candidate.name)
+            else:
+                self.proposal.functions_to_skip.append(candidate.name)
+            self.skipped.update(ast.walk(candidate))
+
+        self._propose_imports(node)
+        self._warn_about_exports(node)
+
+        return self.proposal
+
+    def _find_candidates(
+        self,
+        body: list[ast.stmt],
+        candidates: list[ast.FunctionDef | ast.AsyncFunctionDef | ast.ClassDef],
+    ) -> None:
+        """Finds definitions in body that were defined but never ran."""
+        for statement in body:
+            if not isinstance(statement, _DEFINITIONS):
+                for statement_list in get_statement_lists(statement):
+                    self._find_candidates(statement_list, candidates)
+                continue
+
+            if not self._is_dunder(statement.name):
+                self._add_candidate(statement, candidates)
+
+            self._find_candidates(statement.body, candidates)
+
+    def _add_candidate(
+        self,
+        node: ast.FunctionDef | ast.AsyncFunctionDef | ast.ClassDef,
+        candidates: list[ast.FunctionDef | ast.AsyncFunctionDef | ast.ClassDef],
+    ) -> None:
+        if not self._ran(node) or self._body_ran(node):
+            self._kept_names.add(node.name)
+        elif any(
+            get_name_or_full_attribute_id(
+                decorator.func if isinstance(decorator, ast.Call) else decorator
+            )
+            not in _HARMLESS_DECORATORS
+            for decorator in node.decorator_list
+        ):
+            self._kept_names.add(node.name)
+            self.proposal.warnings.append(
+                f"Not skipping {node.name} since its decorator could use it "
+                "without calling it"
+            )
+        else:
+            candidates.append(node)
+
+    @staticmethod
+    def _is_dunder(name: str) -> bool:
+        # Python calls these implicitly, often in code that wasn't covered
+        return name.startswith("__") and name.endswith("__")
+
+    def _ran(self, node: ast.stmt | ast.excepthandler) -> bool:
+        """Checks if node ran. Coverage could record a decorator's line as the
+        line of a definition."""
+        lines: set[int] = {node.lineno}
+        if isinstance(node, _DEFINITIONS):
+            lines.update(decorator.lineno for decorator in node.decorator_list)
+
+        return not lines.isdisjoint(self._executed_lines)
+
+    def _body_ran(
+        self, node: ast.FunctionDef | ast.AsyncFunctionDef | ast.ClassDef
+    ) -> bool:
+        """Checks if any statement in a function's body or a class's methods
+        ran. True if it can't be known, like for a body that is only a docstring."""
+        if isinstance(node, ast.ClassDef):
+            return any(
+                isinstance(statement, _FUNCTIONS) and self._body_ran(statement)
+                for statement in node.body
+            )
+
+        body: list[ast.stmt] = node.body
+        if (
+            isinstance(body[0], ast.Expr)
+            and isinstance(body[0].value, ast.Constant)
+            and isinstance(body[0].value.value, str)
+        ):
+            body = body[1:]
+        if not body:
+            return True
+
+        return any(
+            isinstance(child, _STATEMENTS) and self._ran(child)
+            for statement in body
+            for child in ast.walk(statement)
+        )
+
+    def _get_executed_use(
+        self, node: ast.FunctionDef | ast.AsyncFunctionDef | ast.ClassDef
+    ) -> int | None:
+        """Returns a line that ran and uses node's name outside of node."""
+        inner_nodes: set[ast.AST] = set(ast.walk(node))
+        for name, line in self._loads:
+            if (
+                name.id == node.name
+                and name not in inner_nodes
+                and line in self._executed_lines
+            ):
+                return line
+
+        return None
+
+    def _without_unskipped_uses(
+        self, proposed: list[ast.FunctionDef | ast.AsyncFunctionDef | ast.ClassDef]
+    ) -> list[ast.FunctionDef | ast.AsyncFunctionDef | ast.ClassDef]:
+        """Leaves out definitions used by code that isn't skipped, like an except
+        clause that never ran, since it would fail if that code runs later.
+        Definitions only used by other skipped ones are skipped with them."""
+        while True:
+            skipped: set[ast.AST] = {
+                child for candidate in proposed for child in ast.walk(candidate)
+            }
+            unskipped_uses: dict[str, int] = {}
+            for name, line in self._loads:
+                if name not in skipped and any(
+                    candidate.name == name.id for candidate in proposed
+                ):
+                    unskipped_uses.setdefault(name.id, line)
+
+            if not unskipped_uses:
+                return proposed
+
+            self.proposal.warnings.extend(
+                f"Not skipping {name} since line {line} uses it and isn't skipped"
+                for name, line in unskipped_uses.items()
+            )
+            proposed = [
+                candidate
+                for candidate in proposed
+                if candidate.name not in unskipped_uses
+            ]
+
+    def _propose_imports(self, node: ast.Module) -> None:
+        """Proposes imports only used in skipped definitions."""
+        for statement in node.body:
+            if not isinstance(statement, ast.Import):
+                continue
+
+            for alias in statement.names:
+                bound_name: str = alias.asname or alias.name.partition(".")[0]
+                uses: list[ast.Name] = [
+                    name for name, _ in self._loads if name.id == bound_name
+                ]
+                if uses and all(use in self.skipped for use in uses):
+                    self.proposal.module_imports_to_skip.append(
+                        alias.name if alias.asname is None else alias.asname
+                    )
+                    self.proposal.warnings.append(
+                        f"Skipping import of {alias.name} also skips anything "
+                        "importing it does"
+                    )
+
+    def _warn_about_exports(self, node: ast.Module) -> None:
+        exports: set[str] | None = get_literal_all(node)
+        for statement in node.body:
+            if (
+                isinstance(statement, _DEFINITIONS)
+                and statement in self.skipped
+                and (
+                    statement.name in exports
+                    if exports is not None
+                    else not statement.name.startswith("_")
+                )
+            ):
+                self.proposal.warnings.append(
+                    f"Other modules could import {statement.name}, which fails "
+                    "if it is skipped"
+                )
+
+        if has_dynamic_globals_access(node) and self.skipped:
+            self.proposal.warnings.append(
+                "Globals are accessed dynamically, so skipped definitions could "
+                "still be looked up"
+            )
+
+
+def propose_skips(
+    coverage_path: str, sources: dict[str, str], root: str
+) -> dict[str, SkipProposal]:
+    """Proposes functions, classes and imports to skip in each module from the
+    output of coverage.py's json command. Only definitions that were defined
+    but never ran or were used outside of other proposed definitions are
+    proposed.
+
+    Code that didn't run while collecting coverage could still run later, so
+    proposals should be reviewed with their warnings. Optimizing with the
+    proposed configs warns about tokens that are not found.
+
+    :param coverage_path: Path to the coverage JSON report
+    :param sources: Path relative to root of each module to its code
+    :param root: Directory relative file names in the report are relative to
+    :returns: Path relative to root of each module to its proposal"""
+    with open(coverage_path, encoding="utf-8") as fp:
+        files: dict[str, dict[str, list[int]]] = json.load(fp)["files"]
+
+    executed_lines: dict[str, set[int]] = {
+        os.path.relpath(os.path.join(root, file_name), root).replace(os.sep, "/"): set(
+            data["executed_lines"]
+        )
+        for file_name, data in files.items()
+    }
+
+    proposals: dict[str, SkipProposal] = {}
+    for file_name, source in sources.items():
+        module_lines: set[int] = executed_lines.get(file_name, set())
+        if not module_lines:
+            proposal = SkipProposal()
+            proposal.warnings.append("Never imported, so nothing is proposed")
+            proposals[file_name] = proposal
+            continue
+
+        module: ast.Module = ast.parse(source, file_name)
+        proposals[file_name] = _ProposalBuilder(module, module_lines).build(module)
+
+    return proposals
+
+
+def format_skip_report(proposals: dict[str, SkipProposal]) -> str:
+    """Formats proposals as a report of what to skip in each module.
+
+    :param proposals: Path of each module to its proposal
+    :returns: Report with a section for each module"""
+    lines: list[str] = []
+    for file_name, proposal in proposals.items():
+        lines.append(file_name)
+        for attribute in (
+            "functions_to_skip",
+            "classes_to_skip",
+            "module_imports_to_skip",
+        ):
+            tokens: list[str] = getattr(proposal, attribute)
+            if tokens:
+                lines.append(f"  {attribute}: {', '.join(tokens)}")
+        lines.extend(f"  Warning: {warning}" for warning in proposal.warnings)
+
+    return "\n".join(lines)
@@ -0,0 +1,69 @@
+import platform
+
+import pytest
+
+from personal_python_ast_optimizer.config import PerfOptimizationsConfig, TargetProfile
+from tests.utils import optimize_and_assert_correctness
+
+
+@pytest.mark.parametrize(
+    ("source", "expected"),
+    [
+        (
+            """
+import math
+if math.gcd(12, 18) == 6:
+    print("a")
+else:
+    print("b")""",
+            "print('a')",
+        ),
+        (
+            "import platform\nprint(platform.machine())",
+            f"print({platform.machine()!r})",
+        ),
+        ("print(int('7', base=8))", "print(7)"),
+        ("import posixpath\nprint(posixpath.join('a', 'b'))", "print('a/b')"),
+        ("print(round(1.25, 1), round(2.5))", "print(1.2,2)"),
+        # Not whitelisted
+        ("print(abs(-1))", "print(abs(-1))"),
+        # Arguments that are not constant
+        ("def foo(x):return int(x)", "def foo(x):return int(x)"),
+        ("print(int(*'7'))", "print(int(*'7'))"),
+        # Raises
+        ("print(int('a'))", "print(int('a'))"),
+        ("import math\nprint(math.missing())", "import math\nprint(math.missing())"),
+        # Results that are not constants
+        ("print(list('ab'))", "print(list('ab'))"),
+        ("print(float('nan'))", "print(float('nan'))"),
+    ],
+)
+def test_calls_to_evaluate(source: str, expected: str):
+    optimize_and_assert_correctness(
+        source,
+        expected,
+        perf_optimizations=PerfOptimizationsConfig(
+            fold_constants=True,
+            calls_to_evaluate={
+                "float",
+                "int",
+                "list",
+                "round",
+                "math.gcd",
+                "math.missing",
+                "platform.machine",
+                "posixpath.join",
+            },
+        ),
+    )
+
+
+def test_calls_to_evaluate_missing_python_executable():
+    optimize_and_assert_correctness(
+        "print(int('7'))",
+        "print(int('7'))",
+        perf_optimizations=PerfOptimizationsConfig(
+            calls_to_evaluate={"int"},
+            target_profile=TargetProfile(python_executable="/missing/python"),
+        ),
+    )
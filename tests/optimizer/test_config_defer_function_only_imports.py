@@ -0,0 +1,102 @@
+from unittest.mock import patch
+
+import pytest
+
+from personal_python_ast_optimizer.config import OptimizeConfig, PerfOptimizationsConfig
+from personal_python_ast_optimizer.run import optimize_source_and_minify
+from tests.utils import optimize_and_assert_correctness
+
+
+@pytest.mark.parametrize(
+    ("source", "expected"),
+    [
+        (
+            """
+import json
+import os.path
+from decimal import Decimal, localcontext
+
+def dump(a):
+    \"\"\"Dumps a\"\"\"
+    return json.dumps(a)
+
+class Money:
+    def __init__(self, a):
+        with localcontext():
+            self.a = Decimal(a)
+
+    def exists(self):
+        return os.path.exists(self.a)
+""",
+            """def dump(a):import json;return json.dumps(a)
+class Money:
+\tdef __init__(self,a):
+\t\tfrom decimal import Decimal,localcontext
+\t\twith localcontext():self.a=Decimal(a)
+\tdef exists(self):import os.path;return os.path.exists(self.a)""",
+        ),
+        (
+            """
+import json
+DEFAULT = json.dumps({})
+def dump(a):
+    return json.dumps(a)
+""",
+            "import json\nDEFAULT=json.dumps({})\ndef dump(a):return json.dumps(a)",
+        ),
+        (
+            """
+import json
+from re import compile as re_compile
+
+@re_compile
+def dump(a, b=re_compile):
+    return json.dumps(a)
+
+def dump2(json):
+    return json.dumps(json)
+""",
+            """import json
+from re import compile as re_compile
+@re_compile
+def dump(a,b=re_compile):return json.dumps(a)
+def dump2(json):return json.dumps(json)""",
+        ),
+        (
+            """
+from foo import bar
+__all__ = ["bar"]
+def baz():
+    return bar
+""",
+            "from foo import bar\n__all__=['bar']\ndef baz():return bar",
+        ),
+    ],
+)
+def test_defer_function_only_imports(source: str, expected: str):
+    """Should move imports only used in functions into those functions."""
+    optimize_and_assert_correctness(
+        source,
+        expected,
+        perf_optimizations=PerfOptimizationsConfig(defer_function_only_imports=True),
+    )
+
+
+def test_defer_function_only_imports_logged():
+    """Should log which imports were deferred."""
+    with patch(
+        "personal_python_ast_optimizer._optimize.utils._logger.info"
+    ) as mock_logger_info:
+        optimize_source_and_minify(
+            "import json\ndef dump(a):return json.dumps(a)",
+            OptimizeConfig(
+                perf_optimizations=PerfOptimizationsConfig(
+                    defer_function_only_imports=True
+                )
+            ),
+            "foo.py",
+        )
+
+    mock_logger_info.assert_called_once_with(
+        "%sDeferred import of %s from module load into: %s", "foo.py: ", "json", "dump"
+    )
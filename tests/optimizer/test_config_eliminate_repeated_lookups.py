@@ -0,0 +1,140 @@
+import pytest
+
+from personal_python_ast_optimizer.config import PerfOptimizationsConfig
+from tests.utils import optimize_and_assert_correctness
+
+
+@pytest.mark.parametrize(
+    ("source", "expected"),
+    [
+        (
+            """
+def foo(self, size):
+    low = self.config.limits.min_size
+    high = self.config.limits.max_size
+    if self.config.limits.strict and size < low or size > high:
+        return self.config.limits.default
+    return size""",
+            "def foo(self,size):\n\tlow=(_self_config_limits:=self.config.limits).min_size;high=_self_config_limits.max_size\n\tif _self_config_limits.strict and size<low or size>high:return self.config.limits.default\n\treturn size",  # noqa: E501
+        ),
+        # Stores to other attributes don't change the chain
+        (
+            """
+def foo(self, x):
+    self.config.limits.max_size = x
+    self.config.limits.min_size = x
+    self.config.limits.cap = x""",
+            "def foo(self,x):(_self_config_limits:=self.config.limits).max_size=x;_self_config_limits.min_size=x;_self_config_limits.cap=x",  # noqa: E501
+        ),
+        # Longest repeated chain is bound
+        (
+            """
+def foo(x):
+    return x.a.b.c + x.a.b.c * x.a.b.c""",
+            "def foo(x):return(_x_a_b_c:=x.a.b.c)+_x_a_b_c*_x_a_b_c",
+        ),
+        # Later uses may be conditional, but not the first
+        (
+            """
+def foo(x):
+    return x.a.b or x.a.b.c and x.a.b.d or x.a.b""",
+            "def foo(x):return(_x_a_b:=x.a.b)or(_x_a_b.c and _x_a_b.d)or _x_a_b",
+        ),
+        (
+            """
+def foo(x):
+    valid = isinstance(x.a, int)
+    if isinstance(x.a, int) and x.a > 0:
+        return 1
+    return isinstance(x.a, int)""",
+            "def foo(x):\n\tvalid=(_isinstance:=isinstance(x.a,int))\n\tif _isinstance and x.a>0:return 1\n\treturn isinstance(x.a,int)",  # noqa: E501
+        ),
+        (
+            """
+def foo(x, _x_a_b):
+    print(x.a.b.c, x.a.b.d, x.a.b.e, _x_a_b)""",
+            "def foo(x,_x_a_b):print((_x_a_b_:=x.a.b).c,_x_a_b_.d,_x_a_b_.e,_x_a_b)",
+        ),
+    ],
+)
+def test_eliminate_repeated_lookups(source: str, expected: str):
+    optimize_and_assert_correctness(
+        source,
+        expected,
+        perf_optimizations=PerfOptimizationsConfig(eliminate_repeated_lookups=True),
+    )
+
+
+@pytest.mark.parametrize(
+    ("source", "expected"),
+    [
+        # Calls could change attributes
+        (
+            """
+def foo(x):
+    a = x.a.b.c
+    update(x)
+    return a + x.a.b.d + x.a.b.e""",
+            "def foo(x):a=x.a.b.c;update(x);return a+x.a.b.d+x.a.b.e",
+        ),
+        (
+            """
+def foo(x, y):
+    a = x.a.b.c
+    x.a = y
+    return a + x.a.b.d + x.a.b.e""",
+            "def foo(x,y):a=x.a.b.c;x.a=y;return a+x.a.b.d+x.a.b.e",
+        ),
+        (
+            """
+def foo(x, y):
+    a = x.a.b.c
+    x = y
+    return a + x.a.b.d + x.a.b.e""",
+            "def foo(x,y):a=x.a.b.c;x=y;return a+x.a.b.d+x.a.b.e",
+        ),
+        # Different blocks
+        (
+            """
+def foo(x):
+    a = x.a.b.c
+    for _ in x:
+        a += x.a.b.d
+    return a + x.a.b.e""",
+            "def foo(x):\n\ta=x.a.b.c\n\tfor _ in x:a+=x.a.b.d\n\treturn a+x.a.b.e",
+        ),
+        # First use is conditional
+        (
+            """
+def foo(x):
+    return x.y or x.a.b.c + x.a.b.d + x.a.b.e""",
+            "def foo(x):return x.y or x.a.b.c+x.a.b.d+x.a.b.e",
+        ),
+        # Method lookups are not bound
+        (
+            """
+def foo(x):
+    x.a.b.c()
+    x.a.b.c()""",
+            "def foo(x):x.a.b.c();x.a.b.c()",
+        ),
+        # Only used twice
+        (
+            """
+def foo(x):
+    return x.a.b.c + x.a.b.d""",
+            "def foo(x):return x.a.b.c+x.a.b.d",
+        ),
+        (
+            """
+x.a.b.c + x.a.b.d + x.a.b.e""",
+            "x.a.b.c+x.a.b.d+x.a.b.e",
+        ),
+    ],
+)
+def test_eliminate_repeated_lookups_not_applied(source: str, expected: str):
+    optimize_and_assert_correctness(
+        source,
+        expected,
+        perf_optimizations=PerfOptimizationsConfig(eliminate_repeated_lookups=True),
+    )
@@ -0,0 +1,79 @@
+import pytest
+
+from personal_python_ast_optimizer.config import PackageOptimizationsConfig
+from tests.utils import optimize_package_and_assert_correctness
+
+
+@pytest.mark.parametrize(
+    ("sources", "expected"),
+    [
+        (
+            {
+                "pkg/__init__.py": "from .constants import DEBUG",
+                "pkg/constants.py": """
+from typing import Final
+
+DEBUG = False
+NAME: Final = "app"
+TIMEOUT = 5
+TIMEOUT = 10
+PATCHED = 1
+LOCAL = 2
+
+def f():
+    LOCAL = 3""",
+                "main.py": """
+import pkg.constants
+from pkg import DEBUG
+from pkg.constants import NAME as APP_NAME, TIMEOUT
+
+if DEBUG:
+    print("debug")
+
+print(APP_NAME, pkg.constants.NAME, TIMEOUT, pkg.constants.LOCAL)""",
+                "other.py": """
+import pkg.constants as c
+
+c.PATCHED = 2
+print(c.PATCHED, c.NAME)""",
+            },
+            {
+                "pkg/__init__.py": "",
+                "pkg/constants.py": "DEBUG=False\nNAME='app'\nTIMEOUT=5\nTIMEOUT=10\nPATCHED=1\nLOCAL=2\ndef f():LOCAL=3",  # noqa: E501
+                "main.py": "import pkg.constants\nfrom pkg.constants import TIMEOUT\nprint('app','app',TIMEOUT,pkg.constants.LOCAL)",  # noqa: E501
+                "other.py": "import pkg.constants as c\nc.PATCHED=2\nprint(c.PATCHED,'app')",  # noqa: E501
+            },
+        ),
+        (
+            {
+                "constants.py": "VALUE = 1",
+                "main.py": """
+from constants import VALUE
+
+def f(VALUE):
+    return VALUE""",
+            },
+            {
+                "constants.py": "VALUE=1",
+                "main.py": "from constants import VALUE\ndef f(VALUE):return VALUE",
+            },
+        ),
+        (
+            {
+                "constants.py": "VALUE = 1",
+                "main.py": """
+import constants
+setattr(constants, name, 2)
+print(constants.VALUE)""",
+            },
+            {
+                "constants.py": "VALUE=1",
+                "main.py": "import constants\nsetattr(constants,name,2)\nprint(constants.VALUE)",  # noqa: E501
+            },
+        ),
+    ],
+)
+def test_fold_module_constants(sources: dict[str, str], expected: dict[str, str]):
+    optimize_package_and_assert_correctness(
+        sources, expected, PackageOptimizationsConfig(fold_module_constants=True)
+    )
@@ -0,0 +1,69 @@
+import pytest
+
+from personal_python_ast_optimizer.config import (
+    FunctionProfile,
+    PerfOptimizationsConfig,
+)
+from tests.utils import optimize_and_assert_correctness
+
+_PROFILE = FunctionProfile({"": {"hot": 1000, "warm": 10, "cold": 0}}, min_calls=100)
+
+
+@pytest.mark.parametrize(
+    ("source", "expected"),
+    [
+        (
+            """
+def hot(out):
+    for i in range(2):
+        out.append(i)
+def cold(out):
+    for i in range(2):
+        out.append(i)""",
+            "def hot(out):out.append(0);out.append(1);i=1\ndef cold(out):\n\tfor i in range(2):out.append(i)",  # noqa: E501
+        ),
+        (
+            """
+def double(x):
+    return x * 2
+def hot(x):
+    return double(x)
+def warm(x):
+    return double(x)
+print(double(1))""",
+            "def double(x):return x*2\ndef hot(x):return x*2\ndef warm(x):return double(x)\nprint(double(1))",  # noqa: E501
+        ),
+        (
+            """
+def hot(items):
+    for item in items:
+        print(item)
+def unknown(items):
+    for item in items:
+        print(item)""",
+            "def hot(items):\n\t_print=print\n\tfor item in items:_print(item)\ndef unknown(items):\n\tfor item in items:print(item)",  # noqa: E501
+        ),
+    ],
+)
+def test_function_profile(source: str, expected: str):
+    optimize_and_assert_correctness(
+        source,
+        expected,
+        perf_optimizations=PerfOptimizationsConfig(
+            inline_simple_functions=True,
+            unroll_loops_max_iterations=2,
+            hoist_loop_invariant_lookups=True,
+            function_profile=_PROFILE,
+        ),
+    )
+
+
+def test_function_profile_module_not_in_profile():
+    optimize_and_assert_correctness(
+        "def hot(items):\n\tfor item in items:print(item)",
+        "def hot(items):\n\tfor item in items:print(item)",
+        perf_optimizations=PerfOptimizationsConfig(
+            hoist_loop_invariant_lookups=True,
+            function_profile=FunctionProfile({"other.py": {"hot": 1000}}),
+        ),
+    )
@@ -0,0 +1,122 @@
+import pytest
+
+from personal_python_ast_optimizer.config import PerfOptimizationsConfig
+from tests.utils import optimize_and_assert_correctness
+
+
+@pytest.mark.parametrize(
+    ("source", "expected"),
+    [
+        (
+            """
+def foo(k):
+    table = {"a": 1, "b": 2}
+    return table[k] + table.get(k, 0)""",
+            "_foo_table={'a':1,'b':2}\ndef foo(k):table=_foo_table;return table[k]+table.get(k,0)",  # noqa: E501
+        ),
+        (
+            """
+def foo(k):
+    allowed = {"x", "y"}
+    return k in allowed""",
+            "_foo_allowed=frozenset({'x','y'})\ndef foo(k):allowed=_foo_allowed;return k in allowed",  # noqa: E501
+        ),
+        (
+            """
+def foo(i):
+    order = [3, 1, 2]
+    for j in order:
+        print(order[0], order.index(j), len(order))""",
+            "def foo(i):\n\torder=(3,1,2)\n\tfor j in order:print(order[0],order.index(j),len(order))",  # noqa: E501
+        ),
+        (
+            """
+class A:
+    def foo(self, k):
+        return {"a": 1}.get(k), [1, 2][0], ",".join(["a", "b"])""",
+            "_foo_dict={'a':1}\nclass A:\n\tdef foo(self,k):return(_foo_dict.get(k),(1,2)[0],','.join(('a','b')))",  # noqa: E501
+        ),
+        # Already constants when compiled
+        (
+            """
+def foo(k):
+    return k in {"a", "b"} or k in [1, 2]""",
+            "def foo(k):return k in{'a','b'}or k in[1,2]",
+        ),
+    ],
+)
+def test_hoist_constant_containers(source: str, expected: str):
+    optimize_and_assert_correctness(
+        source,
+        expected,
+        perf_optimizations=PerfOptimizationsConfig(hoist_constant_containers=True),
+    )
+
+
+@pytest.mark.parametrize(
+    ("source", "expected"),
+    [
+        (
+            """
+def foo():
+    a = [1, 2]
+    return a""",
+            "def foo():a=[1,2];return a",
+        ),
+        (
+            """
+def foo():
+    d = {"a": 1}
+    d["b"] = 2
+    s = {1}
+    s.add(2)
+    bar(d, s)""",
+            "def foo():d={'a':1};d['b']=2;s={1};s.add(2);bar(d,s)",
+        ),
+        # Slices, including ones passed as a name, and concatenation of tuples
+        # give tuples
+        (
+            """
+def foo(b):
+    a = [1, 2]
+    return a[1:], a + b, a[b]""",
+            "def foo(b):a=[1,2];return(a[1:],a+b,a[b])",
+        ),
+        (
+            """
+def foo(k):
+    a = [1, 2]
+    if k:
+        a = [3]
+    return a[0]""",
+            "def foo(k):\n\ta=[1,2]\n\tif k:a=[3]\n\treturn a[0]",
+        ),
+        (
+            """
+def foo(len):
+    a = [1, 2]
+    return len(a)""",
+            "def foo(len):a=[1,2];return len(a)",
+        ),
+        (
+            """
+def foo():
+    a = {"a": 1}
+    return locals()""",
+            "def foo():a={'a':1};return locals()",
+        ),
+        (
+            """
+def foo(a):
+    b = [a, 2]
+    return b[0]""",
+            "def foo(a):b=[a,2];return b[0]",
+        ),
+    ],
+)
+def test_hoist_constant_containers_not_hoisted(source: str, expected: str):
+    optimize_and_assert_correctness(
+        source,
+        expected,
+        perf_optimizations=PerfOptimizationsConfig(hoist_constant_containers=True),
+    )
@@ -0,0 +1,158 @@
+import pytest
+
+from personal_python_ast_optimizer.config import PerfOptimizationsConfig
+from tests.utils import optimize_and_assert_correctness
+
+
+@pytest.mark.parametrize(
+    ("source", "expected"),
+    [
+        (
+            """
+import math
+def foo(points, out):
+    for p in points:
+        out.append(math.sqrt(p))
+        if isinstance(p, int):
+            print(len(p))""",
+            "import math\ndef foo(points,out):\n\t_math_sqrt=math.sqrt;_len=len;_print=print;_int=int;_isinstance=isinstance\n\tfor p in points:\n\t\tout.append(_math_sqrt(p))\n\t\tif _isinstance(p,_int):_print(_len(p))",  # noqa: E501
+        ),
+        (
+            """
+class A:
+    def foo(self, items):
+        i = 0
+        while i < len(items):
+            self.items.append(items[i])
+            i += 1""",
+            "class A:\n\tdef foo(self,items):\n\t\ti=0;_self_items=None;_len=len\n\t\twhile i<_len(items):\n\t\t\tif _self_items is None:_self_items=self.items\n\t\t\t_self_items.append(items[i]);i+=1",  # noqa: E501
+        ),
+        # Bound on the first iteration in case the loop never runs
+        (
+            """
+class A:
+    def foo(self, items):
+        for item in items:
+            self.a.items.append(item)""",
+            "class A:\n\tdef foo(self,items):\n\t\t_self_a_items=None\n\t\tfor item in items:\n\t\t\tif _self_a_items is None:_self_a_items=self.a.items\n\t\t\t_self_a_items.append(item)",  # noqa: E501
+        ),
+        (
+            """
+def foo(items, _len):
+    if items:
+        for item in items:
+            len(item)""",
+            "def foo(items,_len):\n\tif items:\n\t\t_len_=len\n\t\tfor item in items:_len_(item)",  # noqa: E501
+        ),
+    ],
+)
+def test_hoist_loop_invariant_lookups(source: str, expected: str):
+    optimize_and_assert_correctness(
+        source,
+        expected,
+        perf_optimizations=PerfOptimizationsConfig(hoist_loop_invariant_lookups=True),
+    )
+
+
+@pytest.mark.parametrize(
+    ("source", "expected"),
+    [
+        # Local, global and nonlocal names could change
+        (
+            """
+def foo(items):
+    for len in items:
+        len()""",
+            "def foo(items):\n\tfor len in items:len()",
+        ),
+        (
+            """
+def foo(items):
+    global len
+    for item in items:
+        len(item)""",
+            "def foo(items):\n\tglobal len\n\tfor item in items:len(item)",
+        ),
+        (
+            """
+len = 1
+def foo(items):
+    for item in items:
+        len(item)""",
+            "len=1\ndef foo(items):\n\tfor item in items:len(item)",
+        ),
+        # Attributes leading to the method could be changed by other methods
+        (
+            """
+class A:
+    def foo(self, items):
+        for item in items:
+            self.items.append(item)
+            self.reset()""",
+            "class A:\n\tdef foo(self,items):\n\t\tfor item in items:self.items.append(item);self.reset()",  # noqa: E501
+        ),
+        # Not bound if the loop never runs, so not used in its else
+        (
+            """
+class A:
+    def foo(self, items):
+        for item in items:
+            self.a.items.append(item)
+        else:
+            self.a.items.append(0)""",
+            "class A:\n\tdef foo(self,items):\n\t\t_self_a_items=None\n\t\tfor item in items:\n\t\t\tif _self_a_items is None:_self_a_items=self.a.items\n\t\t\t_self_a_items.append(item)\n\t\telse:self.a.items.append(0)",  # noqa: E501
+        ),
+        # Iterating could run code that changes the attributes
+        (
+            """
+class A:
+    def foo(self):
+        for item in self.gen():
+            self.items.append(item)""",
+            "class A:\n\tdef foo(self):\n\t\tfor item in self.gen():self.items.append(item)",  # noqa: E501
+        ),
+        # A while's test runs before the body
+        (
+            """
+class A:
+    def foo(self):
+        while self.a.items.pop():
+            pass""",
+            "class A:\n\tdef foo(self):\n\t\twhile self.a.items.pop():pass",
+        ),
+        # Rebound in the loop
+        (
+            """
+def foo(items):
+    out = []
+    for item in items:
+        out.append(item)
+        out = []""",
+            "def foo(items):\n\tout=[]\n\tfor item in items:out.append(item);out=[]",
+        ),
+        # Might not exist so only hoisted if called on every iteration
+        (
+            """
+import os
+def foo(items):
+    for item in items:
+        if item:
+            os.fork()""",
+            "import os\ndef foo(items):\n\t_os=os\n\tfor item in items:\n\t\tif item:_os.fork()",  # noqa: E501
+        ),
+        # Not run in the loop
+        (
+            """
+def foo(items):
+    for item in items:
+        bar(lambda: len(item))""",
+            "def foo(items):\n\tfor item in items:bar(lambda:len(item))",
+        ),
+    ],
+)
+def test_hoist_loop_invariant_lookups_not_hoisted(source: str, expected: str):
+    optimize_and_assert_correctness(
+        source,
+        expected,
+        perf_optimizations=PerfOptimizationsConfig(hoist_loop_invariant_lookups=True),
+    )
@@ -0,0 +1,191 @@
+import pytest
+
+from personal_python_ast_optimizer.config import IdiomRewrites, PerfOptimizationsConfig
+from tests.utils import optimize_and_assert_correctness
+
+
+@pytest.mark.parametrize(
+    ("source", "expected", "idiom_rewrites"),
+    [
+        (
+            "a = dict()\nb = list()\nc = tuple()\nd = dict(a=1, b=c)\ne = set()",
+            "a={}\nb=[]\nc=()\nd={'a':1,'b':c}\ne=set()",
+            IdiomRewrites.EMPTY_CALL_TO_LITERAL,
+        ),
+        (
+            "a = set([1, b])\nc = list((1, 2))\nd = tuple([1])\ne = set([])\nf = dict({1: 2})",  # noqa: E501
+            "a={1,b}\nc=[1,2]\nd=(1,)\ne=set([])\nf={1:2}",
+            IdiomRewrites.LITERAL_CALL_TO_LITERAL,
+        ),
+        (
+            "a = list(x for x in b)\nc = set([x for x in b])\nd = dict((x, 1) for x in b)\ne = tuple(x for x in b)",  # noqa: E501
+            "a=[x for x in b]\nc={x for x in b}\nd={x:1 for x in b}\ne=tuple((x for x in b))",  # noqa: E501
+            IdiomRewrites.GENERATOR_CALL_TO_COMPREHENSION,
+        ),
+        (
+            "a = dict()\nb = list(x for x in c)",
+            "a=dict()\nb=[x for x in c]",
+            IdiomRewrites.GENERATOR_CALL_TO_COMPREHENSION,
+        ),
+        (
+            """
+def foo(ys):
+    xs = [y for y in ys]
+    for i in range(len(xs)):
+        x = xs[i]
+        print(i, x, xs[i - 1])
+    if ys:
+        xs = [(1, 2)]
+    for i in range(len(xs)):
+        a, b = xs[i]""",
+            "def foo(ys):\n\txs=[y for y in ys]\n\tfor i,x in enumerate(xs):print(i,x,xs[i-1])\n\tif ys:xs=[(1,2)]\n\tfor i,(a,b)in enumerate(xs):pass",  # noqa: E501
+            IdiomRewrites.RANGE_LEN_TO_ENUMERATE,
+        ),
+        (
+            """
+def foo(xs):
+    result = []
+    for x in xs:
+        result.append(x * 2)
+    evens = []
+    for z in xs:
+        if z % 2:
+            for y in z:
+                evens.append(y)
+    return result, evens""",
+            "def foo(xs):result=[x*2 for x in xs];evens=[y for z in xs if z%2 for y in z];return(result,evens)",  # noqa: E501
+            IdiomRewrites.APPEND_LOOP_TO_COMPREHENSION,
+        ),
+    ],
+)
+def test_idiom_rewrites(source: str, expected: str, idiom_rewrites: IdiomRewrites):
+    optimize_and_assert_correctness(
+        source,
+        expected,
+        perf_optimizations=PerfOptimizationsConfig(idiom_rewrites=idiom_rewrites),
+    )
+
+
+@pytest.mark.parametrize(
+    ("source", "expected"),
+    [
+        (
+            "def list():\n\tpass\na = list()",
+            "def list():pass\na=list()",
+        ),
+        (
+            "def foo(set):\n\treturn set([1]), dict()",
+            "def foo(set):return(set([1]),{})",
+        ),
+        (
+            "class A:\n\tlist = 1\n\ta = list()",
+            "class A:list=1;a=list()",
+        ),
+        # Length of xs could change
+        (
+            """
+def foo():
+    xs = [1, 2]
+    for i in range(len(xs)):
+        x = xs[i]
+        xs.append(x)""",
+            "def foo():\n\txs=[1,2]\n\tfor i in range(len(xs)):x=xs[i];xs.append(x)",
+        ),
+        (
+            """
+def foo():
+    xs = [1, 2]
+    for i in range(len(xs)):
+        x = xs[i]
+        i += 1""",
+            "def foo():\n\txs=[1,2]\n\tfor i in range(len(xs)):x=xs[i];i+=1",
+        ),
+        # xs could be a dict
+        (
+            """
+def foo(xs):
+    for i in range(len(xs)):
+        x = xs[i]""",
+            "def foo(xs):\n\tfor i in range(len(xs)):x=xs[i]",
+        ),
+        (
+            """
+def foo(ys):
+    xs = [1]
+    xs = ys
+    for i in range(len(xs)):
+        x = xs[i]""",
+            "def foo(ys):\n\txs=[1];xs=ys\n\tfor i in range(len(xs)):x=xs[i]",
+        ),
+        # x is used after the loop
+        (
+            """
+def foo(xs):
+    result = []
+    for x in xs:
+        result.append(x)
+    return result, x""",
+            "def foo(xs):\n\tresult=[]\n\tfor x in xs:result.append(x)\n\treturn(result,x)",  # noqa: E501
+        ),
+        (
+            """
+def foo(xs):
+    result = []
+    for x in xs:
+        result.append(len(result))
+    return result""",
+            "def foo(xs):\n\tresult=[]\n\tfor x in xs:result.append(len(result))\n\treturn result",  # noqa: E501
+        ),
+        (
+            """
+def foo(xs):
+    try:
+        result = []
+        for x in xs:
+            result.append(1 / x)
+    except ZeroDivisionError:
+        return result""",
+            "def foo(xs):\n\ttry:\n\t\tresult=[]\n\t\tfor x in xs:result.append(1/x)\n\texcept ZeroDivisionError:return result",  # noqa: E501
+        ),
+        (
+            """
+from contextlib import suppress
+def foo(xs):
+    with suppress(ZeroDivisionError):
+        result = []
+        for x in xs:
+            result.append(1 / x)
+    return result""",
+            "from contextlib import suppress\ndef foo(xs):\n\twith suppress(ZeroDivisionError):\n\t\tresult=[]\n\t\tfor x in xs:result.append(1/x)\n\treturn result",  # noqa: E501
+        ),
+        (
+            """
+def foo(xs):
+    result = []
+    for x in xs:
+        result.append(x)
+    else:
+        print(1)
+    return result""",
+            "def foo(xs):\n\tresult=[]\n\tfor x in xs:result.append(x)\n\telse:print(1)\n\treturn result",  # noqa: E501
+        ),
+        # A function called in the loop could see the list
+        (
+            """
+def foo(xs):
+    def size():
+        return len(result)
+    result = []
+    for x in xs:
+        result.append(size())
+    return result""",
+            "def foo(xs):\n\tdef size():return len(result)\n\tresult=[]\n\tfor x in xs:result.append(size())\n\treturn result",  # noqa: E501
+        ),
+    ],
+)
+def test_idiom_rewrites_not_rewritten(source: str, expected: str):
+    optimize_and_assert_correctness(
+        source,
+        expected,
+        perf_optimizations=PerfOptimizationsConfig(idiom_rewrites=IdiomRewrites.ALL),
+    )
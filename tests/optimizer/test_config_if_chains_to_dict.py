@@ -0,0 +1,183 @@
+import pytest
+
+from personal_python_ast_optimizer.config import PerfOptimizationsConfig
+from tests.utils import optimize_and_assert_correctness
+
+
+@pytest.mark.parametrize(
+    ("source", "expected"),
+    [
+        (
+            """
+def kind(code):
+    if code == "a":
+        return 1
+    elif code == "b":
+        return 2
+    elif "c" == code:
+        return 3
+    else:
+        return 0""",
+            "_kind_code={'a':1,'b':2,'c':3}\ndef kind(code):return _kind_code.get(code,0)",  # noqa: E501
+        ),
+        (
+            """
+def kind(code):
+    if code == 1:
+        name = "one"
+    elif code in (2, 3):
+        name = "few"
+    elif code == 4:
+        name = "four"
+    else:
+        name = "many"
+    return name""",
+            "_kind_code={1:'one',2:'few',3:'few',4:'four'}\ndef kind(code):name=_kind_code.get(code,'many');return name",  # noqa: E501
+        ),
+        # Only the first of equal keys can match
+        (
+            """
+def kind(code):
+    if code == 1:
+        return "a"
+    elif code == True:
+        return "b"
+    elif code == 2:
+        return "c"
+    else:
+        return None""",
+            "_kind_code={1:'a',2:'c'}\ndef kind(code):return _kind_code.get(code,None)",
+        ),
+        # Else that is not a constant, or no else, keeps the chain's fallthrough
+        (
+            """
+def kind(code):
+    if code == "a":
+        return 1
+    elif code == "b":
+        return 2
+    elif code == "c":
+        return 3
+    else:
+        raise ValueError(code)""",
+            "_kind_code={'a':1,'b':2,'c':3}\ndef kind(code):\n\tif code in _kind_code:return _kind_code[code]\n\traise ValueError(code)",  # noqa: E501
+        ),
+        (
+            """
+def kind(code):
+    for c in code:
+        if c == "a":
+            x = 1
+        elif c == "b":
+            x = 2
+        elif c == "c":
+            x = 3
+        print(x)""",
+            "_kind_c={'a':1,'b':2,'c':3}\ndef kind(code):\n\tfor c in code:\n\t\tif c in _kind_c:x=_kind_c[c]\n\t\tprint(x)",  # noqa: E501
+        ),
+        (
+            """
+_kind_code = 1
+def kind(code):
+    if code == "a":
+        return 1
+    elif code == "b":
+        return 2
+    elif code == "c":
+        return 3
+    return _kind_code""",
+            "_kind_code=1\n_kind_code_={'a':1,'b':2,'c':3}\ndef kind(code):\n\tif code in _kind_code_:return _kind_code_[code]\n\treturn _kind_code",  # noqa: E501
+        ),
+    ],
+)
+def test_if_chains_to_dict(source: str, expected: str):
+    optimize_and_assert_correctness(
+        source,
+        expected,
+        perf_optimizations=PerfOptimizationsConfig(if_chains_to_dict_min_branches=3),
+    )
+
+
+@pytest.mark.parametrize(
+    ("source", "expected"),
+    [
+        # Too few branches
+        (
+            """
+def kind(code):
+    if code == "a":
+        return 1
+    elif code == "b":
+        return 2
+    else:
+        return 0""",
+            "def kind(code):\n\tif code=='a':return 1\n\tif code=='b':return 2\n\treturn 0",  # noqa: E501
+        ),
+        # Different names compared
+        (
+            """
+def kind(code, other):
+    if code == "a":
+        return 1
+    elif other == "b":
+        return 2
+    elif code == "c":
+        return 3""",
+            "def kind(code,other):\n\tif code=='a':return 1\n\tif other=='b':return 2\n\tif code=='c':return 3",  # noqa: E501
+        ),
+        # Values that are not constants
+        (
+            """
+def kind(code):
+    if code == "a":
+        return len(code)
+    elif code == "b":
+        return 2
+    elif code == "c":
+        return 3""",
+            "def kind(code):\n\tif code=='a':return len(code)\n\tif code=='b':return 2\n\tif code=='c':return 3",  # noqa: E501
+        ),
+        # Keys whose hash may not agree with ==
+        (
+            """
+def kind(code):
+    if code == 1.5:
+        return 1
+    elif code == 2.5:
+        return 2
+    elif code == 3.5:
+        return 3""",
+            "def kind(code):\n\tif code==1.5:return 1\n\tif code==2.5:return 2\n\tif code==3.5:return 3",  # noqa: E501
+        ),
+        # Different targets
+        (
+            """
+def kind(code):
+    if code == "a":
+        x = 1
+    elif code == "b":
+        y = 2
+    elif code == "c":
+        x = 3
+    return x""",
+            "def kind(code):\n\tif code=='a':x=1\n\telif code=='b':y=2\n\telif code=='c':x=3\n\treturn x",  # noqa: E501
+        ),
+        # Not in a function
+        (
+            """
+if code == "a":
+    x = 1
+elif code == "b":
+    x = 2
+elif code == "c":
+    x = 3""",
+            "if code=='a':x=1\nelif code=='b':x=2\nelif code=='c':x=3",
+        ),
+    ],
+)
+def test_if_chains_to_dict_not_applied(source: str, expected: str):
+    optimize_and_assert_correctness(
+        source,
+        expected,
+        perf_optimizations=PerfOptimizationsConfig(if_chains_to_dict_min_branches=3),
+    )
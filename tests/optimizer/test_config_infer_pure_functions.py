@@ -0,0 +1,122 @@
+import pytest
+
+from personal_python_ast_optimizer.config import (
+    CodeToSkipConfig,
+    PerfOptimizationsConfig,
+)
+from tests.utils import optimize_and_assert_correctness
+
+
+@pytest.mark.parametrize(
+    ("source", "expected"),
+    [
+        (
+            """
+LIMIT = 3
+def double(x):
+    return x * 2
+def is_big(x):
+    if x > LIMIT:
+        return True
+    y = double(x)
+    return y > LIMIT
+def foo(x):
+    if is_big(x):
+        pass""",
+            "LIMIT=3\ndef double(x):return x*2\ndef is_big(x):\n\tif x>LIMIT:return True\n\ty=double(x);return y>LIMIT\ndef foo(x):pass",  # noqa: E501
+        ),
+        # Functions calling each other
+        (
+            """
+def even(n):
+    return n == 0 or odd(n - 1)
+def odd(n):
+    return n != 0 and even(n - 1)
+def foo(x):
+    if even(x):
+        pass""",
+            "def even(n):return n==0 or odd(n-1)\ndef odd(n):return n!=0 and even(n-1)\ndef foo(x):pass",  # noqa: E501
+        ),
+        (
+            """
+def log(x):
+    print(x)
+def uses_log(x):
+    return log(x)
+def foo(x):
+    if uses_log(x):
+        pass""",
+            "def log(x):print(x)\ndef uses_log(x):return log(x)\ndef foo(x):uses_log(x)",  # noqa: E501
+        ),
+        # Globals that are rebound could change
+        (
+            """
+count = 0
+def get_count():
+    return count
+def foo():
+    global count
+    count += 1
+    if get_count():
+        pass""",
+            "count=0\ndef get_count():return count\ndef foo():global count;count+=1;get_count()",  # noqa: E501
+        ),
+        (
+            """
+def store(x):
+    x.y = 1
+def decorated(x):
+    return x
+decorated = cache(decorated)
+def foo(x):
+    if store(x):
+        pass
+    if decorated(x):
+        pass""",
+            "def store(x):x.y=1\ndef decorated(x):return x\ndecorated=cache(decorated)\ndef foo(x):store(x);decorated(x)",  # noqa: E501
+        ),
+    ],
+)
+def test_infer_pure_functions(source: str, expected: str):
+    optimize_and_assert_correctness(
+        source,
+        expected,
+        perf_optimizations=PerfOptimizationsConfig(infer_pure_functions=True),
+    )
+
+
+@pytest.mark.parametrize(
+    ("source", "expected"),
+    [
+        # Parameter with the same name as a pure function
+        (
+            """
+def key(x):
+    return x
+def foo(items, key):
+    r = key(items)
+    return key(1), key(1)""",
+            "def key(x):return x\ndef foo(items,key):r=key(items);return(key(1),key(1))",  # noqa: E501
+        ),
+        # Local with the same name as a pure function
+        (
+            """
+def key(x):
+    return x
+def foo(items):
+    key = items.pop
+    r = key(0)
+    return key(1), key(1)""",
+            "def key(x):return x\ndef foo(items):key=items.pop;r=key(0);return(key(1),key(1))",  # noqa: E501
+        ),
+    ],
+)
+def test_infer_pure_functions_shadowed(source: str, expected: str):
+    optimize_and_assert_correctness(
+        source,
+        expected,
+        perf_optimizations=PerfOptimizationsConfig(
+            infer_pure_functions=True, eliminate_repeated_lookups=True
+        ),
+        code_to_skip=CodeToSkipConfig(skip_dead_stores=True),
+    )
@@ -0,0 +1,129 @@
+import pytest
+
+from personal_python_ast_optimizer.config import PerfOptimizationsConfig
+from tests.utils import optimize_and_assert_correctness
+
+
+@pytest.mark.parametrize(
+    ("source", "expected"),
+    [
+        (
+            """
+def _key(x):
+    return x[0]
+def foo(items):
+    return sorted(items, key=lambda i: _key(i)), _key(items)""",
+            "def foo(items):return(sorted(items,key=lambda i:i[0]),items[0])",
+        ),
+        (
+            """
+def _is_ok(s, status):
+    return s.status == status
+def foo(items):
+    return[i for i in items if _is_ok(i, status=1)]""",
+            "def foo(items):return[i for i in items if i.status==1]",
+        ),
+        (
+            """
+def _twice(x):
+    return x * 2
+a = _twice(b + 1)""",
+            "a=(b+1)*2",
+        ),
+        (
+            """
+def is_ok(s):
+    return s.status == 1
+a = is_ok(b)""",
+            "def is_ok(s):return s.status==1\na=b.status==1",
+        ),
+        (
+            """
+__all__ = ["foo"]
+def helper(s):
+    return s.status == 1
+def foo(b):
+    return helper(b)""",
+            "__all__=['foo']\ndef foo(b):return b.status==1",
+        ),
+    ],
+)
+def test_inline_simple_functions(source: str, expected: str):
+    optimize_and_assert_correctness(
+        source,
+        expected,
+        perf_optimizations=PerfOptimizationsConfig(inline_simple_functions=True),
+    )
+
+
+@pytest.mark.parametrize(
+    ("source", "expected"),
+    [
+        # Argument evaluated twice
+        (
+            """
+def _square(x):
+    return x * x
+a = _square(foo())""",
+            "def _square(x):return x*x\na=_square(foo())",
+        ),
+        # Side effects in body
+        (
+            """
+def _get(x):
+    return foo(x)
+a = _get(b)""",
+            "def _get(x):return foo(x)\na=_get(b)",
+        ),
+        # Free name shadowed at the call site
+        (
+            """
+def _scale(x):
+    return x * factor
+def foo(factor):
+    return _scale(factor)""",
+            "def _scale(x):return x*factor\ndef foo(factor):return _scale(factor)",
+        ),
+        # Function name shadowed at the call site
+        (
+            """
+def _scale(x):
+    return x * 2
+def foo(_scale):
+    return _scale(1)""",
+            "def _scale(x):return x*2\ndef foo(_scale):return _scale(1)",
+        ),
+        # Rebound later
+        (
+            """
+def _scale(x):
+    return x * 2
+a = _scale(1)
+_scale = abs""",
+            "def _scale(x):return x*2\na=_scale(1)\n_scale=abs",
+        ),
+        # Wrong number of arguments raises at runtime
+        (
+            """
+def _scale(x):
+    return x * 2
+a = _scale(1, 2)""",
+            "def _scale(x):return x*2\na=_scale(1,2)",
+        ),
+        # Could be looked up dynamically
+        (
+            """
+def _scale(x):
+    return x * 2
+a = _scale(1)
+b = globals()""",
+            "def _scale(x):return x*2\na=_scale(1)\nb=globals()",
+        ),
+    ],
+)
+def test_inline_simple_functions_not_inlined(source: str, expected: str):
+    optimize_and_assert_correctness(
+        source,
+        expected,
+        perf_optimizations=PerfOptimizationsConfig(inline_simple_functions=True),
+    )
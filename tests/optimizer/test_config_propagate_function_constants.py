@@ -0,0 +1,112 @@
+import pytest
+
+from personal_python_ast_optimizer.config import PerfOptimizationsConfig
+from tests.utils import optimize_and_assert_correctness
+
+
+@pytest.mark.parametrize(
+    ("source", "expected"),
+    [
+        (
+            """
+def foo():
+    unit = "kb"
+    size = 2.5
+    scale = size * 2
+    if scale > 4:
+        print(unit)
+    return scale""",
+            "def foo():unit='kb';size=2.5;scale=5.0;print('kb');return 5.0",
+        ),
+        (
+            """
+def foo(a):
+    if a:
+        mode = "r"
+    else:
+        mode = "r"
+    return open(a, mode)""",
+            "def foo(a):\n\tif a:mode='r'\n\telse:mode='r'\n\treturn open(a,'r')",
+        ),
+        (
+            """
+def foo(a):
+    mode = "r"
+    if a:
+        mode = "w"
+    return mode""",
+            "def foo(a):\n\tmode='r'\n\tif a:mode='w'\n\treturn mode",
+        ),
+        (
+            """
+def foo(items):
+    total = 0
+    step = 2
+    for item in items:
+        print(total, step)
+        total = total + step
+    return total""",
+            "def foo(items):\n\ttotal=0;step=2\n\tfor item in items:print(total,2);total=total+2\n\treturn total",  # noqa: E501
+        ),
+        (
+            """
+def foo():
+    a = (1, "b")
+    b = a
+    return [a for a in range(3)], lambda: b, b""",
+            "def foo():a=(1,'b');b=(1,'b');return([a for a in range(3)],lambda:b,(1,'b'))",  # noqa: E501
+        ),
+        (
+            """
+def foo():
+    a = 1
+    def bar():
+        nonlocal a
+        a = 2
+    bar()
+    return a""",
+            "def foo():\n\ta=1\n\tdef bar():nonlocal a;a=2\n\tbar();return a",
+        ),
+        (
+            """
+def foo():
+    a = 1
+    try:
+        a = 2
+        bar()
+    except Exception:
+        return a
+    finally:
+        print(a)
+    return a""",
+            "def foo():\n\ta=1\n\ttry:a=2;bar()\n\texcept Exception:return a\n\tfinally:print(a)\n\treturn a",  # noqa: E501
+        ),
+        (
+            """
+def foo():
+    a = 1
+    print(a, (a := 2), a)""",
+            "def foo():a=1;print(a,(a:=2),a)",
+        ),
+        # Targets are assigned left to right
+        (
+            """
+def foo(a):
+    x = 0
+    x = a[x] = 5
+    y = 0
+    y, a[y] = 1, 2
+    z = 0
+    a[z] = z = 3""",
+            "def foo(a):x=0;x=a[x]=5;y=0;y,a[y]=(1,2);z=0;a[0]=z=3",
+        ),
+    ],
+)
+def test_propagate_function_constants(source: str, expected: str):
+    optimize_and_assert_correctness(
+        source,
+        expected,
+        perf_optimizations=PerfOptimizationsConfig(
+            fold_constants=True, propagate_function_constants=True
+        ),
+    )
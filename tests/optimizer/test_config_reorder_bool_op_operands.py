@@ -0,0 +1,46 @@
+import pytest
+
+from personal_python_ast_optimizer.config import PerfOptimizationsConfig
+from tests.utils import optimize_and_assert_correctness
+
+
+@pytest.mark.parametrize(
+    ("source", "expected"),
+    [
+        (
+            "if isinstance(a, int) and b:\n\tc()",
+            "if b and isinstance(a,int):c()",
+        ),
+        (
+            "while isinstance(a, int) or b == 1 or c is None:\n\td()",
+            "while b==1 or c is None or isinstance(a,int):d()",
+        ),
+        (
+            "a = [i for i in b if not (isinstance(i, str) and c)]",
+            "a=[i for i in b if not(c and isinstance(i,str))]",
+        ),
+        (
+            "a = b if isinstance(c, int) and d else e",
+            "a=b if d and isinstance(c,int)else e",
+        ),
+        # Could raise, have side effects or the value is used
+        (
+            "if hasattr(a, 'b') and a.b and c:\n\td()",
+            "if hasattr(a,'b')and a.b and c:d()",
+        ),
+        ("if f(a) and b:\n\tc()", "if f(a)and b:c()"),
+        (
+            "if isinstance(a, str) and int(a):\n\tc()",
+            "if isinstance(a,str)and int(a):c()",
+        ),
+        ("if isinstance(a, B) and c:\n\td()", "if isinstance(a,B)and c:d()"),
+        ("if isinstance(a, int) and b < 1:\n\tc()", "if isinstance(a,int)and b<1:c()"),
+        ("a = isinstance(b, int) and c", "a=isinstance(b,int)and c"),
+    ],
+)
+def test_reorder_bool_op_operands(source: str, expected: str):
+    optimize_and_assert_correctness(
+        source,
+        expected,
+        perf_optimizations=PerfOptimizationsConfig(reorder_bool_op_operands=True),
+    )
@@ -0,0 +1,56 @@
+import pytest
+
+from personal_python_ast_optimizer.config import PerfOptimizationsConfig
+from tests.utils import optimize_and_assert_correctness
+
+
+@pytest.mark.parametrize(
+    ("source", "expected"),
+    [
+        (
+            "while not not a and (b is None) == True:\n\tc()",
+            "while a and b is None:c()",
+        ),
+        ("if (a in b) == False:\n\tc()", "if a not in b:c()"),
+        ("a = [i for i in b if not not i]", "a=[i for i in b if i]"),
+        ("a = b if not not c else d", "a=b if c else d"),
+        ("a = not (not not b)", "a=not b"),
+        ("a = not b is c", "a=b is not c"),
+        # Not only used for truthiness or could be a number
+        ("a = not not b", "a=not not b"),
+        ("if a == True:\n\tc()", "if a==True:c()"),
+        ("if (a < b) == False:\n\tc()", "if(a<b)==False:c()"),
+        ("a = not b < c", "a=not b<c"),
+        ("a = b * 1 + 0", "a=b*1+0"),
+    ],
+)
+def test_simplify_algebra(source: str, expected: str):
+    optimize_and_assert_correctness(
+        source,
+        expected,
+        perf_optimizations=PerfOptimizationsConfig(simplify_algebra=True),
+    )
+
+
+@pytest.mark.parametrize(
+    ("source", "expected"),
+    [
+        ("a = b ** 2", "a=b*b"),
+        ("a = 1 * b * 1 + 0 - 0", "a=b"),
+        ("a = 0 + b ** 1", "a=b"),
+        ("a = not b < c\nd = not b == c", "a=b>=c\nd=b!=c"),
+        ("if (a < b) == False:\n\tc()", "if a>=b:c()"),
+        # Types would change or b() would be called twice
+        ("a = b * 1.0 + True", "a=b*1.0+True"),
+        ("a = b() ** 2", "a=b()**2"),
+        ("a = not b < c < d", "a=not b<c<d"),
+    ],
+)
+def test_simplify_algebra_assume_numeric_operands(source: str, expected: str):
+    optimize_and_assert_correctness(
+        source,
+        expected,
+        perf_optimizations=PerfOptimizationsConfig(
+            simplify_algebra=True, assume_numeric_operands=True
+        ),
+    )
@@ -0,0 +1,116 @@
+import pytest
+
+from personal_python_ast_optimizer.config import (
+    CodeToSkipConfig,
+    PerfOptimizationsConfig,
+)
+from tests.utils import optimize_and_assert_correctness
+
+
+@pytest.mark.parametrize(
+    ("source", "expected"),
+    [
+        (
+            """
+def foo():
+    a = 1
+    b = a + 1
+    c = str(b)
+    d = bar()
+    return 2""",
+            "def foo():d=bar();return 2",
+        ),
+        (
+            """
+def foo(a):
+    b = 1
+    if a:
+        b = 2
+    else:
+        b = 3
+    return b""",
+            "def foo(a):\n\tif a:b=2\n\telse:b=3\n\treturn b",
+        ),
+        (
+            """
+def foo(items):
+    total = 0
+    for item in items:
+        last = item
+        total = total + item
+    return total""",
+            "def foo(items):\n\ttotal=0\n\tfor item in items:total=total+item\n\treturn total",  # noqa: E501
+        ),
+        (
+            """
+def foo(items):
+    found = 0
+    for item in items:
+        if item:
+            found = 1
+            break
+        found = 2
+    return found""",
+            "def foo(items):\n\tfound=0\n\tfor item in items:\n\t\tif item:found=1;break\n\t\tfound=2\n\treturn found",  # noqa: E501
+        ),
+        (
+            """
+def foo():
+    a = 1
+    try:
+        a = 2
+        bar()
+        a = 3
+    except Exception:
+        return a
+    return 1""",
+            "def foo():\n\ta=1\n\ttry:a=2;bar();a=3\n\texcept Exception:return a\n\treturn 1",  # noqa: E501
+        ),
+        (
+            """
+def foo():
+    a = 1
+    def bar():
+        return a
+    b = 1
+    c = 1
+    return bar""",
+            "def foo():\n\ta=1\n\tdef bar():return a\n\treturn bar",
+        ),
+        (
+            """
+def foo():
+    global a
+    a = 1
+    print(b)
+    b = 1""",
+            "def foo():global a;a=1;print(b);b=1",
+        ),
+        (
+            """
+def foo():
+    a = 1
+    return locals()""",
+            "def foo():a=1;return locals()",
+        ),
+    ],
+)
+def test_skip_dead_stores(source: str, expected: str):
+    optimize_and_assert_correctness(
+        source, expected, code_to_skip=CodeToSkipConfig(skip_dead_stores=True)
+    )
+
+
+def test_skip_dead_stores_after_propagation():
+    optimize_and_assert_correctness(
+        """
+def foo():
+    unit = "kb"
+    size = 2.5 * 2
+    return str(size) + unit""",
+        "def foo():return str(5.0)+'kb'",
+        code_to_skip=CodeToSkipConfig(skip_dead_stores=True),
+        perf_optimizations=PerfOptimizationsConfig(
+            fold_constants=True, propagate_function_constants=True
+        ),
+    )
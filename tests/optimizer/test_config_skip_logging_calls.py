@@ -0,0 +1,86 @@
+import logging
+
+import pytest
+
+from personal_python_ast_optimizer.config import TokenTypesToSkipConfig
+from tests.utils import optimize_and_assert_correctness
+
+
+@pytest.mark.parametrize(
+    ("source", "expected"),
+    [
+        (
+            """
+import logging
+log = logging.getLogger(__name__)
+def foo(a):
+    log.debug("a is %s", a)
+    self.logger.info("info")
+    logging.warning("warning")
+    return a""",
+            """import logging
+log=logging.getLogger(__name__)
+def foo(a):logging.warning('warning');return a""",
+        ),
+        (
+            "logger.log(logging.DEBUG, 'a')\nlogger.log(40, 'b')",
+            "logger.log(40,'b')",
+        ),
+        (
+            "logger.debug('%s %s', str(a), compute(b))",
+            "compute(b)",
+        ),
+        (
+            "logging.getLogger(a()).debug('%s', b)",
+            "logging.getLogger(a())",
+        ),
+        (
+            "logger.debug('%s', [process(x) for x in a])\nlogger.debug(lambda: foo())",
+            "[process(x)for x in a]",
+        ),
+        (
+            "warnings.warn('deprecated')\nprint(logger.debug('a'))",
+            "warnings.warn('deprecated')\nprint(logger.debug('a'))",
+        ),
+    ],
+)
+def test_skip_logging_calls(source: str, expected: str):
+    """Should remove logging calls below the configured level."""
+    optimize_and_assert_correctness(
+        source,
+        expected,
+        token_types_to_skip=TokenTypesToSkipConfig(
+            skip_logging_calls_below_level=logging.WARNING,
+            logger_names={"logger", "self.logger"},
+        ),
+    )
+
+
+@pytest.mark.parametrize(
+    ("source", "expected"),
+    [
+        (
+            "import logging\nparser.error('bad')\nlogging.error('bad')",
+            "parser.error('bad')",
+        ),
+        # Rebound so it might not be a logger
+        (
+            "import logging\nlog = logging.getLogger()\nlog = parser\nlog.error('bad')",
+            "import logging\nlog=logging.getLogger()\nlog=parser\nlog.error('bad')",
+        ),
+    ],
+)
+def test_skip_logging_calls_only_on_loggers(source: str, expected: str):
+    """Should keep calls with the names of logging methods on other objects."""
+    optimize_and_assert_correctness(
+        source,
+        expected,
+        token_types_to_skip=TokenTypesToSkipConfig(
+            skip_logging_calls_below_level=logging.CRITICAL
+        ),
+    )
+
+
+def test_no_skip_logging_calls():
+    """Should not remove logging calls by default."""
+    optimize_and_assert_correctness("logger.debug('a')", "logger.debug('a')")
@@ -0,0 +1,74 @@
+import pytest
+
+from personal_python_ast_optimizer.config import CodeToSkipConfig
+from tests.utils import optimize_and_assert_correctness
+
+
+@pytest.mark.parametrize(
+    ("source", "expected"),
+    [
+        (
+            """
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+def foo(a: "Iterable[int]") -> None:
+    print(a)
+""",
+            "def foo(a):print(a)",
+        ),
+        (
+            """
+import typing as t
+
+if t.TYPE_CHECKING:
+    import foo
+else:
+    foo = None
+""",
+            "foo=None",
+        ),
+        (
+            """
+from typing_extensions import TYPE_CHECKING as TC
+
+if not TC:
+    import bar
+print(bar)
+""",
+            "import bar\nprint(bar)",
+        ),
+        (
+            """
+if __debug__:
+    print("debug")
+print(TYPE_CHECKING)
+""",
+            "print(TYPE_CHECKING)",
+        ),
+    ],
+)
+def test_skip_type_checking_and_debug_blocks(source: str, expected: str):
+    """Should remove TYPE_CHECKING and __debug__ guarded blocks."""
+    optimize_and_assert_correctness(
+        source,
+        expected,
+        code_to_skip=CodeToSkipConfig(
+            skip_type_checking_blocks=True, skip_debug_blocks=True
+        ),
+    )
+
+
+def test_no_skip_type_checking_and_debug_blocks():
+    """Should keep TYPE_CHECKING and __debug__ when not configured."""
+    source: str = """
+import typing
+
+if typing.TYPE_CHECKING or __debug__:
+    print()
+"""
+    optimize_and_assert_correctness(
+        source, "import typing\nif typing.TYPE_CHECKING or __debug__:print()"
+    )
@@ -0,0 +1,154 @@
+import pytest
+
+from personal_python_ast_optimizer.config import CodeToSkipConfig
+from tests.utils import optimize_and_assert_correctness
+
+
+@pytest.mark.parametrize(
+    ("source", "expected"),
+    [
+        (
+            """
+def foo(a):
+    if a:
+        return 1
+        print(a)
+    raise ValueError
+    print(a)""",
+            "def foo(a):\n\tif a:return 1\n\traise ValueError",
+        ),
+        (
+            """
+def foo(items):
+    for item in items:
+        if item:
+            break
+            print(item)
+        continue
+        print(item)""",
+            "def foo(items):\n\tfor item in items:\n\t\tif item:break\n\t\tcontinue",
+        ),
+        (
+            """
+import sys
+def foo(a):
+    if a:
+        return 1
+    else:
+        sys.exit(1)
+    print(a)""",
+            "import sys\ndef foo(a):\n\tif a:return 1\n\tsys.exit(1)",
+        ),
+        (
+            """
+def foo():
+    while True:
+        bar()
+    print(1)""",
+            "def foo():\n\twhile 1:bar()",
+        ),
+        (
+            """
+def foo(items):
+    while True:
+        for item in items:
+            break
+        else:
+            break
+    print(1)""",
+            "def foo(items):\n\twhile 1:\n\t\tfor item in items:break\n\t\telse:break\n\tprint(1)",  # noqa: E501
+        ),
+        (
+            """
+def foo():
+    try:
+        return bar()
+    finally:
+        print(1)
+    print(2)""",
+            "def foo():\n\ttry:return bar()\n\tfinally:print(1)",
+        ),
+        (
+            """
+def foo():
+    try:
+        return bar()
+    except ValueError:
+        pass
+    print(2)""",
+            "def foo():\n\ttry:return bar()\n\texcept ValueError:pass\n\tprint(2)",
+        ),
+        (
+            """
+import os
+os._exit(0)
+a = 1
+class A:
+    raise ValueError
+    b = 2""",
+            "import os\nos._exit(0)",
+        ),
+        (
+            """
+class A:
+    raise ValueError
+    b = 2""",
+            "class A:raise ValueError",
+        ),
+    ],
+)
+def test_skip_unreachable_code(source: str, expected: str):
+    optimize_and_assert_correctness(
+        source, expected, code_to_skip=CodeToSkipConfig(skip_unreachable_code=True)
+    )
+
+
+@pytest.mark.parametrize(
+    ("source", "expected"),
+    [
+        (
+            """
+def foo():
+    return
+    yield""",
+            "def foo():return;yield",
+        ),
+        (
+            """
+def foo():
+    print(a)
+    return
+    a = 1""",
+            "def foo():print(a);return;a=1",
+        ),
+        (
+            """
+def foo():
+    a = 2
+    return a
+    global a""",
+            "def foo():a=2;return a;global a",
+        ),
+    ],
+)
+def test_skip_unreachable_code_scope_changes(source: str, expected: str):
+    optimize_and_assert_correctness(
+        source, expected, code_to_skip=CodeToSkipConfig(skip_unreachable_code=True)
+    )
+
+
+def test_skip_unreachable_code_custom_no_return_functions():
+    optimize_and_assert_correctness(
+        """
+import sys
+def foo():
+    fail()
+    print(1)
+def bar():
+    sys.exit()
+    print(1)""",
+        "import sys\ndef foo():fail()\ndef bar():sys.exit();print(1)",
+        code_to_skip=CodeToSkipConfig(
+            skip_unreachable_code=True, no_return_functions=["fail"]
+        ),
+    )
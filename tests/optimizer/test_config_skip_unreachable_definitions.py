@@ -0,0 +1,190 @@
+import pytest
+
+from personal_python_ast_optimizer.config import (
+    CodeToSkipConfig,
+    PackageOptimizationsConfig,
+)
+from tests.utils import optimize_package_and_assert_correctness
+
+
+@pytest.mark.parametrize(
+    ("sources", "expected"),
+    [
+        (
+            {
+                "main.py": """
+from pkg.util import used
+import pkg.helpers
+
+used()
+pkg.helpers.helper()""",
+                "pkg/__init__.py": "",
+                "pkg/util.py": """
+import os
+
+def used():
+    return _private()
+
+def _private():
+    return 1
+
+def unused():
+    return os.getcwd()
+
+class Unused:
+    pass""",
+                "pkg/helpers.py": """
+def helper(): pass
+def other(): pass""",
+            },
+            {
+                "main.py": "from pkg.util import used\nimport pkg.helpers\nused()\npkg.helpers.helper()",  # noqa: E501
+                "pkg/__init__.py": "",
+                "pkg/util.py": "def used():return _private()\ndef _private():return 1",
+                "pkg/helpers.py": "def helper():pass",
+            },
+        ),
+        (
+            {
+                "main.py": """
+from .shapes import Square, Writer
+print(Square().area())
+print("hi", file=Writer())""",
+                "shapes.py": """
+class Shape:
+    def area(self): pass
+    def unused(self): pass
+
+class Square(Shape):
+    def area(self): pass
+
+class Writer:
+    def write(self, text): pass""",
+            },
+            {
+                "main.py": "from .shapes import Square,Writer\nprint(Square().area())\nprint('hi',file=Writer())",  # noqa: E501
+                "shapes.py": "class Shape:\n\tdef area(self):pass\n\tdef unused(self):pass\nclass Square(Shape):\n\tdef area(self):pass\nclass Writer:\n\tdef write(self,text):pass",  # noqa: E501
+            },
+        ),
+        (
+            {
+                "main.py": """
+from . import a
+getattr(a, "by_name")()""",
+                "a.py": """
+def by_name(): pass
+def unused(): pass""",
+                "b.py": """
+def never_imported(): pass""",
+            },
+            {
+                "main.py": "from . import a\ngetattr(a,'by_name')()",
+                "a.py": "def by_name():pass\ndef unused():pass",
+                "b.py": "def never_imported():pass",
+            },
+        ),
+        (
+            {
+                "main.py": """
+from .a import *""",
+                "a.py": """
+def public(): pass""",
+            },
+            {
+                "main.py": "from .a import*",
+                "a.py": "def public():pass",
+            },
+        ),
+        (
+            {
+                "main.py": """
+from .a import kept
+kept()""",
+                "a.py": """
+@register
+def decorated(): pass
+
+def kept(): pass
+
+def dynamic(): return globals()""",
+            },
+            {
+                "main.py": "from .a import kept\nkept()",
+                "a.py": "@register\ndef decorated():pass\ndef kept():pass\ndef dynamic():return globals()",  # noqa: E501
+            },
+        ),
+    ],
+)
+def test_skip_unreachable_definitions(
+    sources: dict[str, str], expected: dict[str, str]
+):
+    optimize_package_and_assert_correctness(
+        sources,
+        expected,
+        PackageOptimizationsConfig(
+            entry_points=["main"], skip_unreachable_definitions=True
+        ),
+    )
+
+
+def test_skip_unreachable_methods():
+    optimize_package_and_assert_correctness(
+        {
+            "main.py": """
+from .shapes import Square
+print(Square().area())""",
+            "shapes.py": """
+class Shape:
+    def area(self): pass
+    def unused(self): pass
+    def __repr__(self): pass
+
+class Square(Shape):
+    def area(self): pass
+    def perimeter(self): pass
+    @staticmethod
+    def create(): pass
+
+class Error(ValueError):
+    def unused(self): pass
+
+class Thread(threading.Thread):
+    def run(self): pass""",
+        },
+        {
+            "main.py": "from .shapes import Square\nprint(Square().area())",
+            "shapes.py": "class Shape:\n\tdef area(self):pass\n\tdef __repr__(self):pass\nclass Square(Shape):\n\tdef area(self):pass\nclass Thread(threading.Thread):\n\tdef run(self):pass",  # noqa: E501
+        },
+        PackageOptimizationsConfig(
+            entry_points=["main"],
+            skip_unreachable_definitions=True,
+            skip_unreachable_methods=True,
+        ),
+    )
+
+
+def test_skip_unreachable_definitions_and_unused_imports():
+    optimize_package_and_assert_correctness(
+        {
+            "main.py": """
+import util
+util.used()""",
+            "helpers.py": "def helper(): pass",
+            "util.py": """
+import helpers
+
+def used(): pass
+
+def unused():
+    return helpers.helper()""",
+        },
+        {
+            "main.py": "import util\nutil.used()",
+            "helpers.py": "def helper():pass",
+            "util.py": "def used():pass",
+        },
+        PackageOptimizationsConfig(
+            entry_points=["main"], skip_unreachable_definitions=True
+        ),
+        code_to_skip=CodeToSkipConfig(skip_unused_imports=True),
+    )
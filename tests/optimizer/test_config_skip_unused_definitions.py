@@ -0,0 +1,147 @@
+import pytest
+
+from personal_python_ast_optimizer.config import (
+    CodeToSkipConfig,
+    UnusedDefinitionsToSkip,
+)
+from tests.utils import optimize_and_assert_correctness
+
+
+@pytest.mark.parametrize(
+    ("source", "expected"),
+    [
+        (
+            """
+import os
+
+def _unused():
+    return os.getcwd()
+
+def _helper():
+    return 1
+
+def _recursive(n):
+    return _recursive(n - 1)
+
+def public():
+    return _helper()""",
+            "def _helper():return 1\ndef public():return _helper()",
+        ),
+        (
+            """
+_A = 1
+_B = _A + 1
+_C: int = 2
+_D = foo()
+
+class _Unused(Exception):
+    x = 1
+
+    @staticmethod
+    def bar(): pass
+
+print(_B)""",
+            "_A=1\n_B=_A+1\n_D=foo()\nprint(_B)",
+        ),
+        (
+            """
+def public(): pass
+def other(): pass
+__all__ = ["public"]""",
+            "def public():pass\n__all__=['public']",
+        ),
+        (
+            """
+def public(): pass
+def other(): pass
+__all__ = ["public"]
+__all__ += ["other"]""",
+            "def public():pass\ndef other():pass\n__all__=['public']\n__all__+=['other']",  # noqa: E501
+        ),
+        (
+            """
+def _other(): pass
+print(getattr(a, "_helper"))
+def _helper(): pass""",
+            "print(getattr(a,'_helper'))\ndef _helper():pass",
+        ),
+        (
+            """
+@register
+def _decorated(): pass
+
+class _Meta(metaclass=Registry): pass
+
+class _Base(Plugin): pass
+
+def _default(a=foo()): pass
+
+def _rebound(): pass
+if a:
+    _rebound = 1
+
+def _changed(): pass
+def bar():
+    global _changed
+    _changed = 1""",
+            "@register\ndef _decorated():pass\nclass _Meta(metaclass=Registry):pass\nclass _Base(Plugin):pass\ndef _default(a=foo()):pass\ndef _rebound():pass\nif a:_rebound=1\ndef _changed():pass\ndef bar():global _changed;_changed=1",  # noqa: E501
+        ),
+        (
+            """
+def _helper(): pass
+def foo():
+    return globals()["_" + "helper"]""",
+            "def _helper():pass\ndef foo():return globals()['_'+'helper']",
+        ),
+        (
+            """
+def _helper(): pass
+def __getattr__(name):
+    return 1""",
+            "def _helper():pass\ndef __getattr__(name):return 1",
+        ),
+        (
+            """
+def _helper(): pass
+def _preserved(): pass""",
+            "def _preserved():pass",
+        ),
+    ],
+)
+def test_skip_unused_definitions(source: str, expected: str):
+    optimize_and_assert_correctness(
+        source,
+        expected,
+        code_to_skip=CodeToSkipConfig(
+            skip_unused_definitions=UnusedDefinitionsToSkip.NOT_EXPORTED,
+            unused_definitions_to_preserve=["_preserved"],
+        ),
+    )
+
+
+@pytest.mark.parametrize(
+    ("source", "expected"),
+    [
+        (
+            """
+def public(): pass
+def main(): pass
+if __name__ == "__main__":
+    main()""",
+            "def main():pass\nif __name__=='__main__':main()",
+        ),
+    ],
+)
+def test_skip_all_unused_definitions(source: str, expected: str):
+    optimize_and_assert_correctness(
+        source,
+        expected,
+        code_to_skip=CodeToSkipConfig(
+            skip_unused_definitions=UnusedDefinitionsToSkip.ALL
+        ),
+    )
+
+
+def test_skip_unused_definitions_none():
+    source: str = "def _helper(): pass"
+    optimize_and_assert_correctness(source, "def _helper():pass")
@@ -50,6 +50,14 @@ bar()""",
             "import asdf",
             "import asdf",
         ),
+        (
+            "import os.path\nprint(os.path.sep)",
+            "import os.path\nprint(os.path.sep)",
+        ),
+        (
+            "from a import *\nimport b",
+            "from a import*",
+        ),
     ],
 )
 def test_remove_unused_import(source: str, expected: str):
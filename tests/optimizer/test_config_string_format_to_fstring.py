@@ -0,0 +1,58 @@
+import pytest
+
+from personal_python_ast_optimizer.config import IdiomRewrites, PerfOptimizationsConfig
+from tests.utils import optimize_and_assert_correctness
+
+
+@pytest.mark.parametrize(
+    ("source", "expected"),
+    [
+        ('a = "%s-%r %%" % (b, c)', "a=f'{b!s}-{c!r} %'"),
+        ('a = "{}:{!r:>5}".format(b, c)', "a=f'{b}:{c!r:>5}'"),
+        ('a = "{1}{0}{1}".format(b, c)', "a=f'{c}{b}{c}'"),
+        ('a = "{}-{x}".format(b(), x=c())', "a=f'{b()}-{c()}'"),
+        ('a = "{x}-{}".format(b(), x=c())', "a='{x}-{}'.format(b(),x=c())"),
+        ('a = "a" + str(b) + "c" + str(d)', "a=f'a{b!s}c{d!s}'"),
+        ('a = "a" + "%s" % (b,)', "a=f'a{b!s}'"),
+        # Not exactly the same
+        ('a = "%d" % (b,)', "a='%d'%(b,)"),
+        ('a = "%s" % b', "a='%s'%b"),
+        ('a = "%s %s" % (b,)', "a='%s %s'%(b,)"),
+        ('a = "{1}{0}".format(b(), c())', "a='{1}{0}'.format(b(),c())"),
+        ('a = "{}".format(b, c)', "a='{}'.format(b,c)"),
+        ('a = "{0.x}".format(b)', "a='{0.x}'.format(b)"),
+        ('a = "{}{1}".format(b, c)', "a='{}{1}'.format(b,c)"),
+        ('a = "a" + b + str(c)', "a='a'+b+str(c)"),
+        (
+            'def str(a):\n\treturn a\nb = "a" + str(c)',
+            "def str(a):return a\nb='a'+str(c)",
+        ),
+    ],
+)
+def test_string_format_to_fstring(source: str, expected: str):
+    optimize_and_assert_correctness(
+        source,
+        expected,
+        perf_optimizations=PerfOptimizationsConfig(
+            idiom_rewrites=IdiomRewrites.STRING_FORMAT_TO_FSTRING
+        ),
+    )
+
+
+@pytest.mark.parametrize(
+    ("source", "expected"),
+    [
+        ('a = "{:.2f}mb".format(1.5)', "a='1.50mb'"),
+        ('a = "%s-%r" % (1, "b")', "a=\"1-'b'\""),
+        ('a = "{}{:>3}".format(b, 1)', "a=f'{b}  1'"),
+        ('a = f"{b:{1}}"', "a=f'{b:1}'"),
+    ],
+)
+def test_string_format_to_fstring_fold_constants(source: str, expected: str):
+    optimize_and_assert_correctness(
+        source,
+        expected,
+        perf_optimizations=PerfOptimizationsConfig(
+            fold_constants=True, idiom_rewrites=IdiomRewrites.STRING_FORMAT_TO_FSTRING
+        ),
+    )
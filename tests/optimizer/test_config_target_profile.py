@@ -0,0 +1,87 @@
+import pytest
+
+from personal_python_ast_optimizer.config import (
+    PerfOptimizationsConfig,
+    TargetProfile,
+    TokensToFold,
+)
+from tests.utils import optimize_and_assert_correctness
+
+_LINUX_PROFILE = TargetProfile(
+    python_version=(3, 12),
+    platform="linux",
+    os_name="posix",
+    implementation_name="cpython",
+    platform_system="Linux",
+)
+
+
+@pytest.mark.parametrize(
+    ("source", "expected"),
+    [
+        (
+            """
+import sys
+if sys.version_info >= (3, 12):
+    from typing import override
+else:
+    from typing_extensions import override
+print(override)""",
+            "from typing import override\nprint(override)",
+        ),
+        ("import sys\nif sys.version_info < (3, 11):print()", ""),
+        ("import sys\nprint(sys.version_info > (3, 12))", "print(True)"),
+        ("import sys\nprint(sys.version_info <= (3, 12))", "print(False)"),
+        ("import sys\nprint((3, 12) <= sys.version_info)", "print(True)"),
+        ("import sys\nprint(sys.version_info == (3, 12))", "print(False)"),
+        ("import sys\nprint(sys.version_info[:2] == (3, 12))", "print(True)"),
+        ("import sys\nprint(sys.version_info[0] == 3)", "print(True)"),
+        ("import sys\nprint(sys.version_info.minor)", "print(12)"),
+        (
+            "import sys\nprint(sys.version_info >= (3, 12, 1))",
+            "import sys\nprint(sys.version_info>=(3,12,1))",
+        ),
+        (
+            "import sys\nprint(sys.version_info[2])",
+            "import sys\nprint(sys.version_info[2])",
+        ),
+        (
+            """
+import os
+import sys
+if sys.platform == "win32" or os.name == "nt":
+    import winreg
+    print(winreg)
+elif sys.platform.startswith("linux"):
+    print("linux")""",
+            "print('linux')",
+        ),
+        (
+            "import sys\nprint(sys.implementation.name)",
+            "print('cpython')",
+        ),
+        (
+            "import platform\nif platform.system() == 'Darwin':print()",
+            "",
+        ),
+    ],
+)
+def test_target_profile(source: str, expected: str):
+    """Should fold version and platform checks of the target environment."""
+    optimize_and_assert_correctness(
+        source,
+        expected,
+        perf_optimizations=PerfOptimizationsConfig(target_profile=_LINUX_PROFILE),
+    )
+
+
+def test_target_profile_explicit_folds_take_priority():
+    """Should prefer name_or_attr_to_fold over values from a target profile."""
+    optimize_and_assert_correctness(
+        "import sys\nprint(sys.platform)",
+        "print('cygwin')",
+        perf_optimizations=PerfOptimizationsConfig(
+            target_profile=_LINUX_PROFILE,
+            name_or_attr_to_fold=TokensToFold({"sys.platform": "cygwin"}),
+        ),
+    )
@@ -0,0 +1,148 @@
+import pytest
+
+from personal_python_ast_optimizer.config import PerfOptimizationsConfig
+from tests.utils import optimize_and_assert_correctness
+
+
+@pytest.mark.parametrize(
+    ("source", "expected"),
+    [
+        (
+            """
+def dot(a, b):
+    total = 0
+    for i in range(3):
+        total += a[i] * b[i]
+    return total""",
+            "def dot(a,b):total=0;total+=a[0]*b[0];total+=a[1]*b[1];total+=a[2]*b[2];i=2;return total",  # noqa: E501
+        ),
+        (
+            """
+def foo(d):
+    for k in ("a", "b"):
+        print(d[k])
+    else:
+        print(k)""",
+            "def foo(d):print(d['a']);print(d['b']);k='b';print(k)",
+        ),
+        (
+            """
+def foo(m):
+    for i in range(1, 5, 2):
+        for j in [0, 1]:
+            m[i][j] = i + j""",
+            "def foo(m):m[1][0]=1;m[1][1]=2;j=1;m[3][0]=3;m[3][1]=4;j=1;i=3",
+        ),
+        # Nested scopes could read the variable later
+        (
+            """
+def foo(fs):
+    for i in range(2):
+        fs.append(lambda: i)""",
+            "def foo(fs):i=0;fs.append(lambda:i);i=1;fs.append(lambda:i)",
+        ),
+        # A handler could read the variable
+        (
+            """
+def foo(f):
+    try:
+        for i in range(2):
+            f(i)
+    except ValueError:
+        print(i)""",
+            "def foo(f):\n\ttry:i=0;f(0);i=1;f(1)\n\texcept ValueError:print(i)",
+        ),
+        (
+            """
+from contextlib import suppress
+def foo(f):
+    with suppress(ValueError):
+        for i in range(2):
+            f(i)
+    return i""",
+            "from contextlib import suppress\ndef foo(f):\n\twith suppress(ValueError):i=0;f(0);i=1;f(1)\n\treturn i",  # noqa: E501
+        ),
+    ],
+)
+def test_unroll_loops(source: str, expected: str):
+    optimize_and_assert_correctness(
+        source,
+        expected,
+        perf_optimizations=PerfOptimizationsConfig(
+            fold_constants=True, unroll_loops_max_iterations=4
+        ),
+    )
+
+
+@pytest.mark.parametrize(
+    ("source", "expected"),
+    [
+        (
+            """
+def foo(xs):
+    for i in range(3):
+        if xs[i]:
+            break""",
+            "def foo(xs):\n\tfor i in range(3):\n\t\tif xs[i]:break",
+        ),
+        (
+            """
+def foo(xs):
+    for i in range(3):
+        if xs[i]:
+            continue
+        print(i)""",
+            "def foo(xs):\n\tfor i in range(3):\n\t\tif xs[i]:continue\n\t\tprint(i)",
+        ),
+        (
+            """
+def foo(xs):
+    for i in range(5):
+        xs(i)""",
+            "def foo(xs):\n\tfor i in range(5):xs(i)",
+        ),
+        (
+            """
+def foo(xs):
+    for i in range(2):
+        if xs[i]:
+            xs(i)
+        else:
+            xs(i)
+            xs(i)
+            xs(i)""",
+            "def foo(xs):\n\tfor i in range(2):\n\t\tif xs[i]:xs(i)\n\t\telse:xs(i);xs(i);xs(i)",  # noqa: E501
+        ),
+        (
+            """
+def foo(xs):
+    for i in range(2):
+        i += 1
+        xs(i)""",
+            "def foo(xs):\n\tfor i in range(2):i+=1;xs(i)",
+        ),
+        (
+            """
+for i in range(2):
+    print(i)""",
+            "for i in range(2):print(i)",
+        ),
+        (
+            """
+def range(n):
+    return [n]
+def foo():
+    for i in range(2):
+        print(i)""",
+            "def range(n):return[n]\ndef foo():\n\tfor i in range(2):print(i)",
+        ),
+    ],
+)
+def test_unroll_loops_not_applied(source: str, expected: str):
+    optimize_and_assert_correctness(
+        source,
+        expected,
+        perf_optimizations=PerfOptimizationsConfig(
+            fold_constants=True, unroll_loops_max_iterations=4
+        ),
+    )
@@ -28,6 +28,25 @@ def test_and_all_true():
     optimize_and_assert_correctness(*_get_test_inputs("1 and 2 and 3", "3"))
 
 
+def test_duplicate_operands():
+    """Should remove operands already evaluated that have no side effects."""
+    optimize_and_assert_correctness(
+        *_get_test_inputs("a and a or b or a.c or b or a.c", "a or b or a.c")
+    )
+
+
+def test_duplicate_last_operand():
+    """Should only remove the last operand if the same one is right before it."""
+    optimize_and_assert_correctness(*_get_test_inputs("a or b or a", "a or b or a"))
+
+
+def test_duplicate_operands_with_side_effects():
+    """Should keep operands if a call between them could change them."""
+    optimize_and_assert_correctness(
+        *_get_test_inputs("a or f() or a or b or f()", "a or f()or a or b or f()")
+    )
+
+
 def _get_test_inputs(condition: str, expected: str) -> tuple[str, str]:
     return (
         f"""
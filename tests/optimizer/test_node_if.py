@@ -62,6 +62,10 @@ else:test2()""".lstrip(),
             "if str(a) == 'a':pass",
             "",
         ),
+        (
+            "if str(foo()) == 'a' or (lambda: bar()):pass",
+            "foo()",
+        ),
         (
             """
 'a' if 'True' == b else 'b'
@@ -2,6 +2,10 @@ import pytest
 
 from personal_python_ast_optimizer.config import (
     CodeToSkipConfig,
+    FunctionProfile,
+    PackageOptimizationsConfig,
+    PerfOptimizationsConfig,
+    TargetProfile,
     TokenTypesToSkipConfig,
 )
 
@@ -18,3 +22,79 @@ def test_perserve_imports_without_skip_unused_imports():
         ValueError, match=r"Can't preserve imports if skip_unused_imports is False"
     ):
         CodeToSkipConfig(skip_unused_imports=False, unused_imports_to_preserve=["foo"])
+
+
+def test_target_profile_invalid_version():
+    with pytest.raises(
+        ValueError, match=r"python_version must be in the form \(major, minor, micro\)"
+    ):
+        TargetProfile(python_version=(3, 12, 0, "final"))  # type: ignore[arg-type]
+
+
+def test_preserve_definitions_without_skip_unused_definitions():
+    with pytest.raises(
+        ValueError,
+        match=r"Can't preserve definitions if skip_unused_definitions is NONE",
+    ):
+        CodeToSkipConfig(unused_definitions_to_preserve=["foo"])
+
+
+def test_skip_unreachable_definitions_without_entry_points():
+    with pytest.raises(
+        ValueError,
+        match=r"Can't skip unreachable definitions without any entry_points",
+    ):
+        PackageOptimizationsConfig(skip_unreachable_definitions=True)
+
+
+def test_no_return_functions_without_skip_unreachable_code():
+    with pytest.raises(
+        ValueError,
+        match=r"Can't set no_return_functions if skip_unreachable_code is False",
+    ):
+        CodeToSkipConfig(no_return_functions=["fail"])
+
+
+def test_assume_numeric_operands_without_simplify_algebra():
+    with pytest.raises(
+        ValueError,
+        match=r"Can't set assume_numeric_operands if simplify_algebra is False",
+    ):
+        PerfOptimizationsConfig(assume_numeric_operands=True)
+
+
+@pytest.mark.parametrize("min_branches", [-1, 1])
+def test_invalid_if_chains_to_dict_min_branches(min_branches: int):
+    with pytest.raises(
+        ValueError,
+        match=r"if_chains_to_dict_min_branches must be 0 or at least 2",
+    ):
+        PerfOptimizationsConfig(if_chains_to_dict_min_branches=min_branches)
+
+
+@pytest.mark.parametrize("timeout", [0, -1.5])
+def test_invalid_evaluate_calls_timeout(timeout: float):
+    with pytest.raises(ValueError, match=r"evaluate_calls_timeout must be positive"):
+        PerfOptimizationsConfig(evaluate_calls_timeout=timeout)
+
+
+def test_invalid_function_profile_min_calls():
+    with pytest.raises(ValueError, match=r"min_calls must be at least 1"):
+        FunctionProfile({}, min_calls=0)
+
+
+def test_skip_unreachable_methods_without_definitions():
+    with pytest.raises(
+        ValueError,
+        match=r"Can't set skip_unreachable_methods if "
+        r"skip_unreachable_definitions is False",
+    ):
+        PackageOptimizationsConfig(entry_points=["main"], skip_unreachable_methods=True)
+
+
+def test_logger_names_without_skip_logging_calls():
+    with pytest.raises(
+        ValueError,
+        match=r"Can't set logger_names if skip_logging_calls_below_level is NOTSET",
+    ):
+        TokenTypesToSkipConfig(logger_names=["logger"])
@@ -0,0 +1,37 @@
+import cProfile
+import json
+import os
+from pathlib import Path
+
+from personal_python_ast_optimizer.profiling import (
+    load_json_profile,
+    load_pstats_profile,
+)
+
+
+def test_load_pstats_profile(tmp_path: Path):
+    module_path: Path = tmp_path / "pkg" / "mod.py"
+    module_path.parent.mkdir()
+    module_path.write_text("def foo():\n\tpass\ndef bar():\n\tfoo()\n")
+
+    namespace: dict[str, object] = {}
+    exec(compile(module_path.read_text(), str(module_path), "exec"), namespace)  # noqa: S102
+    profiler = cProfile.Profile()
+    profiler.runcall(lambda: [namespace["bar"]() for _ in range(3)])  # type: ignore[operator]
+    stats_path: str = os.path.join(tmp_path, "out.prof")
+    profiler.dump_stats(stats_path)
+
+    profile = load_pstats_profile(stats_path, str(tmp_path), min_calls=2)
+
+    assert profile.call_counts == {"pkg/mod.py": {"foo": 3, "bar": 3}}
+    assert profile.min_calls == 2
+
+
+def test_load_json_profile(tmp_path: Path):
+    path: Path = tmp_path / "profile.json"
+    path.write_text(json.dumps({"mod.py": {"foo": 5}}))
+
+    profile = load_json_profile(str(path))
+
+    assert profile.call_counts == {"mod.py": {"foo": 5}}
+    assert profile.min_calls == 1
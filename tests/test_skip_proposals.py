@@ -0,0 +1,135 @@
+import json
+from pathlib import Path
+
+from personal_python_ast_optimizer.skip_proposals import (
+    SkipProposal,
+    format_skip_report,
+    propose_skips,
+)
+from tests.utils import optimize_and_assert_correctness
+
+_SOURCE = """import json
+import os
+
+def used():
+    return os.getcwd()
+
+def _unused():
+    return json.dumps(1)
+
+class Unused:
+    def method(self):
+        return 1
+
+class Used:
+    def method(self):
+        return 1
+
+def referenced():
+    return 2
+
+HANDLERS = [referenced]
+
+@register
+def registered():
+    return 3
+
+if os.name == "nt":
+    def _unused():
+        return 4
+
+used()
+Used().method()
+"""
+
+_EXECUTED_LINES = [1, 2, 4, 5, 7, 10, 11, 14, 15, 16, 18, 21, 23, 24, 27, 31, 32]
+
+
+def _propose(
+    tmp_path: Path, sources: dict[str, str], executed_lines: list[int] = _EXECUTED_LINES
+) -> dict[str, SkipProposal]:
+    coverage_path: Path = tmp_path / "coverage.json"
+    coverage_path.write_text(
+        json.dumps(
+            {
+                "meta": {"format": 3},
+                "files": {str(tmp_path / "mod.py"): {"executed_lines": executed_lines}},
+            }
+        )
+    )
+    return propose_skips(str(coverage_path), sources, str(tmp_path))
+
+
+def test_propose_skips(tmp_path: Path):
+    proposal: SkipProposal = _propose(tmp_path, {"mod.py": _SOURCE})["mod.py"]
+
+    assert proposal.functions_to_skip == []
+    assert proposal.classes_to_skip == ["Unused"]
+    assert proposal.module_imports_to_skip == []
+    assert proposal.warnings == [
+        "Not skipping registered since its decorator could use it without calling it",
+        "Not skipping referenced since line 21 uses it and ran",
+        "Other modules could import Unused, which fails if it is skipped",
+    ]
+
+
+def test_propose_skips_unskipped_use(tmp_path: Path):
+    source: str = """class _ParseError(Exception):
+    pass
+
+def parse(text):
+    if not text:
+        raise _ParseError
+    return text
+
+def _unused():
+    return _ParseError
+
+try:
+    parse("a")
+except _ParseError:
+    pass
+"""
+    proposal: SkipProposal = _propose(
+        tmp_path, {"mod.py": source}, [1, 2, 4, 5, 7, 9, 12, 13]
+    )["mod.py"]
+
+    assert proposal.classes_to_skip == []
+    assert proposal.functions_to_skip == ["_unused"]
+    assert proposal.warnings == [
+        "Not skipping _ParseError since line 14 uses it and isn't skipped"
+    ]
+
+
+def test_propose_skips_config(tmp_path: Path):
+    # Without the other definition of _unused, which could run on Windows
+    source: str = _SOURCE.replace(
+        'if os.name == "nt":\n    def _unused():\n        return 4', "pass"
+    )
+    proposal: SkipProposal = _propose(tmp_path, {"mod.py": source})["mod.py"]
+
+    assert proposal.functions_to_skip == ["_unused"]
+    assert proposal.module_imports_to_skip == ["json"]
+    optimize_and_assert_correctness(
+        source,
+        "import os\ndef used():return os.getcwd()\nclass Used:\n\tdef method(self):return 1\ndef referenced():return 2\nHANDLERS=[referenced]\n@register\ndef registered():return 3\nused()\nUsed().method()",  # noqa: E501
+        tokens_to_skip=proposal.to_tokens_to_skip_config(),
+    )
+
+
+def test_propose_skips_never_imported(tmp_path: Path):
+    proposals: dict[str, SkipProposal] = _propose(
+        tmp_path, {"mod.py": _SOURCE, "other.py": "def foo():\n\tpass\n"}
+    )
+
+    assert proposals["other.py"].functions_to_skip == []
+    assert proposals["other.py"].warnings == ["Never imported, so nothing is proposed"]
+    assert format_skip_report(proposals) == (
+        "mod.py\n"
+        "  classes_to_skip: Unused\n"
+        "  Warning: Not skipping registered since its decorator could use it without calling it\n"  # noqa: E501
+        "  Warning: Not skipping referenced since line 21 uses it and ran\n"
+        "  Warning: Other modules could import Unused, which fails if it is skipped\n"
+        "other.py\n"
+        "  Warning: Never imported, so nothing is proposed"
+    )
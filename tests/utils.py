@@ -5,12 +5,16 @@ import pytest
 from personal_python_ast_optimizer.config import (
     CodeToSkipConfig,
     OptimizeConfig,
+    PackageOptimizationsConfig,
     PerfOptimizationsConfig,
     TokensToSkipConfig,
     TokenTypesToSkipConfig,
 )
 from personal_python_ast_optimizer.minifier import MinifyUnparser
-from personal_python_ast_optimizer.run import optimize_source_and_minify
+from personal_python_ast_optimizer.run import (
+    optimize_source_and_minify,
+    optimize_sources_and_minify,
+)
 
 
 class OptimizeOutputError(Exception):
@@ -59,6 +63,26 @@ def optimize_and_assert_correctness(
     _assert_correctness(optimized_code, expected)
 
 
+def optimize_package_and_assert_correctness(
+    sources: dict[str, str],
+    expected: dict[str, str],
+    package_optimizations: PackageOptimizationsConfig,
+    code_to_skip: CodeToSkipConfig | None = None,
+    perf_optimizations: PerfOptimizationsConfig | None = None,
+):
+    optimized_code: dict[str, str] = optimize_sources_and_minify(
+        sources,
+        OptimizeConfig(
+            code_to_skip=code_to_skip,
+            perf_optimizations=perf_optimizations,
+            package_optimizations=package_optimizations,
+        ),
+    )
+
+    for file_name, code in optimized_code.items():
+        _assert_correctness(code, expected[file_name])
+
+
 def minify_and_assert_correctness(source: str, expected: str) -> None:
     module: ast.Module = ast.parse(source)
     minified_code: str = MinifyUnparser().visit(module)